@@ -1,25 +1,44 @@
+import csv
+import io
 import os
-import pandas as pd
-from typing import List, Optional
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional
+from app.exceptions import FileProcessingError
 from app.calculation import Calculation
-from app.history import HistoryObserver
+from app.history import HistoryEvent, HistoryObserver, _snapshot
 from app import config
 from typing import Sequence
 
 class AutoSaveObserver(HistoryObserver):
     """
     Automatically saves the list of calculations to a CSV file.
+
+    With ``background`` enabled, the file is rewritten by a BackgroundWriter: each
+    change only replaces the pending copy of the history and queues a marker, and the
+    writer saves the newest copy once per burst, so commands do not wait for pandas.
     """
 
-    def __init__(self, history: Sequence[Calculation], output_file: Optional[str] = None):
+    reads_history = True
+
+    def __init__(self, history: Sequence[Calculation], output_file: Optional[str] = None,
+                 background: Optional[bool] = None):
         """
         Initialize the AutoSaveObserver.
 
         :param history: List of calculations to track and save.
         :param output_file: Optional path to save the history CSV.
+        :param background: Write on a background thread (defaults to CALCULATOR_AUTO_SAVE_BACKGROUND).
         """
         self.history = history
         self.output_file = output_file or os.path.join(config.CALCULATOR_HISTORY_DIR, "history.csv")
+        self._lock = threading.Lock()
+        self._pending: Optional[Sequence[Calculation]] = None
+        if background is None:
+            background = config.CALCULATOR_AUTO_SAVE_BACKGROUND
+        self.writer = BackgroundWriter(self._write_pending, name="autosave-full-writer") if background else None
 
     def update(self, _: Calculation) -> None:
         """
@@ -27,12 +46,414 @@ class AutoSaveObserver(HistoryObserver):
 
         :param _: The most recent Calculation (not used directly).
         """
-        data = [{
-            "operation": c.__class__.__name__,
-            "operand1": c.a,
-            "operand2": c.b,
-            "result": c.result
-        } for c in self.history]
+        self._save(self.history)
+
+    def update_values(self, operation: str, a: float, b: float, result: Optional[float]) -> None:
+        self._save(self.history)
+
+    def update_many(self, events: Sequence[HistoryEvent]) -> None:
+        """
+        Save the history once for a whole batch of events.
+
+        :param events: The batch; the copy of the history attached to the newest
+            event (by ObserverBus) is saved, or the history itself if there is none.
+        """
+        if events:
+            history = events[-1].history
+            self._save(self.history if history is None else history)
+
+    def flush(self) -> None:
+        """
+        Write the current history, e.g. for the ``save`` command, and wait until it is written.
+        """
+        if len(self.history):
+            self.update(self.history[-1])
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self) -> None:
+        """
+        Write the pending copy of the history and stop the writer thread.
+        """
+        if self.writer is not None:
+            self.writer.close()
+
+    def _save(self, history: Sequence[Calculation]) -> None:
+        if self.writer is None:
+            self._write(history)
+            return
+        if history is self.history:
+            # The live history keeps changing while the writer thread reads it.
+            history = _snapshot(history)
+        with self._lock:
+            self._pending = history
+        self.writer.put(True)
+
+    def _write_pending(self, _: List) -> None:
+        with self._lock:
+            history, self._pending = self._pending, None
+        if history is not None:
+            self._write(history)
+
+    def _write(self, history: Sequence[Calculation]) -> None:
+        import pandas as pd
+
+        output_dir = os.path.dirname(self.output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        to_dataframe = getattr(history, "to_dataframe", None)
+        if to_dataframe is not None:
+            df = to_dataframe()
+        else:
+            df = pd.DataFrame([{
+                "operation": c.__class__.__name__,
+                "operand1": c.a,
+                "operand2": c.b,
+                "result": c.result
+            } for c in history])
+        # Write a temporary file and move it into place, so readers (and a crash)
+        # only ever see a complete file.
+        tmp_file = self.output_file + ".tmp"
+        df.to_csv(tmp_file, index=False, encoding=config.CALCULATOR_DEFAULT_ENCODING)
+        os.replace(tmp_file, self.output_file)
+
+
+UNDO_MARKER = "__undo__"
+CLEAR_MARKER = "__clear__"
+FIELDNAMES = ["operation", "operand1", "operand2", "result"]
+_STOP = object()
+_FLUSH = object()
+
+
+def replay_rows(rows: Iterable[List[str]], max_rows: Optional[int] = None) -> List[List[str]]:
+    """
+    Apply the tombstones in an incremental history file and return the live rows.
+
+    :param rows: CSV rows without the header.
+    :param max_rows: Keep only the most recent ``max_rows`` live rows.
+    :return: The rows that are still part of the history, oldest first.
+    """
+    live: Deque[List[str]] = deque(maxlen=max_rows)
+    for row in rows:
+        if not row:
+            continue
+        if row[0] == UNDO_MARKER:
+            if live:
+                live.pop()
+        elif row[0] == CLEAR_MARKER:
+            live.clear()
+        else:
+            live.append(row)
+    return list(live)
+
+
+class BackgroundWriter:
+    """
+    Writes records on a background thread.
+
+    Records are handed over through a bounded queue (``put`` blocks when it is full).
+    The thread waits up to ``flush_interval`` seconds after the first record of a
+    burst, collecting at most ``max_batch`` records, and writes them with a single
+    call to ``write_batch``.
+    """
+
+    def __init__(self, write_batch: Callable[[List], None], queue_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, max_batch: Optional[int] = None,
+                 name: str = "autosave-writer"):
+        """
+        :param write_batch: Called on the writer thread with a list of records.
+        :param queue_size: Maximum number of records waiting to be written.
+        :param flush_interval: Seconds to wait for more records before writing.
+        :param max_batch: Maximum number of records per write.
+        """
+        self.write_batch = write_batch
+        self.flush_interval = (flush_interval if flush_interval is not None
+                               else config.CALCULATOR_AUTO_SAVE_FLUSH_INTERVAL)
+        self.max_batch = max_batch or config.CALCULATOR_AUTO_SAVE_MAX_BATCH
+        self._queue: queue.Queue = queue.Queue(queue_size or config.CALCULATOR_AUTO_SAVE_QUEUE_SIZE)
+        self.flushes = 0
+        self.records_written = 0
+        self.max_queue_depth = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of records waiting to be written."""
+        return self._queue.qsize()
+
+    def put(self, record) -> None:
+        """
+        Queue a record for writing, blocking while the queue is full.
+
+        :raises FileProcessingError: If a previous write failed.
+        """
+        self._raise_error()
+        self._queue.put(record)
+        depth = self._queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def flush(self) -> None:
+        """
+        Write the queued records now and block until they are written.
+
+        :raises FileProcessingError: If a write failed.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """
+        Write the remaining records and stop the thread.
+
+        :raises FileProcessingError: If a write failed.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._raise_error()
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth, flush counts and flush latency (in milliseconds)."""
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "flushes": self.flushes,
+            "records_written": self.records_written,
+            "last_flush_ms": self.last_flush_latency * 1000,
+            "max_flush_ms": self.max_flush_latency * 1000,
+        }
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise FileProcessingError(f"Background write failed: {error}")
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            record = self._queue.get()
+            received = 1
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if record is _STOP:
+                    stopping = True
+                    break
+                if record is _FLUSH:
+                    break
+                batch.append(record)
+                if len(batch) >= self.max_batch:
+                    break
+                timeout = deadline - time.monotonic()
+                try:
+                    record = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                received += 1
+            if batch:
+                start = time.perf_counter()
+                try:
+                    self.write_batch(batch)
+                except Exception as e:
+                    self.error = e
+                latency = time.perf_counter() - start
+                self.flushes += 1
+                self.records_written += len(batch)
+                self.last_flush_latency = latency
+                if latency > self.max_flush_latency:
+                    self.max_flush_latency = latency
+            for _ in range(received):
+                self._queue.task_done()
+
+
+class IncrementalAutoSaveObserver(HistoryObserver):
+    """
+    Appends each calculation to the history CSV instead of rewriting the whole file.
+
+    Undo and clear are written as tombstone rows (``__undo__`` / ``__clear__`` in the
+    operation column). Once enough rows are dead, the file is compacted in a
+    background thread so that it only holds the live history again. With
+    ``background`` enabled, rows are written by a BackgroundWriter that coalesces
+    bursts into a single write.
+    """
+
+    def __init__(self, output_file: Optional[str] = None, max_rows: Optional[int] = None,
+                 compact_threshold: Optional[int] = None, background: Optional[bool] = None):
+        """
+        Initialize the IncrementalAutoSaveObserver.
+
+        :param output_file: Optional path to save the history CSV.
+        :param max_rows: Number of live rows kept by compaction (defaults to the history size).
+        :param compact_threshold: Minimum number of dead rows before compacting.
+        :param background: Write on a background thread (defaults to CALCULATOR_AUTO_SAVE_BACKGROUND).
+        """
+        self.output_file = output_file or os.path.join(config.CALCULATOR_HISTORY_DIR, "history.csv")
+        self.max_rows = max_rows or config.CALCULATOR_MAX_HISTORY_SIZE
+        self.compact_threshold = (compact_threshold if compact_threshold is not None
+                                  else config.CALCULATOR_AUTO_SAVE_COMPACT_THRESHOLD)
+        self._lock = threading.Lock()
+        self._file = None
+        self._writer = None
+        self._started = False
+        self._live = 0
+        self._dead = 0
+        self._compactor: Optional[threading.Thread] = None
+        if background is None:
+            background = config.CALCULATOR_AUTO_SAVE_BACKGROUND
+        self.writer = BackgroundWriter(self._write_rows) if background else None
+
+    def update(self, calculation: Calculation) -> None:
+        """
+        Append the new calculation to the history file.
+
+        :param calculation: The most recent Calculation.
+        """
+        self._submit([calculation.__class__.__name__, calculation.a, calculation.b,
+                      getattr(calculation, "result", None)])
+
+    def update_values(self, operation: str, a: float, b: float, result: Optional[float]) -> None:
+        self._submit([operation, a, b, result])
+
+    def on_undo(self, calculation: Calculation) -> None:
+        """
+        Record a tombstone for the undone calculation.
+        """
+        self._submit([UNDO_MARKER, "", "", ""])
+
+    def on_redo(self, calculation: Calculation) -> None:
+        """
+        Append the restored calculation again.
+        """
+        self.update(calculation)
+
+    def on_clear(self) -> None:
+        """
+        Record a tombstone that discards every row written so far.
+        """
+        self._submit([CLEAR_MARKER, "", "", ""])
+
+    def on_load(self, history: Sequence[Calculation]) -> None:
+        """
+        Record a clear followed by the loaded calculations, so the file matches the history.
+        """
+        self.on_clear()
+        for calculation in history:
+            self.update(calculation)
+
+    def flush(self) -> None:
+        """
+        Wait until every submitted row has been written.
+        """
+        if self.writer is not None:
+            self.writer.flush()
+
+    def compact(self) -> None:
+        """
+        Rewrite the history file so that it only contains live rows.
+        Runs synchronously; ``update`` triggers it in a background thread.
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            offset = os.fstat(self._file.fileno()).st_size
+            dead = self._dead
+
+        with open(self.output_file, "rb") as f:
+            head = f.read(offset)
+        rows = list(csv.reader(io.StringIO(head.decode(config.CALCULATOR_DEFAULT_ENCODING))))
+        live = replay_rows(rows[1:], self.max_rows)
+
+        with self._lock:
+            # Rows appended while we were replaying are copied over verbatim.
+            self._file.flush()
+            with open(self.output_file, "rb") as f:
+                f.seek(offset)
+                tail = f.read()
+            tmp_file = self.output_file + ".tmp"
+            with open(tmp_file, "w", newline="", encoding=config.CALCULATOR_DEFAULT_ENCODING) as out:
+                writer = csv.writer(out)
+                writer.writerow(FIELDNAMES)
+                writer.writerows(live)
+            with open(tmp_file, "ab") as out:
+                out.write(tail)
+            self._file.close()
+            os.replace(tmp_file, self.output_file)
+            self._open("a")
+            self._dead -= dead
+
+    def close(self) -> None:
+        """
+        Write pending rows, wait for a running compaction and close the history file.
+        """
+        if self.writer is not None:
+            self.writer.close()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _open(self, mode: str) -> None:
+        output_dir = os.path.dirname(self.output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self._file = open(self.output_file, mode, newline="", encoding=config.CALCULATOR_DEFAULT_ENCODING)
+        self._writer = csv.writer(self._file)
+
+    def _submit(self, row: List) -> None:
+        if self.writer is not None:
+            self.writer.put(row)
+        else:
+            self._write_rows([row])
+
+    def _write_rows(self, rows: List[List]) -> None:
+        with self._lock:
+            if self._file is None:
+                self._open("a")
+                if not self._started:
+                    # Earlier sessions' rows stay; count them so compaction accounts for them.
+                    self._started = True
+                    if self._file.tell() == 0:
+                        self._writer.writerow(FIELDNAMES)
+                    else:
+                        self._count_existing_rows()
+            self._writer.writerows(rows)
+            self._file.flush()
+            for row in rows:
+                if row[0] == UNDO_MARKER:
+                    if self._live:
+                        self._live -= 1
+                        self._dead += 1
+                    self._dead += 1
+                elif row[0] == CLEAR_MARKER:
+                    self._dead += self._live + 1
+                    self._live = 0
+                elif self._live < self.max_rows:
+                    self._live += 1
+                else:
+                    self._dead += 1
+        self._maybe_compact()
+
+    def _count_existing_rows(self) -> None:
+        with open(self.output_file, newline="", encoding=config.CALCULATOR_DEFAULT_ENCODING) as f:
+            rows = list(csv.reader(f))[1:]
+        self._live = len(replay_rows(rows, self.max_rows))
+        self._dead = len(rows) - self._live
 
-        df = pd.DataFrame(data)
-        df.to_csv(self.output_file, index=False, encoding=config.CALCULATOR_DEFAULT_ENCODING)
+    def _maybe_compact(self) -> None:
+        # Requiring at least as many dead rows as live ones keeps compaction amortized O(1) per row.
+        if self._dead < max(self.compact_threshold, self._live):
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, name="history-compactor", daemon=True)
+        self._compactor.start()
@@ -0,0 +1,123 @@
+"""
+Non-interactive batch mode for the calculator.
+
+Reads commands from a file or stdin in large chunks and runs them through the same
+command processing as the interactive REPL, without prompts or readline.
+"""
+
+import contextlib
+import io
+import sys
+import time
+from typing import List, Optional, TextIO
+from app.calculator import (create_instrumentation, create_observers, create_result_cache, process_command,
+                            restore_session)
+from app.calculator_memento import MementoManager
+from app.history_store import CalculationHistory
+import app.config as config
+
+READ_CHUNK_SIZE = 1 << 20
+WRITE_BUFFER_SIZE = 1 << 16
+
+
+class BufferedOutput(io.TextIOBase):
+    """
+    Collects written text in memory and forwards it to a stream in large writes.
+    """
+
+    def __init__(self, stream: TextIO, buffer_size: int = WRITE_BUFFER_SIZE):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._parts: List[str] = []
+        self._size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if self._parts:
+            self.stream.write("".join(self._parts))
+            self._parts.clear()
+            self._size = 0
+        self.stream.flush()
+
+
+def run_batch(source: str = "-", output: Optional[TextIO] = None, report: Optional[TextIO] = None) -> int:
+    """
+    Run every command from a file (or stdin when ``source`` is ``-``).
+
+    Processing stops at the first ``exit`` command or at the end of the input.
+
+    :param source: Path of the command file, or ``-`` for stdin.
+    :param output: Stream receiving command output (defaults to stdout).
+    :param report: Stream receiving the throughput summary (defaults to stderr).
+    :return: The number of commands processed.
+    """
+    output = output or sys.stdout
+    report = report or sys.stderr
+    history = CalculationHistory(config.CALCULATOR_MAX_HISTORY_SIZE)
+    memento_manager = MementoManager(history)
+    restore_session(history, memento_manager)
+    observers = create_observers(history)
+    cache = create_result_cache()
+    stats = create_instrumentation()
+
+    if source == "-":
+        stream = sys.stdin
+        close_stream = False
+    else:
+        stream = open(source, "r", buffering=READ_CHUNK_SIZE, encoding=config.CALCULATOR_DEFAULT_ENCODING)
+        close_stream = True
+
+    count = 0
+    start = time.perf_counter()
+    buffered = BufferedOutput(output)
+    try:
+        with contextlib.redirect_stdout(buffered):
+            running = True
+            while running:
+                lines = stream.readlines(READ_CHUNK_SIZE)
+                if not lines:
+                    break
+                for line in lines:
+                    count += 1
+                    if not process_command(line, history, observers, memento_manager, cache, stats):
+                        running = False
+                        break
+    finally:
+        buffered.flush()
+        for observer in observers:
+            observer.close()
+        if stats is not None:
+            stats.dump()
+        if close_stream:
+            stream.close()
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"Processed {count} commands in {elapsed:.3f}s ({rate:.0f} commands/s)", file=report)
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Result cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['evictions']} evictions", file=report)
+    workers = [worker for observer in observers for worker in getattr(observer, "workers", ())]
+    for worker in workers:
+        stats = worker.stats()
+        print(f"Observer {worker.observer.__class__.__name__}: {stats['events']} events in "
+              f"{stats['batches']} batches, max queue depth {stats['max_queue_depth']}, "
+              f"{stats['dropped']} dropped, {stats['coalesced']} coalesced", file=report)
+    for observer in observers + [worker.observer for worker in workers]:
+        writer = getattr(observer, "writer", None)
+        if writer is not None:
+            stats = writer.stats()
+            print(f"Autosave writer: {stats['records_written']} records in {stats['flushes']} writes, "
+                  f"max queue depth {stats['max_queue_depth']}, "
+                  f"max flush latency {stats['max_flush_ms']:.2f} ms", file=report)
+    return count
@@ -1,6 +1,8 @@
 from abc import abstractmethod
 from app.operations import operations
-from typing import Optional
+from app import config
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional, Tuple
 
 
 class Calculation:
@@ -13,6 +15,15 @@ class Calculation:
     :type b: float
     """
 
+    __slots__ = ("a", "b", "result")
+
+    # Extra REPL command names (the first is shown in the help) and the help text.
+    command_aliases: Tuple[str, ...] = ()
+    description: str = ""
+    # Plain function of (a, b) computing what execute() computes, used to evaluate
+    # without creating an object. Only used if set on the registered class itself.
+    function: Optional[Callable[[float, float], float]] = None
+
     def __init__(self, a: float, b: float):
         self.a: float = a #pragma: no cover
         self.b: float = b #pragma: no cover
@@ -44,6 +55,7 @@ class CalculationFactory:
     """
 
     _calculations = {}
+    _listeners = []
 
     @classmethod
     def register_calculation(cls, calculation_class):
@@ -58,12 +70,67 @@ class CalculationFactory:
         """
 
         cls._calculations[calculation_class.__name__] = calculation_class #pragma: no cover
+        for listener in cls._listeners:
+            listener(calculation_class)
 
         def decorator(cls): #pragma: no cover
             cls.register_calculation(cls)
             if cls.__name__ not in cls._calculations:
                 cls._calculations[cls.__name__] = cls
     @classmethod
+    def add_listener(cls, listener) -> None:
+        """
+        Call ``listener(calculation_class)`` for every calculation registered from now on.
+
+        :param listener: The callback.
+        """
+        cls._listeners.append(listener)
+
+    @classmethod
+    def registered(cls) -> Mapping[str, type]:
+        """
+        The registered calculation classes by name.
+
+        :return: A read-only view that reflects later registrations.
+        """
+        return MappingProxyType(cls._calculations)
+
+    @classmethod
+    def resolve_name(cls, name: str) -> Optional[str]:
+        """
+        The registered name of the calculation a command name refers to.
+
+        :param name: A registered name or one of a class's ``command_aliases``.
+        :return: The registered name, or None if no calculation goes by that name.
+        """
+        if name in cls._calculations:
+            return name
+        for registered, calculation_class in cls._calculations.items():
+            if name in getattr(calculation_class, "command_aliases", ()):
+                return registered
+        return None
+
+    @classmethod
+    def scalar_function(cls, calculation_name: str) -> Callable[[float, float], float]:
+        """
+        A function of (a, b) that returns what executing the calculation returns.
+
+        This is the class's own ``function`` if it defines one; otherwise each call
+        creates and executes a calculation.
+
+        :param calculation_name: Name of the registered class.
+        :return: The function.
+        :raises ValueError: If calculation_name is not registered.
+        """
+        if calculation_name not in cls._calculations:
+            raise ValueError(f"Calculation {calculation_name} is not registered.")
+        calculation_class = cls._calculations[calculation_name]
+        function = calculation_class.__dict__.get("function")
+        if function is not None:
+            return function.__func__ if isinstance(function, staticmethod) else function
+        return lambda a, b: calculation_class(a, b).execute()
+
+    @classmethod
     def create_calculation(cls, calculation_name: str, a: float, b: float) -> Calculation:
         """
         Create a registered calculation instance.
@@ -76,4 +143,46 @@ class CalculationFactory:
         """
         if calculation_name not in cls._calculations:
             raise ValueError(f"Calculation {calculation_name} is not registered.")
-        return cls._calculations[calculation_name](a, b) #pragma: no cover
\ No newline at end of file
+        return cls._calculations[calculation_name](a, b) #pragma: no cover
+
+    @classmethod
+    def evaluate_many(cls, calculation_name: str, a, b, precision: Optional[int] = None) -> Tuple:
+        """
+        Evaluate a registered calculation over arrays of operands at once.
+
+        Uses the NumPy kernel of the same name in app/vector_operations.py, or falls back
+        to creating one calculation per row for operations without a kernel. Rows that
+        would raise in the scalar path are reported in the error mask instead.
+
+        :param calculation_name: Name of the registered class.
+        :param a: Array-like of first operands.
+        :param b: Array-like of second operands.
+        :param precision: Decimal places to round to (defaults to CALCULATOR_PRECISION).
+        :return: Tuple of (results, errors); results of failed rows are NaN.
+        :raises ValueError: If calculation_name is not registered.
+        """
+        import numpy as np
+        from app.vector_operations import vector_operations, round_results
+
+        if calculation_name not in cls._calculations:
+            raise ValueError(f"Calculation {calculation_name} is not registered.")
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+        kernel = getattr(vector_operations, calculation_name, None)
+
+        if kernel is not None:
+            with np.errstate(all="ignore"):
+                results, errors = kernel(a, b)
+            results = np.array(results, dtype=float)
+        else:
+            results = np.empty(a.shape, dtype=float)
+            errors = np.zeros(a.shape, dtype=bool)
+            for i, (x, y) in enumerate(zip(a.flat, b.flat)):
+                try:
+                    results.flat[i] = cls.create_calculation(calculation_name, float(x), float(y)).execute()
+                except Exception:
+                    errors.flat[i] = True
+
+        results[errors] = np.nan
+        if precision is None:
+            precision = config.CALCULATOR_PRECISION
+        return round_results(results, precision), errors
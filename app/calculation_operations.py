@@ -3,60 +3,104 @@ from app.operations import operations
 
 @CalculationFactory.register_calculation
 class add(Calculation):
+    __slots__ = ()
+    description = "Add two numbers"
+    function = staticmethod(operations.add)
+
     def execute(self) -> float:
         self.result = operations.add(self.a, self.b)
         return self.result
 
 @CalculationFactory.register_calculation
 class subtract(Calculation):
+    __slots__ = ()
+    description = "Subtract second number from first"
+    function = staticmethod(operations.subtract)
+
     def execute(self) -> float:
         self.result = operations.subtract(self.a, self.b)
         return self.result
 
 @CalculationFactory.register_calculation
 class multiply(Calculation):
+    __slots__ = ()
+    description = "Multiply two numbers"
+    function = staticmethod(operations.multiply)
+
     def execute(self) -> float:
         self.result = operations.multiply(self.a, self.b)
         return self.result
 
 @CalculationFactory.register_calculation
 class divide(Calculation):
+    __slots__ = ()
+    description = "Divide first number by second (cannot divide by zero)"
+    function = staticmethod(operations.divide)
+
     def execute(self) -> float:
         self.result = operations.divide(self.a, self.b)
         return self.result
     
 @CalculationFactory.register_calculation
 class power(Calculation):
+    __slots__ = ()
+    description = "Raise first number to the power of second"
+    function = staticmethod(operations.power)
+
     def execute(self) -> float:
         self.result = operations.power(self.a, self.b)
         return self.result
     
 @CalculationFactory.register_calculation
 class modulus(Calculation):
+    __slots__ = ()
+    description = "Calculate the modulus of a by b"
+    function = staticmethod(operations.modulus)
+
     def execute(self) -> float:
         self.result = operations.modulus(self.a, self.b)
         return self.result
     
 @CalculationFactory.register_calculation
 class percentage(Calculation):
+    __slots__ = ()
+    command_aliases = ("percent",)
+    description = "Calculate a as a percentage of b"
+    function = staticmethod(operations.percentage)
+
     def execute(self) -> float:
         self.result = operations.percentage(self.a, self.b)
         return self.result
     
 @CalculationFactory.register_calculation
 class absolute_difference(Calculation):
+    __slots__ = ()
+    command_aliases = ("abs_diff",)
+    description = "Calculate the absolute difference between a and b"
+    function = staticmethod(operations.absolute_difference)
+
     def execute(self) -> float:
         self.result = operations.absolute_difference(self.a, self.b)
         return self.result
     
 @CalculationFactory.register_calculation
 class square_root(Calculation):
+    __slots__ = ()
+    command_aliases = ("root",)
+    description = "Calculate the square root of a (b is ignored)"
+    function = staticmethod(lambda a, b: operations.square_root(a))
+
     def execute(self) -> float:
         self.result = operations.square_root(self.a)
         return self.result
     
 @CalculationFactory.register_calculation
 class integer_division(Calculation):
+    __slots__ = ()
+    command_aliases = ("int_divide",)
+    description = "Calculate the integer division of a by b"
+    function = staticmethod(lambda a, b: operations.integer_division(int(a), int(b)))
+
     def execute(self) -> float:
         self.result = operations.integer_division(int(self.a), int(self.b))
         return self.result
\ No newline at end of file
@@ -5,20 +5,50 @@ Implements a Read-Eval-Print Loop (REPL) that continuously prompts the user
 for commands, processes arithmetic operations, and manages calculation history.
 """
 
+import contextlib
 import sys
 import os
-import readline  # Enables command history and editing features
+import time
 from typing import List, Optional
-import pandas as pd
 from app.calculation import Calculation, CalculationFactory
 from app.logger import LoggingObserver
-from app.autosave import AutoSaveObserver
-from app.history import HistoryObserver
+from app.autosave import AutoSaveObserver, IncrementalAutoSaveObserver
+from app.history import HistoryObserver, ObserverBus
 from app.calculator_memento import MementoManager
+from app.commands import CommandRegistry
+from app.history_store import CalculationHistory
+from app.history_index import QUERY_USAGE, HistoryQuery, format_page, parse_query, search
+from app.history_summary import SUMMARY_USAGE, format_summary, summarize_columns, summarize_csv, summarize_rows
+from app.shared_history import SharedHistoryObserver, merge_shared_history
+from app.history_file import load_history_file, load_shared_rows, restore_loaded
+from app.history_binary import BinaryAutoSaveObserver, load_binary_history
+from app.result_cache import ResultCache
+from app.expression import evaluate_expression
+from app.instrumentation import UNKNOWN_COMMAND, Instrumentation
+from app.journal import Journal, JournalObserver, restore_history
+from app.session_state import SessionStateObserver, load_session_state
 import app.calculation_operations  # Ensures all @register_calculation decorators run
 import app.config as config
+from app.logger import configure_logging
 
-os.makedirs(config.CALCULATOR_HISTORY_DIR, exist_ok=True)
+# Imported by calculator() only; batch mode and scripts never need line editing.
+readline = None
+
+
+def initialize() -> None:
+    """
+    One-time startup: load the .env settings, configure logging and create the
+    history directory. Importing the calculator modules has no side effects.
+    """
+    config.load()
+    configure_logging()
+    os.makedirs(config.CALCULATOR_HISTORY_DIR, exist_ok=True)
+
+
+def _enable_readline() -> None:
+    global readline
+    if readline is None:
+        import readline  # Enables command history and editing features
 
 
 def display_help():
@@ -27,24 +57,7 @@ def display_help():
     """
     print("Welcome to the Calculator!")
     print("Available commands:")
-    print("  add <a> <b>       - Add two numbers")
-    print("  subtract <a> <b>  - Subtract second number from first")
-    print("  multiply <a> <b>  - Multiply two numbers")
-    print("  divide <a> <b>    - Divide first number by second (cannot divide by zero)")
-    print("  power <a> <b>     - Raise first number to the power of second")
-    print("  root <a> <b>      - Calculate the b-th root of a")
-    print("  modulus <a> <b>   - Calculate the modulus of a by b")
-    print("  int_divide <a> <b> - Calculate the integer division of a by b")
-    print("  percent <a> <b>   - Calculate b percent of a")
-    print("  abs_diff <a> <b>  - Calculate the absolute difference between a and b")
-    print("  history           - Show command history")
-    print("  undo              - Undo the last operation")
-    print("  redo              - Redo the last undone operation")
-    print("  clear             - Clear the command history")
-    print("  save              - Save the command history to a file")
-    print("  load              - Load command history from a file")
-    print("  help              - Display this help message")
-    print("  exit              - Exit the calculator")
+    print("\n".join(COMMANDS.help_lines()))
 
 def parse_command(command: str) -> List[str]:
     """
@@ -55,137 +68,381 @@ def parse_command(command: str) -> List[str]:
     :return: A list of command arguments.
     :rtype: List[str]
     """
-    return command.strip().split()
+    return command.split()
 
-def display_history(history: List[Calculation]) -> None:
+def display_history() -> None:
     """
     Display the command history.
     """
+    _enable_readline()
     print("Command History:")
     for i, cmd in enumerate(
         readline.get_history_item(i) for i in range(1, readline.get_current_history_length() + 1)
     ):
         print(f"{i}: {cmd}")
 
-def calculator() -> None:
+def query_history(history: CalculationHistory, args: List[str]) -> None:
     """
-    Main calculator loop.
-    Accepts user commands and executes calculations or utility actions.
+    Display the calculations matching a ``history`` query, one page at a time.
+
+    :param history: The session's calculation history.
+    :param args: The query arguments (see ``app.history_index``).
     """
-    history: List[Calculation] = []
-    observers: List[HistoryObserver] = []
-    memento_manager = MementoManager()
+    try:
+        query = parse_query(args)
+    except ValueError as ve:
+        print(f"[ValueError] {ve}")
+        print(QUERY_USAGE)
+        return
+    positions = search(history, query)
+    for line in format_page(history, positions, query.page, config.CALCULATOR_HISTORY_PAGE_SIZE):
+        print(line)
+
+def restore_session(history: CalculationHistory, memento_manager: MementoManager) -> None:
+    """
+    Rebuild the history and undo/redo stacks from the journal if journaling is
+    enabled, otherwise from the session file if undo/redo state is persisted.
+
+    :param history: The session's (empty) calculation history.
+    :param memento_manager: Undo/redo state of the session.
+    """
+    if config.CALCULATOR_JOURNAL:
+        restore_history(config.CALCULATOR_JOURNAL_FILE, history, memento_manager)
+    elif config.CALCULATOR_PERSIST_UNDO:
+        load_session_state(config.CALCULATOR_SESSION_FILE, history, memento_manager)
 
+def create_observers(history: CalculationHistory) -> List[HistoryObserver]:
+    """
+    Build the observers configured for a calculator session.
+
+    :param history: The session's calculation history.
+    :return: The observers notified about history changes; with CALCULATOR_OBSERVER_BUS
+        a single ObserverBus that delivers to them on worker threads.
+    """
+    observers: List[HistoryObserver] = []
+    if config.CALCULATOR_LOG_CALCULATIONS:
+        observers.append(LoggingObserver())
+    if config.CALCULATOR_JOURNAL:
+        observers.append(JournalObserver(Journal(config.CALCULATOR_JOURNAL_FILE,
+                                                 config.CALCULATOR_JOURNAL_COMMIT_INTERVAL,
+                                                 config.CALCULATOR_JOURNAL_SYNC == "always")))
+    if config.CALCULATOR_PERSIST_UNDO:
+        observers.append(SessionStateObserver(history))
     if config.CALCULATOR_AUTO_SAVE:
-        observers.append(AutoSaveObserver(history))
+        if config.CALCULATOR_AUTO_SAVE_MODE == "incremental":
+            observers.append(IncrementalAutoSaveObserver())
+        elif config.CALCULATOR_AUTO_SAVE_MODE == "shared":
+            observers.append(SharedHistoryObserver())
+        elif config.CALCULATOR_AUTO_SAVE_MODE == "binary":
+            observers.append(BinaryAutoSaveObserver(history))
+        else:
+            observers.append(AutoSaveObserver(history))
+    if config.CALCULATOR_OBSERVER_BUS and observers:
+        return [ObserverBus(history, observers)]
+    return observers
+
+def create_result_cache() -> Optional[ResultCache]:
+    """
+    Build the session's result cache.
+
+    :return: A cache of CALCULATOR_RESULT_CACHE_SIZE entries, or None if it is disabled.
+    """
+    if config.CALCULATOR_RESULT_CACHE_SIZE > 0:
+        return ResultCache(config.CALCULATOR_RESULT_CACHE_SIZE)
+    return None
+
+def create_instrumentation() -> Optional[Instrumentation]:
+    """
+    Build the session's latency instrumentation.
+
+    :return: An Instrumentation if CALCULATOR_STATS is enabled, otherwise None.
+    """
+    if config.CALCULATOR_STATS:
+        return Instrumentation(config.CALCULATOR_STATS_FILE, config.CALCULATOR_STATS_DUMP_INTERVAL)
+    return None
+
+def process_command(userinput: str, history: CalculationHistory, observers: List[HistoryObserver],
+                    memento_manager: MementoManager, cache: Optional[ResultCache] = None,
+                    stats: Optional[Instrumentation] = None) -> bool:
+    """
+    Execute a single command line against the session state.
+
+    Shared by the interactive loop and batch mode so both produce identical results.
 
-    while True:
+    :param userinput: The raw command line.
+    :param history: The session's calculation history.
+    :param observers: Observers notified about history changes.
+    :param memento_manager: Undo/redo state of the session.
+    :param cache: Result cache of the session, or None to always execute calculations.
+    :param stats: Instrumentation receiving the stage timings, or None to not measure.
+    :return: False when the command ends the session, True otherwise.
+    """
+    if stats is None:
+        cmd = parse_command(userinput)
+        return _run_command(cmd, userinput, history, observers, memento_manager, cache, None) if cmd else True
+    start = time.perf_counter_ns()
+    cmd = parse_command(userinput)
+    if not cmd:
+        return True
+    name = cmd[0].lower()
+    stats.begin(name if name in COMMANDS else UNKNOWN_COMMAND, start)
+    try:
+        return _run_command(cmd, userinput, history, observers, memento_manager, cache, stats)
+    finally:
+        stats.end()
+
+def _run_command(cmd: List[str], userinput: str, history: CalculationHistory, observers: List[HistoryObserver],
+                 memento_manager: MementoManager, cache: Optional[ResultCache],
+                 stats: Optional[Instrumentation]) -> bool:
+    if not cmd:
+        return True #pragma: no cover
+
+    cmd_name = cmd[0].lower()
+    command = COMMANDS.get(cmd_name)
+    if command is None:
+        print(f"Unknown command: {cmd_name}")
+        return True
+    if command.arity is not None and len(cmd) != command.arity + 1:
+        print(f"Usage: {cmd_name} {command.usage}".rstrip())
+        return True
+    locks = [observer.lock for observer in observers if observer.lock is not None]
+    if not locks:
+        return command.handler(cmd, userinput, history, observers, memento_manager, cache, stats) is not False
+    # Observers that read the history from other threads (e.g. ObserverBus) do so while holding their lock.
+    with contextlib.ExitStack() as stack:
+        for lock in locks:
+            stack.enter_context(lock)
+        return command.handler(cmd, userinput, history, observers, memento_manager, cache, stats) is not False
+
+def _help_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+    display_help()
+
+def _exit_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> bool:
+    print("Exiting the calculator. Goodbye!")
+    return False
+
+def _history_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+    if len(cmd) == 2 and cmd[1].lower() == "inputs":
+        display_history()
+    else:
+        query_history(history, cmd[1:])
+
+def _summary_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+    if len(cmd) == 1:
+        rows = history.summary().rows()
+    elif len(cmd) == 2 and cmd[1].lower() == "file":
+        path = os.path.join(config.CALCULATOR_HISTORY_DIR, "history.csv")
         try:
-            userinput: str = input("Enter command (or 'help' for options): ")
-            if not userinput.strip():
-                continue
+            # Background writers may still hold rows the file should contain.
+            for observer in observers:
+                observer.flush()
+            if config.CALCULATOR_AUTO_SAVE_MODE == "shared":
+                path = config.CALCULATOR_SHARED_HISTORY_FILE
+                rows = summarize_rows([row[2:] for row in merge_shared_history(path)])
+            elif config.CALCULATOR_AUTO_SAVE_MODE == "binary":
+                path = os.path.join(config.CALCULATOR_HISTORY_DIR, "history.bin")
+                loaded = load_binary_history(path)
+                rows = summarize_columns(loaded.names, loaded.codes, loaded.results)
+            else:
+                rows = summarize_csv(path, config.CALCULATOR_DEFAULT_ENCODING)
+        except Exception as e:
+            print(f"Failed to summarize {path}: {e}")
+            return
+    else:
+        print(SUMMARY_USAGE)
+        return
+    for line in format_summary(rows, config.CALCULATOR_PRECISION):
+        print(line)
 
-            cmd = parse_command(userinput)
-            if not cmd:
-                continue #pragma: no cover
+def _undo_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+    if not memento_manager.can_undo():
+        print("Nothing to undo.")
+        return
+    undone_calc = memento_manager.undo()
+    for observer in observers:
+        observer.on_undo(undone_calc)
+    print("Undid last operation.")
 
-            cmd_name = cmd[0].lower()
+def _redo_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+    if not memento_manager.can_redo():
+        print("Nothing to redo.")
+        return
+    redone_calc = memento_manager.redo()
+    for observer in observers:
+        observer.on_redo(redone_calc)
+    print("Redid operation.")
 
-            if cmd_name == "help":
-                display_help()
+def _clear_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+    history.clear()
+    memento_manager.clear()
+    for observer in observers:
+        observer.on_clear()
+    print("History cleared.")
 
-            elif cmd_name == "exit":
-                print("Exiting the calculator. Goodbye!")
-                sys.exit(0)
+def _save_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+    try:
+        for observer in observers:
+            observer.flush()
+        print("History saved.")
+    except Exception as e:
+        print(f"Save failed: {e}")
+
+def _load_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+    try:
+        # Background writers may still hold rows the file should contain.
+        for observer in observers:
+            observer.flush()
+        if config.CALCULATOR_AUTO_SAVE_MODE == "shared":
+            # Every session's rows, merged; the shared file itself holds raw appends.
+            path = config.CALCULATOR_SHARED_HISTORY_FILE
+            loaded = load_shared_rows(merge_shared_history(path, history.capacity), history.capacity)
+        elif config.CALCULATOR_AUTO_SAVE_MODE == "binary":
+            path = os.path.join(config.CALCULATOR_HISTORY_DIR, "history.bin")
+            loaded = load_binary_history(path, history.capacity)
+        else:
+            path = os.path.join(config.CALCULATOR_HISTORY_DIR, "history.csv")
+            loaded = load_history_file(path, history.capacity)
+    except Exception as e:
+        print(f"Failed to load history: {e}")
+        return
+    history.clear()
+    restore_loaded(loaded, history, memento_manager)
+    for observer in observers:
+        observer.on_load(history)
+    skipped = f" ({loaded.skipped} rows with unknown operations skipped)" if loaded.skipped else ""
+    print(f"Loaded {len(history)} calculations from {path}{skipped}.")
+    for line in format_page(history, search(history, HistoryQuery()), 1, config.CALCULATOR_HISTORY_PAGE_SIZE):
+        print(line)
+
+def _eval_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+    if len(cmd) < 2:
+        print("Usage: eval <expression>")
+        return
+    try:
+        result = evaluate_expression(userinput.strip()[len(cmd[0]):])
+        print(f"Result: {round(result, config.CALCULATOR_PRECISION)}")
+    except ValueError as ve:
+        print(f"[ValueError] {ve}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+def _stats_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+    if stats is None:
+        print("Statistics are disabled (set CALCULATOR_STATS=true).")
+    elif len(cmd) > 1 and cmd[1].lower() == "reset":
+        stats.reset()
+        print("Statistics reset.")
+    else:
+        print(stats.format_table())
 
-            elif cmd_name == "history":
-                display_history(history)
-
-            elif cmd_name == "undo":
-                if not memento_manager.can_undo():
-                    print("Nothing to undo.")
-                    continue
-                undone_calc = memento_manager.undo()
-                if undone_calc in history:
-                    history.remove(undone_calc)
-                    print("Undid last operation.")
-
-            elif cmd_name == "redo":
-                if not memento_manager.can_redo():
-                    print("Nothing to redo.")
-                    continue
-                redone_calc = memento_manager.redo()
-                history.append(redone_calc)
-                print("Redid operation.")
-
-            elif cmd_name == "clear":
-                history.clear()
-                print("History cleared.")
-
-            elif cmd_name == "save":
-                try:
-                    for observer in observers:
-                        if history:
-                            observer.update(history[-1])
-                    print("History saved.")
-                except Exception as e:
-                    print(f"Save failed: {e}")
-
-            elif cmd_name == "load":
-                try:
-                    path = os.path.join(config.CALCULATOR_HISTORY_DIR, "history.csv")
-                    df = pd.read_csv(path, encoding=config.CALCULATOR_DEFAULT_ENCODING)
-                    print(df.to_string(index=False))
-                except Exception as e:
-                    print(f"Failed to load history: {e}")
-
-            elif cmd_name in [
-                "add", "subtract", "multiply", "divide", "power", "root",
-                "modulus", "int_divide", "percent", "abs_diff"]:
-
-                if len(cmd) != 3:
-                    print(f"Usage: {cmd_name} <a> <b>")
-                    continue
-
-                try:
-                    a = float(cmd[1])
-                    b = float(cmd[2])
-                    if abs(a) > config.CALCULATOR_MAX_INPUT_VALUE or abs(b) > config.CALCULATOR_MAX_INPUT_VALUE:
-                        print("Input values exceed the maximum allowed.")
-                        continue #pragma: no cover
-                    if cmd_name == "root": # pragma: no cover
-                        cmd_name = "square_root" # pragma: no cover
-                    elif cmd_name == "int_divide": # pragma: no cover
-                        cmd_name = "integer_division" # pragma: no cover
-                    calc = CalculationFactory.create_calculation(cmd_name, a, b)
-                    result = round(calc.execute(), config.CALCULATOR_PRECISION)
-                    calc.result = result
-                    print(f"Result: {result}")
-                    history.append(calc)
-                    memento_manager.save_state(calc)
-
-                    if len(history) > config.CALCULATOR_MAX_HISTORY_SIZE:
-                        history.pop(0)
-
-                    for observer in observers:
-                        observer.update(calc)
-
-                except ValueError as ve:
-                    print(f"[ValueError] {ve}")
-                    continue
-                except Exception as e:
-                    print(f"An error occurred: {e}")
-                    continue
+def _cache_command(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+    if cache is None:
+        print("Result cache is disabled.")
+    else:
+        counters = cache.stats()
+        print(f"Result cache: {counters['size']}/{counters['maxsize']} entries, {counters['hits']} hits, "
+              f"{counters['misses']} misses, {counters['evictions']} evictions")
 
+def _calculation_command(calculation_name: str):
+    """
+    Build the command handler of a registered calculation.
+
+    :param calculation_name: Name of the registered class.
+    """
+    # Bound once, so evaluating creates no Calculation object.
+    function = CalculationFactory.scalar_function(calculation_name)
+
+    def run(cmd, userinput, history, observers, memento_manager, cache, stats) -> None:
+        try:
+            a = float(cmd[1])
+            b = float(cmd[2])
+            if abs(a) > config.CALCULATOR_MAX_INPUT_VALUE or abs(b) > config.CALCULATOR_MAX_INPUT_VALUE:
+                print("Input values exceed the maximum allowed.")
+                return #pragma: no cover
+            if stats is not None:
+                stats.lap("dispatch")
+            if cache is not None:
+                value = cache.evaluate(calculation_name, a, b)
             else:
-                print(f"Unknown command: {cmd_name}")
+                value = function(a, b)
+            if stats is not None:
+                stats.lap("execute")
+            result = round(value, config.CALCULATOR_PRECISION)
+            if stats is not None:
+                stats.lap("round")
+            print(f"Result: {result}")
+            # The history evicts its oldest entry itself once it holds CALCULATOR_MAX_HISTORY_SIZE.
+            position = history.append_values(calculation_name, a, b, result)
+            memento_manager.save_state(position)
+            if stats is not None:
+                stats.lap("history")
+
+            # Observers get the values; only those that need an object create one.
+            for observer in observers:
+                observer.update_values(calculation_name, a, b, result)
+                if stats is not None:
+                    stats.lap(f"observer.{observer.__class__.__name__}")
+
+        except ValueError as ve:
+            print(f"[ValueError] {ve}")
+        except Exception as e:
+            print(f"An error occurred: {e}")
+    return run
+
+# Calculations first, in the order they are registered; later ones are added as they are registered.
+COMMANDS = CommandRegistry()
+COMMANDS.register_calculations(_calculation_command)
+COMMANDS.register("eval", _eval_command, usage="<expression>",
+                  description="Evaluate an expression, e.g. eval (3 + 4) * 2 ^ 5")
+COMMANDS.register("history", _history_command, help=(
+    ("history [query]", "List past calculations, newest first; query parts:\n"
+                        "op=<name> a=<lo>:<hi> b=<lo>:<hi> result=<lo>:<hi> last=<n> page=<n>"),
+    ("history inputs", "Show command history")))
+COMMANDS.register("summary", _summary_command, usage="[file]",
+                  description="Count, sum, mean, min and max per operation (of the saved history file)")
+COMMANDS.register("undo", _undo_command, 0, description="Undo the last operation")
+COMMANDS.register("redo", _redo_command, 0, description="Redo the last undone operation")
+COMMANDS.register("clear", _clear_command, 0, description="Clear the command history")
+COMMANDS.register("save", _save_command, 0, description="Save the command history to a file")
+COMMANDS.register("load", _load_command, 0, description="Restore the history from the saved history file")
+COMMANDS.register("cache", _cache_command, 0, description="Show result cache hits, misses and evictions")
+COMMANDS.register("stats", _stats_command, usage="[reset]",
+                  description="Show (or reset) per-command latency statistics")
+COMMANDS.register("help", _help_command, description="Display this help message")
+COMMANDS.register("exit", _exit_command, description="Exit the calculator")
+
+def calculator() -> None:
+    """
+    Main calculator loop.
+    Accepts user commands and executes calculations or utility actions.
+    """
+    history = CalculationHistory(config.CALCULATOR_MAX_HISTORY_SIZE)
+    memento_manager = MementoManager(history)
+    restore_session(history, memento_manager)
+    observers = create_observers(history)
+    cache = create_result_cache()
+    stats = create_instrumentation()
+    _enable_readline()
 
-        except KeyboardInterrupt:
-            print("\nExiting the calculator. Goodbye!")
-            sys.exit(0)
-        except EOFError:
-            print("\nExiting the calculator. Goodbye!")
-            sys.exit(0)
+    try:
+        while True:
+            try:
+                userinput: str = input("Enter command (or 'help' for options): ")
+                if not process_command(userinput, history, observers, memento_manager, cache, stats):
+                    sys.exit(0)
+
+            except KeyboardInterrupt:
+                print("\nExiting the calculator. Goodbye!")
+                sys.exit(0)
+            except EOFError:
+                print("\nExiting the calculator. Goodbye!")
+                sys.exit(0)
+    finally:
+        for observer in observers:
+            observer.close()
+        if stats is not None:
+            stats.dump()
 
 if __name__ == "__main__":
+    initialize() #pragma: no cover
     calculator() #pragma: no cover
@@ -1,44 +1,98 @@
+from collections import deque
+from typing import Deque
 from app.calculation import Calculation
-
-class CalculatorMemento:
-    """
-    Stores the state (a calculation instance).
-    """
-    def __init__(self, state: Calculation):
-        self._state = state
-
-    def get_state(self) -> Calculation:
-        return self._state
-
+from app.history_store import CalculationHistory
 
 class MementoManager:
     """
     Manages undo and redo stacks using mementos.
+
+    A memento is the position of a history entry, stored as a plain int, so saving
+    state allocates nothing and undo and redo are O(1) and never copy calculations.
+    Both stacks are bounded by the history capacity: an entry evicted from the
+    history also falls off the bottom of the undo stack.
+
+    Stacks restored from disk start out as position ranges below the deques
+    (``_undo_base`` / ``_redo_base``, top at the end); positions are only moved into
+    the deques for the entries that are actually undone or redone.
     """
-    def __init__(self):
-        self._undo_stack = []
-        self._redo_stack = []
+    def __init__(self, history: CalculationHistory):
+        self._history = history
+        self._undo_stack: Deque[int] = deque(maxlen=history.capacity)
+        self._redo_stack: Deque[int] = deque(maxlen=history.capacity)
+        self._undo_base = range(0)
+        self._redo_base = range(0)
+
+    def save_state(self, position: int):
+        if self._undo_base and len(self._undo_base) + len(self._undo_stack) >= self._history.capacity:
+            self._undo_base = self._undo_base[1:]
+        self._undo_stack.append(position)
+        if self._redo_stack or self._redo_base:  # Clear redo on new action
+            self._redo_stack.clear()
+            self._redo_base = range(0)
+
+    def restore(self, undo_positions: range, redo_positions: range) -> None:
+        """
+        Replace both stacks with saved ones, in O(1).
 
-    def save_state(self, state: Calculation):
-        self._undo_stack.append(CalculatorMemento(state))
-        self._redo_stack.clear()  # Clear redo on new action
+        :param undo_positions: Positions on the undo stack, bottom to top.
+        :param redo_positions: Positions on the redo stack, bottom to top.
+        """
+        self.clear()
+        self._undo_base = undo_positions
+        self._redo_base = redo_positions
 
     def undo(self) -> Calculation:
-        if not self._undo_stack:
+        """
+        Remove the most recent calculation from the history.
+
+        :return: The calculation that was undone.
+        :raises IndexError: If there is nothing to undo.
+        """
+        if self._undo_stack:
+            position = self._undo_stack.pop()
+        elif self._undo_base:
+            position = self._undo_base[-1]
+            self._undo_base = self._undo_base[:-1]
+        else:
             raise IndexError("Nothing to undo.")
-        memento = self._undo_stack.pop()
-        self._redo_stack.append(memento)
-        return memento.get_state()
+        calculation = self._history.pop()
+        if self._redo_base and len(self._redo_base) + len(self._redo_stack) >= self._history.capacity:
+            self._redo_base = self._redo_base[1:]
+        self._redo_stack.append(position)
+        return calculation
 
     def redo(self) -> Calculation:
-        if not self._redo_stack:
+        """
+        Put the most recently undone calculation back into the history.
+
+        :return: The calculation that was restored.
+        :raises IndexError: If there is nothing to redo.
+        """
+        if self._redo_stack:
+            position = self._redo_stack.pop()
+        elif self._redo_base:
+            position = self._redo_base[-1]
+            self._redo_base = self._redo_base[:-1]
+        else:
             raise IndexError("Nothing to redo.")
-        memento = self._redo_stack.pop()
-        self._undo_stack.append(memento)
-        return memento.get_state()
+        calculation = self._history.restore(position)
+        if self._undo_base and len(self._undo_base) + len(self._undo_stack) >= self._history.capacity:
+            self._undo_base = self._undo_base[1:]
+        self._undo_stack.append(position)
+        return calculation
+
+    def clear(self) -> None:
+        """
+        Forget all undo and redo state, e.g. after the history was cleared.
+        """
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        self._undo_base = range(0)
+        self._redo_base = range(0)
 
     def can_undo(self):
-        return bool(self._undo_stack)
+        return bool(self._undo_stack or self._undo_base)
 
     def can_redo(self):
-        return bool(self._redo_stack)
+        return bool(self._redo_stack or self._redo_base)
@@ -0,0 +1,111 @@
+"""
+Registry of the REPL's commands.
+
+Every command — the built-ins and one per registered calculation — is registered
+once under its name and aliases, with the number of arguments it takes and its
+help text. ``process_command`` finds a command with a single dictionary lookup,
+checks its arity and calls its handler; ``display_help`` lists the registered
+commands in registration order.
+
+Calculations are added automatically: the registry listens to
+``CalculationFactory.register_calculation``, so an operation registered later
+(e.g. by a plugin module) can be used and shows up in the help right away. A
+calculation class may set ``command_aliases`` (extra command names, the first of
+which is shown in the help) and ``description``.
+"""
+
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from app.calculation import CalculationFactory
+
+# Width of the usage column in the help text.
+_USAGE_WIDTH = 17
+
+
+class Command(NamedTuple):
+    """A registered command."""
+    name: str
+    handler: Callable[..., Optional[bool]]
+    arity: Optional[int]  # exact number of arguments, None to let the handler check
+    usage: str  # the arguments, e.g. "<a> <b>"
+    help: Tuple[Tuple[str, str], ...]  # (usage, description) lines for the help text
+
+
+class CommandRegistry:
+    """
+    Commands by name and alias.
+    """
+
+    def __init__(self):
+        self._commands: Dict[str, Command] = {}
+        self._order: List[Command] = []
+        self._help: Optional[List[str]] = None
+
+    def register(self, name: str, handler: Callable[..., Optional[bool]], arity: Optional[int] = None,
+                 usage: str = "", description: str = "", aliases: Sequence[str] = (),
+                 help: Sequence[Tuple[str, str]] = ()) -> Command:
+        """
+        Register a command. A command already registered under one of its names keeps
+        its other names and is dropped from the help once it has none left.
+
+        :param name: The command name.
+        :param handler: Called as ``handler(cmd, userinput, history, observers, memento_manager,
+            cache, stats)``; returning False ends the session.
+        :param arity: Number of arguments the command takes, or None to accept any.
+        :param usage: The arguments as shown in the help and usage errors.
+        :param description: One-line help text.
+        :param aliases: Other names of the command.
+        :param help: Help lines to show instead of ``usage`` and ``description``.
+        :return: The registered command.
+        """
+        shown = f"{name} {usage}".rstrip()
+        command = Command(name, handler, arity, usage, tuple(help) or ((shown, description),))
+        replaced = {self._commands[key] for key in (name, *aliases) if key in self._commands}
+        for key in (name, *aliases):
+            self._commands[key] = command
+        remaining = set(self._commands.values())
+        self._order = [c for c in self._order if c not in replaced or c in remaining]
+        self._order.append(command)
+        self._help = None
+        return command
+
+    def get(self, name: str) -> Optional[Command]:
+        """
+        Look up a command by name or alias.
+
+        :param name: The lowercase command name.
+        """
+        return self._commands.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._commands
+
+    def help_lines(self) -> List[str]:
+        """The help text of every command, in registration order."""
+        if self._help is None:
+            lines = []
+            for command in self._order:
+                for usage, description in command.help:
+                    first, *rest = description.split("\n")
+                    lines.append(f"  {usage:<{_USAGE_WIDTH}} - {first}")
+                    lines.extend(" " * (_USAGE_WIDTH + 5) + line for line in rest)
+            self._help = lines
+        return self._help
+
+    def register_calculations(self, handler_for: Callable[[str], Callable[..., Optional[bool]]]) -> None:
+        """
+        Register a command for every calculation in the factory, and for every one
+        registered from now on.
+
+        :param handler_for: Builds the handler of a calculation from its registered name.
+        """
+        def register(calculation_class: type) -> None:
+            name = calculation_class.__name__
+            aliases = tuple(getattr(calculation_class, "command_aliases", ()))
+            shown = aliases[0] if aliases else name
+            description = getattr(calculation_class, "description", "") or f"Calculate {name} of a and b"
+            self.register(name, handler_for(name), 2, "<a> <b>", aliases=aliases,
+                          help=((f"{shown} <a> <b>", description),))
+
+        for calculation_class in list(CalculationFactory.registered().values()):
+            register(calculation_class)
+        CalculationFactory.add_listener(register)
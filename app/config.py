@@ -1,15 +1,90 @@
 import os
-from dotenv import load_dotenv
 
-# Load from .env file
-load_dotenv()
 
-CALCULATOR_LOG_DIR = os.getenv("CALCULATOR_LOG_DIR", "logs")
-CALCULATOR_HISTORY_DIR = os.getenv("CALCULATOR_HISTORY_DIR", "history")
+def load() -> None:
+    """
+    Load the .env file into the environment and re-read every setting.
 
-CALCULATOR_MAX_HISTORY_SIZE = int(os.getenv("CALCULATOR_MAX_HISTORY_SIZE", "100"))
-CALCULATOR_AUTO_SAVE = os.getenv("CALCULATOR_AUTO_SAVE", "true").lower() == "true"
+    Called once by the entry points at startup; importing this module only reads
+    the current environment, so it has no side effects and does not import dotenv.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    _read_environment()
 
-CALCULATOR_PRECISION = int(os.getenv("CALCULATOR_PRECISION", "2"))
-CALCULATOR_MAX_INPUT_VALUE = float(os.getenv("CALCULATOR_MAX_INPUT_VALUE", "1000000"))
-CALCULATOR_DEFAULT_ENCODING = os.getenv("CALCULATOR_DEFAULT_ENCODING", "utf-8")
+
+def _read_environment() -> None:
+    global CALCULATOR_LOG_DIR, CALCULATOR_HISTORY_DIR, CALCULATOR_MAX_HISTORY_SIZE
+    global CALCULATOR_AUTO_SAVE, CALCULATOR_AUTO_SAVE_MODE, CALCULATOR_AUTO_SAVE_COMPACT_THRESHOLD
+    global CALCULATOR_AUTO_SAVE_BACKGROUND, CALCULATOR_AUTO_SAVE_FLUSH_INTERVAL, CALCULATOR_AUTO_SAVE_MAX_BATCH
+    global CALCULATOR_AUTO_SAVE_QUEUE_SIZE, CALCULATOR_PRECISION, CALCULATOR_MAX_INPUT_VALUE
+    global CALCULATOR_DEFAULT_ENCODING, CALCULATOR_RESULT_CACHE_SIZE
+    global CALCULATOR_SERVER_HOST, CALCULATOR_SERVER_PORT
+    global CALCULATOR_STATS, CALCULATOR_STATS_FILE, CALCULATOR_STATS_DUMP_INTERVAL
+    global CALCULATOR_LOG_CALCULATIONS, CALCULATOR_LOG_MAX_BYTES, CALCULATOR_LOG_BACKUP_COUNT
+    global CALCULATOR_JOURNAL, CALCULATOR_JOURNAL_FILE, CALCULATOR_JOURNAL_SYNC, CALCULATOR_JOURNAL_COMMIT_INTERVAL
+    global CALCULATOR_HISTORY_PAGE_SIZE, CALCULATOR_SHARED_HISTORY_FILE
+    global CALCULATOR_PERSIST_UNDO, CALCULATOR_SESSION_FILE, CALCULATOR_BULK_WORKERS
+    global CALCULATOR_OBSERVER_BUS, CALCULATOR_OBSERVER_QUEUE_SIZE, CALCULATOR_OBSERVER_BACKPRESSURE
+    global CALCULATOR_OBSERVER_MAX_BATCH
+
+    CALCULATOR_LOG_DIR = os.getenv("CALCULATOR_LOG_DIR", "logs")
+    CALCULATOR_HISTORY_DIR = os.getenv("CALCULATOR_HISTORY_DIR", "history")
+    CALCULATOR_LOG_CALCULATIONS = os.getenv("CALCULATOR_LOG_CALCULATIONS", "true").lower() == "true"
+    # calculator.log is rotated at this size into gzip archives; 0 disables rotation.
+    CALCULATOR_LOG_MAX_BYTES = int(os.getenv("CALCULATOR_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    CALCULATOR_LOG_BACKUP_COUNT = int(os.getenv("CALCULATOR_LOG_BACKUP_COUNT", "5"))
+
+    CALCULATOR_MAX_HISTORY_SIZE = int(os.getenv("CALCULATOR_MAX_HISTORY_SIZE", "100"))
+    # Calculations listed per page by the history command.
+    CALCULATOR_HISTORY_PAGE_SIZE = int(os.getenv("CALCULATOR_HISTORY_PAGE_SIZE", "20"))
+    CALCULATOR_AUTO_SAVE = os.getenv("CALCULATOR_AUTO_SAVE", "true").lower() == "true"
+    CALCULATOR_AUTO_SAVE_MODE = os.getenv("CALCULATOR_AUTO_SAVE_MODE", "full").lower()
+    CALCULATOR_AUTO_SAVE_COMPACT_THRESHOLD = int(os.getenv("CALCULATOR_AUTO_SAVE_COMPACT_THRESHOLD", "1000"))
+    CALCULATOR_AUTO_SAVE_BACKGROUND = os.getenv("CALCULATOR_AUTO_SAVE_BACKGROUND", "true").lower() == "true"
+    CALCULATOR_AUTO_SAVE_FLUSH_INTERVAL = float(os.getenv("CALCULATOR_AUTO_SAVE_FLUSH_INTERVAL", "0.05"))
+    CALCULATOR_AUTO_SAVE_MAX_BATCH = int(os.getenv("CALCULATOR_AUTO_SAVE_MAX_BATCH", "1000"))
+    CALCULATOR_AUTO_SAVE_QUEUE_SIZE = int(os.getenv("CALCULATOR_AUTO_SAVE_QUEUE_SIZE", "10000"))
+    # Appended to by every process when CALCULATOR_AUTO_SAVE_MODE is "shared".
+    CALCULATOR_SHARED_HISTORY_FILE = os.getenv("CALCULATOR_SHARED_HISTORY_FILE",
+                                               os.path.join(CALCULATOR_HISTORY_DIR, "shared_history.csv"))
+
+    # Write-ahead journal of history events, replayed at startup.
+    CALCULATOR_JOURNAL = os.getenv("CALCULATOR_JOURNAL", "false").lower() == "true"
+    CALCULATOR_JOURNAL_FILE = os.getenv("CALCULATOR_JOURNAL_FILE",
+                                        os.path.join(CALCULATOR_HISTORY_DIR, "journal.bin"))
+    # "batch" commits every CALCULATOR_JOURNAL_COMMIT_INTERVAL seconds, "always" waits for each commit.
+    CALCULATOR_JOURNAL_SYNC = os.getenv("CALCULATOR_JOURNAL_SYNC", "batch").lower()
+    CALCULATOR_JOURNAL_COMMIT_INTERVAL = float(os.getenv("CALCULATOR_JOURNAL_COMMIT_INTERVAL", "0.01"))
+
+    # History and undo/redo stacks kept on disk and restored at startup.
+    CALCULATOR_PERSIST_UNDO = os.getenv("CALCULATOR_PERSIST_UNDO", "false").lower() == "true"
+    CALCULATOR_SESSION_FILE = os.getenv("CALCULATOR_SESSION_FILE",
+                                        os.path.join(CALCULATOR_HISTORY_DIR, "session.bin"))
+
+    # Observers notified in batches on worker threads (see app.history.ObserverBus).
+    CALCULATOR_OBSERVER_BUS = os.getenv("CALCULATOR_OBSERVER_BUS", "false").lower() == "true"
+    CALCULATOR_OBSERVER_QUEUE_SIZE = int(os.getenv("CALCULATOR_OBSERVER_QUEUE_SIZE", "10000"))
+    # What happens when the queue of an observer that saves the whole history is full:
+    # "block", "drop_oldest" or "coalesce". The other observers always block.
+    CALCULATOR_OBSERVER_BACKPRESSURE = os.getenv("CALCULATOR_OBSERVER_BACKPRESSURE", "block").lower()
+    CALCULATOR_OBSERVER_MAX_BATCH = int(os.getenv("CALCULATOR_OBSERVER_MAX_BATCH", "1000"))
+
+    CALCULATOR_PRECISION = int(os.getenv("CALCULATOR_PRECISION", "2"))
+    CALCULATOR_MAX_INPUT_VALUE = float(os.getenv("CALCULATOR_MAX_INPUT_VALUE", "1000000"))
+    CALCULATOR_DEFAULT_ENCODING = os.getenv("CALCULATOR_DEFAULT_ENCODING", "utf-8")
+    # Number of memoized (operation, a, b) results; 0 (the default) disables the cache.
+    CALCULATOR_RESULT_CACHE_SIZE = int(os.getenv("CALCULATOR_RESULT_CACHE_SIZE", "0"))
+    # Processes used by --compute --workers and app.parallel; 0 means one per CPU.
+    CALCULATOR_BULK_WORKERS = int(os.getenv("CALCULATOR_BULK_WORKERS", "0"))
+
+    CALCULATOR_SERVER_HOST = os.getenv("CALCULATOR_SERVER_HOST", "127.0.0.1")
+    CALCULATOR_SERVER_PORT = int(os.getenv("CALCULATOR_SERVER_PORT", "8765"))
+
+    # Per-command latency statistics; the file (if set) gets a JSON snapshot periodically.
+    CALCULATOR_STATS = os.getenv("CALCULATOR_STATS", "false").lower() == "true"
+    CALCULATOR_STATS_FILE = os.getenv("CALCULATOR_STATS_FILE", "")
+    CALCULATOR_STATS_DUMP_INTERVAL = float(os.getenv("CALCULATOR_STATS_DUMP_INTERVAL", "60"))
+
+
+_read_environment()
@@ -0,0 +1,296 @@
+"""
+Infix expressions over the registered calculations.
+
+An expression such as ``(3 + 4) * 2 ^ 5`` or ``root(x, 2) + percent(y, 20)`` is parsed
+once into a flat postfix program. Subexpressions whose operands are all constants are
+evaluated at compile time. Compiled programs are cached by their source text, and can
+be evaluated for a single set of variable values or over NumPy arrays of them.
+
+Operators map to calculations: ``+`` add, ``-`` subtract, ``*`` multiply, ``/`` divide,
+``//`` integer_division, ``%`` modulus and ``^`` power (right-associative). Every
+registered calculation can also be called as a function with one or two arguments;
+a missing second argument is 0. Like the calculation commands, evaluation rejects
+number literals larger in magnitude than CALCULATOR_MAX_INPUT_VALUE.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, List, Mapping, Optional, Tuple
+from app.calculation import CalculationFactory
+from app import config
+import app.calculation_operations  # registers the operations the expressions call
+
+# Instruction codes of a compiled program.
+CONST, VAR, CALL, NEG = range(4)
+
+BINARY_OPERATORS = {
+    "+": ("add", 1), "-": ("subtract", 1),
+    "*": ("multiply", 2), "/": ("divide", 2), "//": ("integer_division", 2), "%": ("modulus", 2),
+    "^": ("power", 4),
+}
+_UNARY_PRECEDENCE = 3
+
+_TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)|([A-Za-z_]\w*)|(//|[-+*/%^(),]))")
+
+Instruction = Tuple[int, object]
+
+
+class CompiledExpression:
+    """
+    A parsed expression as a postfix program of ``(code, operand)`` instructions.
+    """
+
+    __slots__ = ("source", "program", "variables", "largest_literal", "_steps")
+
+    def __init__(self, source: str, program: List[Instruction], largest_literal: float = 0.0):
+        self.source = source
+        # Checked when evaluating, so that a cached compilation follows the current limit.
+        self.largest_literal = largest_literal
+        self.program: Tuple[Instruction, ...] = tuple(program)
+        self.variables: Tuple[str, ...] = tuple(dict.fromkeys(arg for code, arg in program if code == VAR))
+        # Same program with functions resolved, for the scalar loop.
+        self._steps = tuple((code, CalculationFactory.scalar_function(arg) if code == CALL else arg) for code, arg in program)
+
+    def evaluate(self, bindings: Optional[Mapping[str, float]] = None) -> float:
+        """
+        Evaluate the expression for one set of variable values.
+
+        :param bindings: Value of every variable used in the expression.
+        :return: The unrounded result.
+        :raises ValueError: If a variable is unbound or a literal exceeds CALCULATOR_MAX_INPUT_VALUE.
+        :raises Exception: Whatever a calculation raises, e.g. ValueError on division by zero.
+        """
+        self._check_literals()
+        stack: List[float] = []
+        push = stack.append
+        pop = stack.pop
+        for code, arg in self._steps:
+            if code == CONST:
+                push(arg)
+            elif code == CALL:
+                b = pop()
+                stack[-1] = arg(stack[-1], b)
+            elif code == VAR:
+                try:
+                    push(float(bindings[arg]))
+                except (KeyError, TypeError):
+                    raise ValueError(f"Unbound variable: {arg}") from None
+            else:
+                stack[-1] = -stack[-1]
+        return pop()
+
+    def evaluate_many(self, bindings: Optional[Mapping[str, object]] = None,
+                      precision: Optional[int] = None) -> Tuple:
+        """
+        Evaluate the expression over arrays of variable values at once.
+
+        Arrays (and scalars) are broadcast against each other. Rows for which the
+        scalar evaluation would raise are reported in the error mask, as in
+        ``CalculationFactory.evaluate_many``.
+
+        :param bindings: Array-like values of every variable used in the expression.
+        :param precision: Decimal places to round to (defaults to CALCULATOR_PRECISION).
+        :return: Tuple of (results, errors); results of failed rows are NaN.
+        :raises ValueError: If a variable is unbound or a literal exceeds CALCULATOR_MAX_INPUT_VALUE.
+        """
+        self._check_literals()
+        import numpy as np
+        from app.vector_operations import round_results
+
+        bindings = bindings or {}
+        missing = [name for name in self.variables if name not in bindings]
+        if missing:
+            raise ValueError(f"Unbound variable: {missing[0]}")
+        values = np.broadcast_arrays(*(np.asarray(bindings[name], dtype=float) for name in self.variables),
+                                     np.empty(()))
+        arrays = dict(zip(self.variables, values))
+        shape = values[-1].shape
+        errors = np.zeros(shape, dtype=bool)
+        stack: List = []
+        with np.errstate(all="ignore"):
+            for code, arg in self.program:
+                if code == CONST:
+                    stack.append(np.full(shape, arg))
+                elif code == VAR:
+                    stack.append(arrays[arg])
+                elif code == NEG:
+                    stack[-1] = np.negative(stack[-1])
+                else:
+                    b = stack.pop()
+                    result, failed = _vector_call(arg, stack[-1], b)
+                    stack[-1] = np.array(result, dtype=float)
+                    errors |= failed
+        results = np.array(stack.pop(), dtype=float)
+        results[errors] = np.nan
+        if precision is None:
+            precision = config.CALCULATOR_PRECISION
+        return round_results(results, precision), errors
+
+    def _check_literals(self) -> None:
+        if self.largest_literal > config.CALCULATOR_MAX_INPUT_VALUE:
+            raise ValueError("Input values exceed the maximum allowed.")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(source: str) -> CompiledExpression:
+    """
+    Parse and compile an expression, reusing the result for identical source text.
+
+    :param source: The expression.
+    :return: The compiled expression.
+    :raises ValueError: If the expression is malformed or calls an unknown function.
+    """
+    parser = _Parser(source)
+    program = parser.parse()
+    return CompiledExpression(source, program, parser.largest_literal)
+
+
+def evaluate_expression(source: str, bindings: Optional[Mapping[str, float]] = None) -> float:
+    """
+    Evaluate an expression, compiling it on first use.
+
+    :param source: The expression.
+    :param bindings: Value of every variable used in the expression.
+    :return: The unrounded result.
+    :raises ValueError: If the expression is malformed or its evaluation fails.
+    """
+    return compile_expression(source).evaluate(bindings)
+
+
+class _Parser:
+    """Precedence-climbing parser emitting postfix instructions with constant folding."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = _tokenize(source)
+        self.index = 0
+        self.largest_literal = 0.0
+
+    def parse(self) -> List[Instruction]:
+        if not self.tokens:
+            raise ValueError("Empty expression.")
+        program = self._expression(0)
+        if self.index < len(self.tokens):
+            raise ValueError(f"Unexpected '{self.tokens[self.index][1]}' in expression.")
+        return program
+
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def _next(self) -> Tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise ValueError("Unexpected end of expression.")
+        self.index += 1
+        return token
+
+    def _expect(self, symbol: str) -> None:
+        kind, text = self._next()
+        if text != symbol or kind != "symbol":
+            raise ValueError(f"Expected '{symbol}' but found '{text}' in expression.")
+
+    def _expression(self, min_precedence: int) -> List[Instruction]:
+        left = self._unary()
+        while True:
+            token = self._peek()
+            if token is None or token[1] not in BINARY_OPERATORS:
+                return left
+            name, precedence = BINARY_OPERATORS[token[1]]
+            if precedence < min_precedence:
+                return left
+            self.index += 1
+            # ^ is right-associative, everything else left-associative.
+            right = self._expression(precedence if token[1] == "^" else precedence + 1)
+            left = _call(name, left, right)
+
+    def _unary(self) -> List[Instruction]:
+        token = self._peek()
+        if token == ("symbol", "-"):
+            self.index += 1
+            return _negate(self._expression(_UNARY_PRECEDENCE))
+        if token == ("symbol", "+"):
+            self.index += 1
+            return self._expression(_UNARY_PRECEDENCE)
+        return self._primary()
+
+    def _primary(self) -> List[Instruction]:
+        kind, text = self._next()
+        if kind == "number":
+            value = float(text)
+            if value > self.largest_literal:
+                self.largest_literal = value
+            return [(CONST, value)]
+        if kind == "name":
+            if self._peek() != ("symbol", "("):
+                return [(VAR, text)]
+            self.index += 1
+            name = CalculationFactory.resolve_name(text)
+            if name is None:
+                raise ValueError(f"Unknown function: {text}")
+            args = [self._expression(0)]
+            if self._peek() == ("symbol", ","):
+                self.index += 1
+                args.append(self._expression(0))
+            self._expect(")")
+            if len(args) == 1:
+                args.append([(CONST, 0.0)])
+            return _call(name, *args)
+        if text == "(":
+            inner = self._expression(0)
+            self._expect(")")
+            return inner
+        raise ValueError(f"Unexpected '{text}' in expression.")
+
+
+def _tokenize(source: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    end = len(source.rstrip())
+    while position < end:
+        match = _TOKEN.match(source, position)
+        if match is None:
+            raise ValueError(f"Invalid character '{source[position:].strip()[0]}' in expression.")
+        number, name, symbol = match.groups()
+        if number is not None:
+            tokens.append(("number", number))
+        elif name is not None:
+            tokens.append(("name", name))
+        else:
+            tokens.append(("symbol", symbol))
+        position = match.end()
+    return tokens
+
+
+def _call(name: str, left: List[Instruction], right: List[Instruction]) -> List[Instruction]:
+    if len(left) == 1 and len(right) == 1 and left[0][0] == CONST and right[0][0] == CONST:
+        try:
+            value = CalculationFactory.create_calculation(name, left[0][1], right[0][1]).execute()
+        except Exception:
+            value = None  # Not folded, so the error is raised each time the expression is evaluated.
+        if isinstance(value, (int, float)):
+            return [(CONST, float(value))]
+    return left + right + [(CALL, name)]
+
+
+def _negate(operand: List[Instruction]) -> List[Instruction]:
+    if len(operand) == 1 and operand[0][0] == CONST:
+        return [(CONST, -operand[0][1])]
+    return operand + [(NEG, None)]
+
+
+def _vector_call(name: str, a, b) -> Tuple:
+    import numpy as np
+    from app.vector_operations import vector_operations
+
+    kernel: Optional[Callable] = getattr(vector_operations, name, None)
+    if kernel is not None:
+        return kernel(a, b)
+    cls = CalculationFactory.registered()[name]
+    results = np.empty(a.shape, dtype=float)
+    errors = np.zeros(a.shape, dtype=bool)
+    for i, (x, y) in enumerate(zip(a.flat, b.flat)):
+        try:
+            results.flat[i] = cls(float(x), float(y)).execute()
+        except Exception:
+            errors.flat[i] = True
+    return results, errors
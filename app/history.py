@@ -1,17 +1,126 @@
 import os
-import pandas as pd
-from typing import List, Optional
-from app.calculation import Calculation
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+from app.calculation import Calculation, CalculationFactory
 from app.exceptions import FileProcessingError
 from app import config
 from abc import ABC, abstractmethod
 from typing import Sequence
+
+# Kinds of HistoryEvent.
+CALCULATION = "calculation"
+UNDO = "undo"
+REDO = "redo"
+CLEAR = "clear"
+LOAD = "load"
+FLUSH = "flush"
+
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "coalesce")
+
+
+class HistoryEvent(NamedTuple):
+    """A change to the history (or a save request), as delivered by ``ObserverBus``."""
+    kind: str
+    operation: Optional[str] = None
+    a: float = 0.0
+    b: float = 0.0
+    result: Optional[float] = None
+    calculation: Optional[Calculation] = None  # the undone or redone calculation
+    history: Any = None  # copy of the history after the change (see HistoryObserver.reads_history)
+
+
 # Define HistoryObserver interface to avoid circular import
 class HistoryObserver(ABC):
+    # True for observers that read the whole history when notified. ObserverBus then
+    # attaches a copy of the history to the newest event of each batch, since the live
+    # one may change while the observer's worker is reading it.
+    reads_history = False
+    # Lock the command dispatcher holds while a command changes the history and
+    # notifies this observer, or None. ObserverBus sets it to the lock its workers
+    # hold while copying the history.
+    lock = None
+
     @abstractmethod
     def update(self, calculation: Calculation) -> None:
         pass #pragma: no cover
 
+    def update_values(self, operation: str, a: float, b: float, result: Optional[float]) -> None:
+        """
+        Called with a new calculation given as plain values (the command fast path).
+
+        Creates the Calculation and passes it to ``update``; observers that only need
+        the values override this so that no object is created.
+
+        :param operation: Registered calculation name.
+        :param a: First operand.
+        :param b: Second operand.
+        :param result: The rounded result.
+        """
+        calculation = CalculationFactory.create_calculation(operation, a, b)
+        calculation.result = result
+        self.update(calculation)
+
+    def update_many(self, events: Sequence[HistoryEvent]) -> None:
+        """
+        Called by ``ObserverBus`` with a batch of events, oldest first.
+
+        Passes each event to the matching method; observers that can handle a batch
+        with less I/O than event by event override this.
+
+        :param events: The events of the batch.
+        """
+        for event in events:
+            kind = event.kind
+            if kind == CALCULATION:
+                self.update_values(event.operation, event.a, event.b, event.result)
+            elif kind == UNDO:
+                self.on_undo(event.calculation)
+            elif kind == REDO:
+                self.on_redo(event.calculation)
+            elif kind == CLEAR:
+                self.on_clear()
+            elif kind == LOAD:
+                self.on_load(event.history)
+            elif kind == FLUSH:
+                self.flush()
+
+    def on_undo(self, calculation: Calculation) -> None:
+        """
+        Called after a calculation has been removed from history by ``undo``.
+
+        :param calculation: The calculation that was undone.
+        """
+
+    def on_redo(self, calculation: Calculation) -> None:
+        """
+        Called after an undone calculation has been restored by ``redo``.
+
+        :param calculation: The calculation that was restored.
+        """
+
+    def on_clear(self) -> None:
+        """
+        Called after the history has been cleared.
+        """
+
+    def on_load(self, history: Sequence[Calculation]) -> None:
+        """
+        Called after the history has been replaced by the ``load`` command.
+
+        :param history: The history with the loaded calculations.
+        """
+
+    def flush(self) -> None:
+        """
+        Make sure everything reported so far has been persisted (``save`` command).
+        """
+
+    def close(self) -> None:
+        """
+        Called when the session ends; flush and release any open resources.
+        """
+
 class AutoSaveObserver(HistoryObserver):
     def __init__(self, history: Sequence[Calculation], output_file: Optional[str] = None):
         self.history = history
@@ -30,15 +139,283 @@ class AutoSaveObserver(HistoryObserver):
 
         :param _: The most recent Calculation (not used directly).
         """
+        import pandas as pd
+
         try:
-            data = [{
-                "operation": c.__class__.__name__,
-                "operand1": c.a,
-                "operand2": c.b,
-                "result": getattr(c, "result", None)  # Use getattr to avoid crash if unset
-            } for c in self.history]
-
-            df = pd.DataFrame(data)
+            to_dataframe = getattr(self.history, "to_dataframe", None)
+            if to_dataframe is not None:
+                df = to_dataframe()
+            else:
+                df = pd.DataFrame([{
+                    "operation": c.__class__.__name__,
+                    "operand1": c.a,
+                    "operand2": c.b,
+                    "result": getattr(c, "result", None)  # Use getattr to avoid crash if unset
+                } for c in self.history])
             df.to_csv(self.output_file, index=False, encoding=config.CALCULATOR_DEFAULT_ENCODING)
         except Exception as e:
             raise FileProcessingError(f"Error saving history to {self.output_file}: {e}")
+
+
+class ObserverWorker:
+    """
+    Delivers queued events to one observer on a thread of its own.
+
+    At most ``queue_size`` events wait in the queue. When it is full, ``policy``
+    decides what happens to a new event:
+
+    - ``block``: wait until the observer has caught up;
+    - ``drop_oldest``: the oldest waiting calculation is discarded;
+    - ``coalesce``: every waiting calculation is discarded, so that the newest event
+      stands for all of them.
+
+    The lossy policies only suit observers with ``reads_history``, which save the
+    whole history rather than the events; ObserverBus uses ``block`` for the others.
+
+    Undo, redo, clear, load and flush events are never discarded; if only those are
+    waiting, a new event waits for room under any policy. The thread hands up to
+    ``max_batch`` waiting events at a time to ``observer.update_many``. An exception
+    raised by the observer is re-raised by the next ``put``, ``wait`` or ``close``.
+
+    For an observer with ``reads_history`` the thread copies ``history`` when it
+    takes a batch, holding ``lock``, and attaches the copy to the batch's newest
+    event; queued events hold no copies.
+    """
+
+    def __init__(self, observer: HistoryObserver, queue_size: int, policy: str, max_batch: int,
+                 lock: Optional[threading.RLock] = None, history: Optional[Sequence[Calculation]] = None):
+        """
+        :param observer: The observer to deliver to.
+        :param queue_size: Maximum number of waiting events.
+        :param policy: One of BACKPRESSURE_POLICIES.
+        :param max_batch: Maximum number of events per ``update_many`` call.
+        :param lock: Guards the queue; also held by whoever changes ``history``.
+        :param history: The history copied for an observer with ``reads_history``.
+        """
+        self.observer = observer
+        self.queue_size = queue_size
+        self.policy = policy
+        self.max_batch = max_batch
+        self.history = history
+        self._events: Deque[Tuple[int, HistoryEvent]] = deque()
+        self._condition = threading.Condition(lock or threading.RLock())
+        self._sequence = 0  # of the newest queued event
+        self._delivered = 0  # sequence of the newest delivered event
+        self._stopping = False
+        self.batches = 0
+        self.events_delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_queue_depth = 0
+        self.error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name=f"observer-{observer.__class__.__name__}",
+                                        daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of events waiting to be delivered."""
+        return len(self._events)
+
+    def put(self, event: HistoryEvent) -> int:
+        """
+        Queue an event, applying the backpressure policy if the queue is full.
+
+        :param event: The event to deliver.
+        :return: The event's sequence number, to pass to ``wait``.
+        """
+        with self._condition:
+            self._raise_error()
+            events = self._events
+            while len(events) >= self.queue_size and not self._stopping:
+                if self.policy == "drop_oldest":
+                    for i, (_, queued) in enumerate(events):
+                        if queued.kind == CALCULATION:
+                            del events[i]
+                            self.dropped += 1
+                            break
+                elif self.policy == "coalesce":
+                    kept = [item for item in events if item[1].kind != CALCULATION]
+                    self.coalesced += len(events) - len(kept)
+                    events.clear()
+                    events.extend(kept)
+                if len(events) >= self.queue_size:
+                    self._condition.wait()
+            self._sequence += 1
+            events.append((self._sequence, event))
+            if len(events) > self.max_queue_depth:
+                self.max_queue_depth = len(events)
+            self._condition.notify_all()
+            return self._sequence
+
+    def wait(self, sequence: int) -> None:
+        """
+        Block until the event with the given sequence number has been delivered.
+
+        :param sequence: As returned by ``put``.
+        """
+        with self._condition:
+            while self._delivered < sequence and self._thread.is_alive():
+                self._condition.wait()
+            self._raise_error()
+
+    def close(self) -> None:
+        """
+        Deliver the waiting events, close the observer and stop the thread.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join()
+        with self._condition:
+            self._raise_error()
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth, batch and event counts."""
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "events": self.events_delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._events and not self._stopping:
+                    self._condition.wait()
+                if not self._events:
+                    break
+                batch = [self._events.popleft() for _ in range(min(len(self._events), self.max_batch))]
+                if self.observer.reads_history:
+                    sequence, newest = batch[-1]
+                    batch[-1] = (sequence, newest._replace(history=_snapshot(self.history)))
+                self._condition.notify_all()
+            try:
+                self.observer.update_many([event for _, event in batch])
+            except Exception as e:
+                self.error = e
+            with self._condition:
+                self._delivered = batch[-1][0]
+                self.batches += 1
+                self.events_delivered += len(batch)
+                self._condition.notify_all()
+        try:
+            self.observer.close()
+        except Exception as e:
+            self.error = e
+
+
+class ObserverBus(HistoryObserver):
+    """
+    Notifies observers through ObserverWorkers instead of calling them directly.
+
+    The bus is itself an observer: the session notifies it like any other, and it
+    queues a HistoryEvent for every observer, which receives them in batches on its
+    own thread. Observers with ``reads_history`` get a copy of the history with the
+    newest event of each batch, taken while holding ``lock``; whoever changes the
+    history must hold ``lock`` while doing so (the REPL holds it for each command).
+    ``flush`` (the ``save`` command) waits until every observer has handled the
+    events so far and its own ``flush``.
+    """
+
+    def __init__(self, history: Sequence[Calculation], observers: List[HistoryObserver],
+                 queue_size: Optional[int] = None, policy: Optional[str] = None,
+                 max_batch: Optional[int] = None):
+        """
+        :param history: The session's calculation history.
+        :param observers: The observers to notify.
+        :param queue_size: Events waiting per observer (defaults to CALCULATOR_OBSERVER_QUEUE_SIZE).
+        :param policy: Backpressure policy (defaults to CALCULATOR_OBSERVER_BACKPRESSURE) of
+            the observers with ``reads_history``; the others, which need every event,
+            always use ``block``.
+        :param max_batch: Events per batch (defaults to CALCULATOR_OBSERVER_MAX_BATCH).
+        :raises ValueError: If the policy is unknown.
+        """
+        policy = policy or config.CALCULATOR_OBSERVER_BACKPRESSURE
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy {policy!r}; use one of {', '.join(BACKPRESSURE_POLICIES)}.")
+        self.history = history
+        self.lock = threading.RLock()
+        self.workers = [ObserverWorker(observer, queue_size or config.CALCULATOR_OBSERVER_QUEUE_SIZE,
+                                       policy if observer.reads_history else "block", max_batch or config.CALCULATOR_OBSERVER_MAX_BATCH, self.lock, history)
+                        for observer in observers]
+
+    def update(self, calculation: Calculation) -> None:
+        self.update_values(calculation.__class__.__name__, calculation.a, calculation.b,
+                           getattr(calculation, "result", None))
+
+    def update_values(self, operation: str, a: float, b: float, result: Optional[float]) -> None:
+        self._publish(HistoryEvent(CALCULATION, operation, a, b, result))
+
+    def update_many(self, events: Sequence[HistoryEvent]) -> None:
+        for event in events:
+            self._publish(event)
+
+    def on_undo(self, calculation: Calculation) -> None:
+        self._publish(HistoryEvent(UNDO, calculation=calculation))
+
+    def on_redo(self, calculation: Calculation) -> None:
+        self._publish(HistoryEvent(REDO, calculation=calculation))
+
+    def on_clear(self) -> None:
+        self._publish(HistoryEvent(CLEAR))
+
+    def on_load(self, history: Sequence[Calculation]) -> None:
+        self._publish(HistoryEvent(LOAD, history=_snapshot(history)))
+
+    def flush(self) -> None:
+        """
+        Wait until every observer has handled the events so far and flushed.
+        """
+        sequences = self._publish(HistoryEvent(FLUSH))
+        error = None
+        for worker, sequence in zip(self.workers, sequences):
+            try:
+                worker.wait(sequence)
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """
+        Deliver the waiting events, close every observer and stop the workers.
+        """
+        error = None
+        for worker in self.workers:
+            try:
+                worker.close()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Each worker's ``stats``, by observer class name."""
+        return {worker.observer.__class__.__name__: worker.stats() for worker in self.workers}
+
+    def _publish(self, event: HistoryEvent) -> List[int]:
+        # Every worker gets the event even if one of them fails; the first error is raised afterwards.
+        sequences, error = [], None
+        for worker in self.workers:
+            try:
+                sequences.append(worker.put(event))
+            except Exception as e:
+                sequences.append(0)
+                error = error or e
+        if error is not None:
+            raise error
+        return sequences
+
+
+def _snapshot(history: Sequence[Calculation]):
+    snapshot = getattr(history, "snapshot", None)
+    return snapshot() if snapshot is not None else list(history)
@@ -0,0 +1,199 @@
+"""
+Binary columnar history files.
+
+With ``CALCULATOR_AUTO_SAVE_MODE=binary`` the history is saved to ``history.bin``
+instead of ``history.csv``. The file holds the same columns as the history itself::
+
+    header   magic, row count, name count            (24 bytes)
+    names    operation names, NUL-padded             (24 bytes each)
+    codes    operation code of every row             (1 byte each, padded to 8)
+    operand1, operand2, result                       (little-endian doubles)
+
+Floats are stored as they are, so nothing is lost to text formatting, and writing
+is one ``write`` per column. Reading maps the file and wraps the columns as NumPy
+arrays without copying or parsing, so opening a file takes the same time whatever
+its size; only the rows that end up in the history are copied.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from typing import List, Optional, Sequence
+from app import config
+from app.autosave import AutoSaveObserver
+from app.calculation import Calculation
+from app.history_file import LoadedHistory, parse_history_csv
+from app.history_store import CalculationHistory
+
+MAGIC = b"CALCHIS1"
+_HEADER = struct.Struct("<8sqq")  # magic, rows, names
+_NAME_SIZE = 24
+
+
+def _layout(rows: int, names: int) -> dict:
+    """Byte offsets of the columns (and the file size)."""
+    codes = _HEADER.size + names * _NAME_SIZE
+    a = codes + (rows + 7) // 8 * 8
+    return {"codes": codes, "a": a, "b": a + 8 * rows, "results": a + 16 * rows, "size": a + 24 * rows}
+
+
+def is_binary_history(path: str) -> bool:
+    """Whether ``path`` starts like a binary history file."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_binary_columns(path: str, names: Sequence[str], codes, a, b, results) -> None:
+    """
+    Write history columns to a binary history file.
+
+    The file is written next to ``path`` and renamed over it, so readers never see
+    a partial file.
+
+    :param path: The file to write.
+    :param names: Operation names indexed by operation code.
+    :param codes: Operation codes (bytes-like, one byte per row).
+    :param a: Operand1 column (bytes-like of doubles).
+    :param b: Operand2 column.
+    :param results: Result column (NaN for no result).
+    """
+    codes, a, b, results = (memoryview(column).cast("B") for column in (codes, a, b, results))
+    rows = len(codes)
+    if not len(a) == len(b) == len(results) == 8 * rows:
+        raise ValueError("History columns differ in length.")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, rows, len(names)))
+        f.write(b"".join(name.encode("utf-8")[:_NAME_SIZE].ljust(_NAME_SIZE, b"\0") for name in names))
+        f.write(codes)
+        f.write(bytes(-rows % 8))
+        for column in (a, b, results):
+            f.write(column)
+    os.replace(temporary, path)
+
+
+def write_binary_history(history: CalculationHistory, path: str) -> None:
+    """
+    Save the live entries of a history to a binary history file.
+
+    :param history: The history to save.
+    :param path: The file to write.
+    """
+    views = history.columns()
+    write_binary_columns(path, history.operation_names, views["operation_code"], views["operand1"],
+                         views["operand2"], views["result"])
+
+
+def load_binary_history(path: str, capacity: Optional[int] = None) -> LoadedHistory:
+    """
+    Open a binary history file.
+
+    The columns are read-only NumPy views of the mapped file; the mapping stays open
+    as long as they are referenced.
+
+    :param path: The binary history file.
+    :param capacity: Keep only the newest ``capacity`` rows (all by default).
+    :return: The rows, as returned by ``app.history_file.load_history_file``.
+    :raises ValueError: If the file is not a binary history file.
+    """
+    import numpy as np
+
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a binary history file.")
+        _, rows, name_count = _HEADER.unpack(header)
+        layout = _layout(rows, name_count)
+        if os.fstat(f.fileno()).st_size < layout["size"]:
+            raise ValueError(f"{path} is truncated.")
+        data = mmap.mmap(f.fileno(), layout["size"], access=mmap.ACCESS_READ)
+    names = [data[offset:offset + _NAME_SIZE].rstrip(b"\0").decode("utf-8")
+             for offset in range(_HEADER.size, layout["codes"], _NAME_SIZE)]
+    first = 0 if capacity is None else max(0, rows - capacity)
+    count = rows - first
+    return LoadedHistory(
+        names,
+        np.frombuffer(data, dtype=np.uint8, count=count, offset=layout["codes"] + first),
+        *(np.frombuffer(data, dtype="<f8", count=count, offset=layout[column] + 8 * first)
+          for column in ("a", "b", "results")),
+        0)
+
+
+def csv_to_binary(csv_path: str, binary_path: str) -> int:
+    """
+    Convert a history CSV (full or incremental) to a binary history file.
+
+    :param csv_path: The history CSV; undo/clear rows are applied and rows of
+        unknown operations are skipped.
+    :param binary_path: The binary file to write.
+    :return: The number of rows written.
+    """
+    loaded = parse_history_csv(csv_path, sys.maxsize)
+    write_binary_columns(binary_path, loaded.names, loaded.codes, loaded.a, loaded.b, loaded.results)
+    return len(loaded)
+
+
+def binary_to_csv(binary_path: str, csv_path: str) -> int:
+    """
+    Convert a binary history file to a history CSV.
+
+    :param binary_path: The binary history file.
+    :param csv_path: The CSV to write (operation, operand1, operand2, result).
+    :return: The number of rows written.
+    """
+    import pandas as pd
+
+    loaded = load_binary_history(binary_path)
+    pd.DataFrame({
+        "operation": pd.Categorical.from_codes(loaded.codes, categories=loaded.names),
+        "operand1": loaded.a,
+        "operand2": loaded.b,
+        "result": loaded.results,
+    }).to_csv(csv_path, index=False, encoding=config.CALCULATOR_DEFAULT_ENCODING)
+    return len(loaded)
+
+
+class BinaryAutoSaveObserver(AutoSaveObserver):
+    """
+    Saves the whole history to a binary history file after every change.
+
+    Like AutoSaveObserver, it writes on a BackgroundWriter when
+    CALCULATOR_AUTO_SAVE_BACKGROUND is enabled, so a command only hands over a copy
+    of the history and a burst of changes is saved once.
+    """
+
+    def __init__(self, history: CalculationHistory, output_file: Optional[str] = None,
+                 background: Optional[bool] = None):
+        """
+        :param history: The session's calculation history.
+        :param output_file: The binary file (defaults to history.bin in CALCULATOR_HISTORY_DIR).
+        :param background: Write on a background thread (defaults to CALCULATOR_AUTO_SAVE_BACKGROUND).
+        """
+        super().__init__(history, output_file or os.path.join(config.CALCULATOR_HISTORY_DIR, "history.bin"),
+                         background)
+
+    def on_undo(self, _: Calculation) -> None:
+        self._save(self.history)
+
+    on_redo = on_undo
+
+    def on_clear(self) -> None:
+        self._save(self.history)
+
+    def on_load(self, _: List[Calculation]) -> None:
+        self._save(self.history)
+
+    def flush(self) -> None:
+        """
+        Write the current history, even if it is empty, and wait until it is written.
+        """
+        self._save(self.history)
+        if self.writer is not None:
+            self.writer.flush()
+
+    def _write(self, history: CalculationHistory) -> None:
+        write_binary_history(history, self.output_file)
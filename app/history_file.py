@@ -0,0 +1,181 @@
+"""
+Reading saved history files back into a session (the ``load`` command).
+
+The history CSV is read in chunks with pandas and only the newest ``capacity``
+live rows are kept, so memory use is bounded by the history size rather than the
+file size. Chunks without undo/clear rows (every full-mode file) are handled
+with array operations only; chunks containing tombstones are replayed row by row.
+
+Parsed files are cached keyed on path, size and modification time, so loading an
+unchanged file again skips parsing entirely.
+"""
+
+import os
+from collections import OrderedDict, deque
+from typing import List, NamedTuple, Optional, Tuple
+from app import config
+from app.autosave import CLEAR_MARKER, UNDO_MARKER
+from app.calculation import CalculationFactory
+from app.calculator_memento import MementoManager
+from app.history_store import CalculationHistory
+
+CHUNK_SIZE = 100_000
+CACHE_SIZE = 4
+
+_cache: "OrderedDict[Tuple[str, int, int, int], LoadedHistory]" = OrderedDict()
+
+
+class LoadedHistory(NamedTuple):
+    """Live rows of a history file as NumPy columns, oldest first."""
+    names: List[str]
+    codes: object
+    a: object
+    b: object
+    results: object
+    skipped: int
+    origins: Optional[List[Tuple[str, int]]] = None  # (session, sequence) of shared-history rows
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+def load_history_file(path: str, capacity: int) -> LoadedHistory:
+    """
+    Parse a history CSV (operation, operand1, operand2, result), or return the cached
+    result if the file has not changed.
+
+    :param path: The history file.
+    :param capacity: Number of newest live rows to keep.
+    :return: The live rows; rows of unknown operations are skipped and counted.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, capacity)
+    loaded = _cache.get(key)
+    if loaded is None:
+        loaded = parse_history_csv(path, capacity)
+        _cache[key] = loaded
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    return loaded
+
+
+def load_shared_rows(rows: List[List[str]], capacity: int) -> LoadedHistory:
+    """
+    Convert merged shared-history rows (see ``app.shared_history``) to columns.
+
+    :param rows: Live rows of session, sequence, operation, operand1, operand2, result.
+    :param capacity: Number of newest rows to keep.
+    :return: The rows, with the session and sequence number of each in ``origins``.
+    """
+    import numpy as np
+
+    rows = rows[-capacity:]
+    names: List[str] = []
+    codes_by_name = {}
+    codes, a, b, results, origins = [], [], [], [], []
+    skipped = 0
+    for row in rows:
+        if row[2] not in CalculationFactory.registered():
+            skipped += 1
+            continue
+        code = codes_by_name.get(row[2])
+        if code is None:
+            code = codes_by_name[row[2]] = len(names)
+            names.append(row[2])
+        codes.append(code)
+        a.append(float(row[3]))
+        b.append(float(row[4]))
+        results.append(float(row[5]) if row[5] else np.nan)
+        origins.append((row[0], int(row[1])))
+    return LoadedHistory(names, np.array(codes, dtype=np.uint8), np.array(a, dtype=float),
+                         np.array(b, dtype=float), np.array(results, dtype=float), skipped, origins)
+
+
+def parse_history_csv(path: str, capacity: int) -> LoadedHistory:
+    """
+    Parse a history CSV without the cache.
+
+    :param path: The history file.
+    :param capacity: Number of newest live rows to keep.
+    :return: The live rows; rows of unknown operations are skipped and counted.
+    """
+    import numpy as np
+    import pandas as pd
+
+    names: List[str] = []
+    codes_by_name = {}
+    empty = np.empty(0)
+    codes, a, b, results = np.empty(0, dtype=np.uint8), empty, empty, empty
+    skipped = 0
+    reader = pd.read_csv(path, chunksize=CHUNK_SIZE, encoding=config.CALCULATOR_DEFAULT_ENCODING,
+                         dtype={"operation": str}, usecols=["operation", "operand1", "operand2", "result"])
+    with reader:
+        for chunk in reader:
+            operations = chunk["operation"].to_numpy()
+            tombstone = (operations == UNDO_MARKER) | (operations == CLEAR_MARKER)
+            known = np.isin(operations, list(CalculationFactory.registered())) | tombstone
+            skipped += int((~known).sum())
+            if not known.all():
+                chunk, operations, tombstone = chunk[known], operations[known], tombstone[known]
+
+            # Tombstone rows keep code 0; the replay below drops them.
+            name_codes, uniques = pd.factorize(operations[~tombstone])
+            mapping = np.empty(len(uniques), dtype=np.uint8)
+            for i, name in enumerate(uniques):
+                if name not in codes_by_name:
+                    if len(names) > 255:
+                        raise ValueError("Too many distinct operations in history file.")
+                    codes_by_name[name] = len(names)
+                    names.append(name)
+                mapping[i] = codes_by_name[name]
+            chunk_codes = np.zeros(len(operations), dtype=np.uint8)
+            chunk_codes[~tombstone] = mapping[name_codes]
+            codes = np.concatenate([codes, chunk_codes])
+            a = np.concatenate([a, chunk["operand1"].to_numpy(dtype=float)])
+            b = np.concatenate([b, chunk["operand2"].to_numpy(dtype=float)])
+            results = np.concatenate([results, chunk["result"].to_numpy(dtype=float)])
+
+            if tombstone.any():
+                # Replay on indices: everything kept so far, then this chunk's rows.
+                offset = len(codes) - len(chunk_codes)
+                live = deque(range(max(0, offset - capacity), offset), maxlen=capacity)
+                for i, is_tombstone in enumerate(tombstone.tolist()):
+                    if not is_tombstone:
+                        live.append(offset + i)
+                    elif operations[i] == UNDO_MARKER:
+                        if live:
+                            live.pop()
+                    else:
+                        live.clear()
+                keep = np.fromiter(live, dtype=np.intp, count=len(live))
+            else:
+                keep = slice(max(0, len(codes) - capacity), None)
+            codes, a, b, results = codes[keep], a[keep], b[keep], results[keep]
+    return LoadedHistory(names, codes, a, b, results, skipped)
+
+
+def restore_loaded(loaded: LoadedHistory, history: CalculationHistory, memento_manager: MementoManager) -> None:
+    """
+    Replace the history's contents with loaded rows; they become undoable and the
+    redo stack is emptied. The rows' origins, if any, are kept in ``history.origins``.
+
+    :param loaded: Rows from ``load_history_file`` or ``load_shared_rows``.
+    :param history: The session's history.
+    :param memento_manager: Undo/redo manager of ``history``.
+    """
+    import numpy as np
+
+    capacity = history.capacity
+    first = history.next_position
+    count = min(len(loaded), capacity)
+    slots = np.arange(first, first + count) % capacity
+    columns = []
+    for column, dtype in ((loaded.codes, np.uint8), (loaded.a, float), (loaded.b, float), (loaded.results, float)):
+        ring = np.zeros(capacity, dtype=dtype)
+        ring[slots] = column[len(column) - count:]
+        columns.append(ring.tobytes())
+    history.load_ring(loaded.names, *columns, first, first + count, 0)
+    history.origins = loaded.origins[len(loaded.origins) - count:] if loaded.origins is not None else None
+    memento_manager.restore(range(first, first + count), range(0))
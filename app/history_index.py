@@ -0,0 +1,290 @@
+"""
+Indexes and queries over the calculation history.
+
+The ``history`` command filters past calculations by operation, operand and result
+ranges. To avoid scanning hundreds of thousands of entries per query, the history
+keeps a ``HistoryIndex`` once the first query has been made: the positions of the
+entries of every operation in order, and all results in sorted order. Both are
+updated as entries are appended, evicted, undone and redone, so a query only visits
+the entries of the selected operation or result range.
+
+Query syntax (every part optional)::
+
+    history [op=<name>] [a=<lo>:<hi>] [b=<lo>:<hi>] [result=<lo>:<hi>] [last=<n>] [page=<n>]
+
+A range bound may be left out (``result=10:`` means at least 10) and a single value
+(``a=3``) matches exactly. Matches are listed newest first.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from app.calculation import CalculationFactory
+
+# Keys per block of the sorted result index; blocks split at twice this size.
+_LOAD = 512
+
+QUERY_USAGE = "Usage: history [op=<name>] [a=<lo>:<hi>] [b=<lo>:<hi>] [result=<lo>:<hi>] [last=<n>] [page=<n>]"
+
+
+class _SortedResults:
+    """
+    Results in sorted order with the position of each, stored as blocks of parallel
+    lists so that inserting and removing move at most a block's worth of items.
+
+    Equal results keep their positions in ascending order: positions are only added
+    above every live position, so a new key goes after the equal ones already
+    present. The oldest entry with a given result is therefore the first of its run
+    and the newest the last, which is what eviction and undo remove.
+    """
+
+    def __init__(self, keys: Iterable[Tuple[float, int]] = ()):
+        keys = sorted(keys)
+        self._values: List[List[float]] = []
+        self._positions: List[List[int]] = []
+        for i in range(0, len(keys), _LOAD):
+            block = keys[i:i + _LOAD]
+            self._values.append([value for value, _ in block])
+            self._positions.append([position for _, position in block])
+        self._maxes: List[float] = [values[-1] for values in self._values]
+        self._length = len(keys)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def add(self, value: float, position: int) -> None:
+        self._length += 1
+        if not self._maxes:
+            self._values.append([value])
+            self._positions.append([position])
+            self._maxes.append(value)
+            return
+        i = bisect_right(self._maxes, value)
+        if i == len(self._maxes):
+            i -= 1
+            self._values[i].append(value)
+            self._positions[i].append(position)
+            self._maxes[i] = value
+        else:
+            j = bisect_right(self._values[i], value)
+            self._values[i].insert(j, value)
+            self._positions[i].insert(j, position)
+        values = self._values[i]
+        if len(values) > 2 * _LOAD:
+            positions = self._positions[i]
+            self._values.insert(i + 1, values[_LOAD:])
+            self._positions.insert(i + 1, positions[_LOAD:])
+            del values[_LOAD:], positions[_LOAD:]
+            self._maxes.insert(i, values[-1])
+
+    def remove_first(self, value: float) -> None:
+        """Remove the oldest position with this result."""
+        i = bisect_left(self._maxes, value)
+        self._remove(i, bisect_left(self._values[i], value))
+
+    def remove_last(self, value: float) -> None:
+        """Remove the newest position with this result."""
+        i = bisect_right(self._maxes, value)
+        j = bisect_right(self._values[i], value) - 1 if i < len(self._maxes) else -1
+        if j < 0 or self._values[i][j] != value:
+            i -= 1
+            j = len(self._values[i]) - 1
+        self._remove(i, j)
+
+    def _remove(self, i: int, j: int) -> None:
+        values = self._values[i]
+        del values[j], self._positions[i][j]
+        self._length -= 1
+        if values:
+            self._maxes[i] = values[-1]
+        else:
+            del self._values[i], self._positions[i], self._maxes[i]
+
+    def positions_between(self, low: float, high: float) -> List[int]:
+        """Positions of the results in ``[low, high]``, ordered by result."""
+        positions = []
+        for i in range(bisect_left(self._maxes, low), len(self._maxes)):
+            values = self._values[i]
+            end = bisect_right(values, high)
+            positions.extend(self._positions[i][bisect_left(values, low):end])
+            if end < len(values):
+                break
+        return positions
+
+
+class HistoryIndex:
+    """
+    Per-operation position lists and a sorted result index of a CalculationHistory.
+
+    Entries are identified by their history position. Live positions are always a
+    contiguous range, so appends and redos add at the end of an operation's list and
+    evictions and undos remove from either end, all in O(1). Entries without a result
+    are left out of the result index.
+    """
+
+    def __init__(self):
+        self.by_operation: Dict[int, Deque[int]] = {}
+        self.results = _SortedResults()
+
+    @classmethod
+    def build(cls, codes: Sequence[int], results: Sequence[float], first_position: int) -> "HistoryIndex":
+        """
+        Index existing entries.
+
+        :param codes: Operation codes of the live entries, oldest first.
+        :param results: Their results (NaN for none).
+        :param first_position: Position of the oldest entry.
+        """
+        index = cls()
+        for offset, code in enumerate(codes):
+            positions = index.by_operation.get(code)
+            if positions is None:
+                positions = index.by_operation[code] = deque()
+            positions.append(first_position + offset)
+        index.results = _SortedResults((result, first_position + offset)
+                                    for offset, result in enumerate(results) if result == result)
+        return index
+
+    def add_newest(self, position: int, code: int, result: float) -> None:
+        positions = self.by_operation.get(code)
+        if positions is None:
+            positions = self.by_operation[code] = deque()
+        positions.append(position)
+        if result == result:
+            self.results.add(result, position)
+
+    def remove_newest(self, code: int, result: float) -> None:
+        self.by_operation[code].pop()
+        if result == result:
+            self.results.remove_last(result)
+
+    def remove_oldest(self, code: int, result: float) -> None:
+        self.by_operation[code].popleft()
+        if result == result:
+            self.results.remove_first(result)
+
+
+class HistoryQuery(NamedTuple):
+    operation: Optional[str] = None
+    a: Optional[Tuple[float, float]] = None
+    b: Optional[Tuple[float, float]] = None
+    result: Optional[Tuple[float, float]] = None
+    last: Optional[int] = None
+    page: int = 1
+
+
+def parse_query(args: Sequence[str]) -> HistoryQuery:
+    """
+    Parse the arguments of the ``history`` command.
+
+    :param args: The words after ``history``.
+    :return: The query.
+    :raises ValueError: If an argument is not understood.
+    """
+    fields = {}
+    for arg in args:
+        key, separator, value = arg.partition("=")
+        key = key.lower()
+        if not separator or not value:
+            raise ValueError(f"Invalid query argument: {arg}")
+        if key == "op":
+            value = value.lower()
+            fields["operation"] = CalculationFactory.resolve_name(value) or value
+        elif key in ("a", "b", "result"):
+            fields[key] = _parse_range(value)
+        elif key in ("last", "page"):
+            if not value.isdigit() or int(value) < 1:
+                raise ValueError(f"{key} must be a positive integer.")
+            fields[key] = int(value)
+        else:
+            raise ValueError(f"Unknown query field: {key}")
+    return HistoryQuery(**fields)
+
+
+def _parse_range(value: str) -> Tuple[float, float]:
+    low, separator, high = value.partition(":")
+    try:
+        if not separator:
+            return float(low), float(low)
+        return (float(low) if low else float("-inf")), (float(high) if high else float("inf"))
+    except ValueError:
+        raise ValueError(f"Invalid range: {value}") from None
+
+
+def search(history, query: HistoryQuery) -> Sequence[int]:
+    """
+    Find the positions of the history entries matching a query.
+
+    The candidates come from the result index if a result range is given, otherwise
+    from the operation's position list, otherwise from the whole history; the
+    remaining conditions are only checked on the candidates. The index is only
+    built for a query that needs it, and a query without conditions returns a
+    ``range`` instead of listing every position.
+
+    :param history: The CalculationHistory to search.
+    :param query: The query.
+    :return: Matching positions, newest first, at most ``query.last`` of them.
+    """
+    names = history.operation_names
+    code = None
+    if query.operation is not None:
+        if query.operation not in names:
+            return []
+        code = names.index(query.operation)
+
+    filters = []
+    if query.result is not None:
+        candidates: Iterable[int] = sorted(history.index().results.positions_between(*query.result), reverse=True)
+        if code is not None:
+            filters.append((0, code, code))
+    elif code is not None:
+        candidates = reversed(history.index().by_operation.get(code, ()))
+    else:
+        candidates = range(history.next_position - 1, history.next_position - len(history) - 1, -1)
+    if query.a is not None:
+        filters.append((1, *query.a))
+    if query.b is not None:
+        filters.append((2, *query.b))
+
+    if not filters:
+        if isinstance(candidates, range):
+            return candidates[:query.last]
+        return list(islice(candidates, query.last))
+    values_at = history.values_at
+    matches = []
+    for position in candidates:
+        values = values_at(position)
+        for field, low, high in filters:
+            if not low <= values[field] <= high:
+                break
+        else:
+            matches.append(position)
+            if len(matches) == query.last:
+                break
+    return matches
+
+
+def format_page(history, positions: Sequence[int], page: int, page_size: int) -> List[str]:
+    """
+    Render one page of query results.
+
+    :param history: The CalculationHistory the positions refer to.
+    :param positions: Matching positions, as returned by ``search``.
+    :param page: 1-based page number.
+    :param page_size: Entries per page.
+    :return: The lines to print.
+    """
+    if not positions:
+        return ["No matching calculations."]
+    pages = (len(positions) + page_size - 1) // page_size
+    page = min(page, pages)
+    shown = positions[(page - 1) * page_size:page * page_size]
+    first = history.next_position - len(history)
+    names = history.operation_names
+    lines = [f"Calculations {(page - 1) * page_size + 1}-{(page - 1) * page_size + len(shown)} "
+             f"of {len(positions)} (page {page}/{pages}):"]
+    for position in shown:
+        code, a, b, result = history.values_at(position)
+        lines.append(f"  #{position - first + 1}: {names[code]} {a} {b} = {None if result != result else result}")
+    return lines
@@ -0,0 +1,386 @@
+"""
+Columnar storage for the calculation history.
+
+Instead of one Python object per calculation, the history keeps four parallel
+``array.array`` columns (operation code, operand1, operand2, result) arranged as a
+fixed-capacity ring buffer. Calculation objects are only created when an entry is
+read back.
+
+A query index (see ``app.history_index``) and per-operation statistics (see
+``app.history_summary``) are built on first use and from then on kept up to date by
+every modification.
+"""
+
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.calculation import Calculation, CalculationFactory
+
+_INITIAL_SIZE = 16
+
+
+class CalculationHistory:
+    """
+    Fixed-capacity history of calculations with O(1) append and eviction.
+
+    Once full, appending overwrites the oldest entry. The columns start small and
+    double until they reach the capacity, so short sessions stay small.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        :param capacity: Maximum number of entries kept; older ones are evicted.
+        :raises ValueError: If capacity is not positive.
+        """
+        if capacity < 1:
+            raise ValueError("History capacity must be at least 1.")
+        self._capacity = capacity
+        self._names: List[str] = []
+        self._name_codes: Dict[str, int] = {}
+        size = min(capacity, _INITIAL_SIZE)
+        self._codes = array("B", bytes(size))
+        self._a = array("d", bytes(8 * size))
+        self._b = array("d", bytes(8 * size))
+        self._results = array("d", bytes(8 * size))
+        self._start = 0
+        self._length = 0
+        self._next_position = 0
+        self._restorable = 0
+        # Where the entries restored by app.history_file.restore_loaded came from, if known.
+        self.origins: Optional[List[Tuple[str, int]]] = None
+        # Structures derived from the entries, told about every entry added or removed.
+        self._trackers: list = []
+        self._index = None
+        self._summary = None
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def next_position(self) -> int:
+        """Position the next appended entry will get."""
+        return self._next_position
+
+    @property
+    def operation_names(self) -> List[str]:
+        """Operation names indexed by operation code."""
+        return list(self._names)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("history index out of range")
+        return self._materialize(self._slot(index))
+
+    def __iter__(self) -> Iterator[Calculation]:
+        for i in range(self._length):
+            yield self._materialize(self._slot(i))
+
+    def __contains__(self, calculation) -> bool:
+        return self._find(calculation) is not None
+
+    def append(self, calculation: Calculation) -> None:
+        """
+        Append a calculation, evicting the oldest entry when the history is full.
+        """
+        self.append_values(calculation.__class__.__name__, calculation.a, calculation.b,
+                           getattr(calculation, "result", None))
+
+    def append_values(self, operation: str, a: float, b: float, result: Optional[float]) -> int:
+        """
+        Append a calculation given as plain values, without creating an object.
+
+        Every entry gets a position that counts the entries appended before it, so it
+        can be referred to (e.g. by undo/redo) without holding on to an object.
+
+        :param operation: Registered calculation name.
+        :param a: First operand.
+        :param b: Second operand.
+        :param result: The (rounded) result, or None if not computed.
+        :return: The position of the new entry.
+        """
+        code = self._name_codes.get(operation)
+        if code is None:
+            code = self._code(operation)
+        if result is None:
+            result = float("nan")
+        trackers = self._trackers
+        if self._length < self._capacity:
+            slot = self._start + self._length
+            if slot >= self._capacity:
+                slot -= self._capacity
+            if slot >= len(self._a):
+                self._grow()
+            self._length += 1
+        else:
+            slot = self._start
+            self._start = slot + 1 if slot + 1 < self._capacity else 0
+            for tracker in trackers:
+                tracker.remove_oldest(self._codes[slot], self._results[slot])
+        self._codes[slot] = code
+        self._a[slot] = a
+        self._b[slot] = b
+        self._results[slot] = result
+        self._restorable = 0
+        position = self._next_position
+        self._next_position = position + 1
+        for tracker in trackers:
+            tracker.add_newest(position, code, result)
+        return position
+
+    def pop(self) -> Calculation:
+        """
+        Remove and return the most recent entry.
+
+        The entry's data stays in place until the next append, so it can be put back
+        with ``restore``.
+
+        :raises IndexError: If the history is empty.
+        """
+        if not self._length:
+            raise IndexError("pop from empty history")
+        self._length -= 1
+        self._next_position -= 1
+        self._restorable += 1
+        slot = self._slot(self._length)
+        for tracker in self._trackers:
+            tracker.remove_newest(self._codes[slot], self._results[slot])
+        return self._materialize(slot)
+
+    def restore(self, position: int) -> Calculation:
+        """
+        Put back the most recently popped entry.
+
+        :param position: Position of the popped entry (must be ``next_position``).
+        :return: The restored calculation.
+        :raises IndexError: If that entry has been overwritten or cleared since.
+        """
+        if not self._restorable or position != self._next_position:
+            raise IndexError("History entry can no longer be restored.")
+        self._restorable -= 1
+        self._next_position += 1
+        self._length += 1
+        slot = self._slot(self._length - 1)
+        for tracker in self._trackers:
+            tracker.add_newest(position, self._codes[slot], self._results[slot])
+        return self._materialize(slot)
+
+    def remove(self, calculation) -> None:
+        """
+        Remove the most recent entry equal to ``calculation`` (same operation,
+        operands and result). Searching starts at the newest entry, so removing the
+        last calculation is O(1).
+
+        :raises ValueError: If no such entry exists.
+        """
+        index = self._find(calculation)
+        if index is None:
+            raise ValueError("calculation not in history")
+        for i in range(index, self._length - 1):
+            dst, src = self._slot(i), self._slot(i + 1)
+            self._codes[dst] = self._codes[src]
+            self._a[dst] = self._a[src]
+            self._b[dst] = self._b[src]
+            self._results[dst] = self._results[src]
+        self._length -= 1
+        self._next_position -= 1
+        self._restorable = 0
+        # Positions after the removed entry shift; rebuild the trackers when next needed.
+        self._drop_trackers()
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._start = 0
+        self._length = 0
+        self._restorable = 0
+        self.origins = None
+        self._drop_trackers()
+
+    def load_ring(self, names: List[str], codes, a, b, results, first_position: int, next_position: int,
+                  restorable: int) -> None:
+        """
+        Replace the contents with a saved ring, copying each column in one piece.
+
+        The columns hold ``capacity`` slots; the entry at position ``p`` is in slot
+        ``p % capacity``, so the history's own ring layout is used as is.
+
+        :param names: Operation names indexed by operation code.
+        :param codes: Operation code column (a bytes-like object).
+        :param a: Operand1 column of doubles.
+        :param b: Operand2 column of doubles.
+        :param results: Result column of doubles.
+        :param first_position: Position of the oldest live entry.
+        :param next_position: Position the next appended entry will get.
+        :param restorable: Number of popped entries after the live ones that can be restored (redo).
+        """
+        self._names = list(names)
+        self._name_codes = {name: code for code, name in enumerate(self._names)}
+        for name, data in (("_codes", codes), ("_a", a), ("_b", b), ("_results", results)):
+            column = array(getattr(self, name).typecode)
+            column.frombytes(data)
+            setattr(self, name, column)
+        self._start = first_position % self._capacity
+        self._length = next_position - first_position
+        self._next_position = next_position
+        self._restorable = restorable
+        self._drop_trackers()
+
+    def values_at(self, position: int) -> Tuple[int, float, float, float]:
+        """
+        The stored values of a live entry, without creating a Calculation.
+
+        :param position: Position of the entry, as returned by ``append_values``.
+        :return: Operation code, operand1, operand2 and result (NaN if none).
+        """
+        index = position - self._next_position + self._length
+        if not 0 <= index < self._length:
+            raise IndexError("history position out of range")
+        slot = self._slot(index)
+        return self._codes[slot], self._a[slot], self._b[slot], self._results[slot]
+
+    def index(self):
+        """
+        The query index of this history, built from the current entries on first use.
+
+        :return: A ``HistoryIndex`` that is updated as the history changes.
+        """
+        if self._index is None:
+            from app.history_index import HistoryIndex
+
+            views = self.columns()
+            self._index = HistoryIndex.build(views["operation_code"], views["result"],
+                                             self._next_position - self._length)
+            self._trackers.append(self._index)
+        return self._index
+
+    def summary(self):
+        """
+        Per-operation statistics of this history, computed on first use.
+
+        :return: A ``HistorySummary`` that is updated as the history changes.
+        """
+        if self._summary is None:
+            from app.history_summary import HistorySummary
+
+            self._summary = HistorySummary(self)
+            self._trackers.append(self._summary)
+        return self._summary
+
+    def columns(self) -> Dict[str, memoryview]:
+        """
+        Views of the live entries, oldest first, without copying them.
+
+        If the ring has wrapped around, it is first rotated in place so that the
+        entries are contiguous. The views share memory with the history and change
+        when it is modified.
+        """
+        if self._start + self._length > len(self._a):
+            self._rotate()
+        window = slice(self._start, self._start + self._length)
+        return {
+            "operation_code": memoryview(self._codes)[window],
+            "operand1": memoryview(self._a)[window],
+            "operand2": memoryview(self._b)[window],
+            "result": memoryview(self._results)[window],
+        }
+
+    def snapshot(self) -> "CalculationHistory":
+        """
+        A copy of the live entries that later changes to this history do not affect.
+
+        Unlike ``columns`` this never rotates the ring, so it does not modify the
+        history; the copy's entries start at slot 0 and it has no redoable entries.
+        """
+        copy = CalculationHistory(self._capacity)
+        copy._names = list(self._names)
+        copy._name_codes = dict(self._name_codes)
+        start, stop = self._start, self._start + self._length
+        for name in ("_codes", "_a", "_b", "_results") if self._length else ():
+            column = getattr(self, name)
+            if stop <= len(column):
+                setattr(copy, name, column[start:stop])
+            else:
+                setattr(copy, name, column[start:] + column[:stop - len(column)])
+        copy._length = self._length
+        copy._next_position = self._next_position
+        copy.origins = self.origins
+        return copy
+
+    def to_dataframe(self):
+        """
+        Export the history to a pandas DataFrame without copying the numeric columns.
+
+        :return: DataFrame with operation, operand1, operand2 and result columns.
+        """
+        import numpy as np
+        import pandas as pd
+
+        views = self.columns()
+        codes = np.frombuffer(views["operation_code"], dtype=np.uint8)
+        return pd.DataFrame({
+            "operation": pd.Categorical.from_codes(codes, categories=self._names),
+            "operand1": np.frombuffer(views["operand1"], dtype=np.float64),
+            "operand2": np.frombuffer(views["operand2"], dtype=np.float64),
+            "result": np.frombuffer(views["result"], dtype=np.float64),
+        }, copy=False)
+
+    def _drop_trackers(self) -> None:
+        self._trackers = []
+        self._index = None
+        self._summary = None
+
+    def _slot(self, index: int) -> int:
+        slot = self._start + index
+        return slot - self._capacity if slot >= self._capacity else slot
+
+    def _code(self, operation: str) -> int:
+        code = self._name_codes.get(operation)
+        if code is None:
+            if len(self._names) > 255:
+                raise ValueError("Too many distinct operations in history.")
+            code = len(self._names)
+            self._names.append(operation)
+            self._name_codes[operation] = code
+        return code
+
+    def _grow(self) -> None:
+        # New arrays instead of resizing in place, so previously exported views stay valid.
+        size = min(2 * len(self._a), self._capacity)
+        for name in ("_codes", "_a", "_b", "_results"):
+            column = getattr(self, name)
+            resized = array(column.typecode, bytes(column.itemsize * size))
+            resized[:len(column)] = column
+            setattr(self, name, resized)
+
+    def _rotate(self) -> None:
+        start = self._start
+        for column in (self._codes, self._a, self._b, self._results):
+            # Same-length slice assignment, which is allowed while views are exported.
+            column[:] = column[start:] + column[:start]
+        self._start = 0
+
+    def _find(self, calculation) -> Optional[int]:
+        code = self._name_codes.get(calculation.__class__.__name__)
+        if code is None:
+            return None
+        result = getattr(calculation, "result", None)
+        result = float("nan") if result is None else result
+        for i in range(self._length - 1, -1, -1):
+            slot = self._slot(i)
+            stored = self._results[slot]
+            if (self._codes[slot] == code and self._a[slot] == calculation.a and self._b[slot] == calculation.b
+                    and (stored == result or (stored != stored and result != result))):
+                return i
+        return None
+
+    def _materialize(self, slot: int) -> Calculation:
+        calculation = CalculationFactory.create_calculation(self._names[self._codes[slot]], self._a[slot], self._b[slot])
+        result = self._results[slot]
+        calculation.result = None if result != result else result
+        return calculation
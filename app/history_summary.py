@@ -0,0 +1,219 @@
+"""
+Per-operation statistics over the calculation history.
+
+The ``summary`` command prints, for every operation, the number of calculations and
+the sum, mean, minimum and maximum of their results. The history keeps a
+``HistorySummary`` once the first summary has been requested; it starts from NumPy
+reductions over the history columns and is then updated with every append,
+eviction, undo and redo, so asking again costs O(number of operations). Removing an
+operation's current minimum or maximum marks that operation stale, and only then
+are its results reduced again.
+"""
+
+import csv
+import math
+from typing import Dict, List, Optional, Sequence
+
+SUMMARY_USAGE = "Usage: summary [file]"
+
+
+def reduce_columns(codes, results, operations: int) -> Dict[str, list]:
+    """
+    Aggregate results per operation code with NumPy.
+
+    :param codes: Operation code of every entry.
+    :param results: Result of every entry; NaN (no result) is counted but not aggregated.
+    :param operations: Number of operation codes.
+    :return: Lists indexed by operation code: ``count``, ``results`` (entries with a
+        result), ``sum``, ``min`` and ``max`` (infinite where there are no results).
+    """
+    import numpy as np
+
+    codes = np.asarray(codes, dtype=np.intp)
+    results = np.asarray(results, dtype=np.float64)
+    valid = ~np.isnan(results)
+    valid_codes, valid_results = codes[valid], results[valid]
+    minima = np.full(operations, np.inf)
+    maxima = np.full(operations, -np.inf)
+    np.minimum.at(minima, valid_codes, valid_results)
+    np.maximum.at(maxima, valid_codes, valid_results)
+    return {
+        "count": np.bincount(codes, minlength=operations).tolist(),
+        "results": np.bincount(valid_codes, minlength=operations).tolist(),
+        "sum": np.bincount(valid_codes, weights=valid_results, minlength=operations).tolist(),
+        "min": minima.tolist(),
+        "max": maxima.tolist(),
+    }
+
+
+class HistorySummary:
+    """
+    Running per-operation count, sum, minimum and maximum of a CalculationHistory.
+
+    Counts and sums are updated in O(1). A minimum or maximum can only be updated in
+    O(1) when a result is added; when the current extreme is removed the operation
+    is marked stale and reduced again on the next ``rows`` call.
+    """
+
+    def __init__(self, history):
+        self._history = history
+        self._count: List[int] = []
+        self._results: List[int] = []
+        self._sum: List[float] = []
+        self._min: List[float] = []
+        self._max: List[float] = []
+        self._stale: set = set()
+        self._reduce(None)
+
+    def add_newest(self, position: int, code: int, result: float) -> None:
+        if code >= len(self._count):
+            self._extend(code + 1)
+        self._count[code] += 1
+        if result == result:
+            self._results[code] += 1
+            self._sum[code] += result
+            if result < self._min[code]:
+                self._min[code] = result
+            if result > self._max[code]:
+                self._max[code] = result
+
+    def remove_oldest(self, code: int, result: float) -> None:
+        self._count[code] -= 1
+        if result == result:
+            self._results[code] -= 1
+            if not self._results[code]:
+                self._sum[code], self._min[code], self._max[code] = 0.0, math.inf, -math.inf
+                self._stale.discard(code)
+                return
+            self._sum[code] -= result
+            if result == self._min[code] or result == self._max[code]:
+                self._stale.add(code)
+
+    remove_newest = remove_oldest
+
+    def rows(self) -> List[Dict]:
+        """
+        The statistics of every operation present in the history.
+
+        :return: One record per operation with ``operation``, ``count``, ``sum``,
+            ``mean``, ``min`` and ``max`` (None without results), by operation name.
+        """
+        if self._stale:
+            self._reduce(self._stale)
+        names = self._history.operation_names
+        return _rows(names, self._count, self._results, self._sum, self._min, self._max)
+
+    def _extend(self, size: int) -> None:
+        grow = size - len(self._count)
+        self._count += [0] * grow
+        self._results += [0] * grow
+        self._sum += [0.0] * grow
+        self._min += [math.inf] * grow
+        self._max += [-math.inf] * grow
+
+    def _reduce(self, codes: Optional[set]) -> None:
+        """Reduce the history columns again, for every operation or only for ``codes``."""
+        views = self._history.columns()
+        operations = len(self._history.operation_names)
+        totals = reduce_columns(views["operation_code"], views["result"], operations)
+        self._extend(operations)
+        for code in (range(operations) if codes is None else codes):
+            self._count[code] = totals["count"][code]
+            self._results[code] = totals["results"][code]
+            # Also drops the rounding error accumulated by subtracting evicted results.
+            self._sum[code] = totals["sum"][code]
+            self._min[code] = totals["min"][code]
+            self._max[code] = totals["max"][code]
+        self._stale.clear()
+
+
+def summarize_csv(path: str, encoding: str = "utf-8") -> List[Dict]:
+    """
+    Compute the same statistics from a saved history file.
+
+    Works for full and incremental history files; undo and clear tombstones are
+    applied first.
+
+    :param path: The history CSV (operation, operand1, operand2, result).
+    :param encoding: File encoding.
+    :return: Records as returned by ``HistorySummary.rows``.
+    """
+    from app.autosave import replay_rows
+
+    with open(path, newline="", encoding=encoding) as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return summarize_rows(replay_rows(reader))
+
+
+def summarize_rows(rows: Sequence[Sequence[str]]) -> List[Dict]:
+    """
+    Compute the statistics of history rows as read from a file.
+
+    :param rows: Live rows of operation, operand1, operand2 and result (may be empty).
+    :return: Records as returned by ``HistorySummary.rows``.
+    """
+    names: List[str] = []
+    codes_by_name: Dict[str, int] = {}
+    codes, results = [], []
+    for row in rows:
+        code = codes_by_name.get(row[0])
+        if code is None:
+            code = codes_by_name[row[0]] = len(names)
+            names.append(row[0])
+        codes.append(code)
+        results.append(float(row[3]) if len(row) > 3 and row[3] else math.nan)
+    return summarize_columns(names, codes, results)
+
+
+def summarize_columns(names: Sequence[str], codes, results) -> List[Dict]:
+    """
+    Compute the statistics of history columns, e.g. of a binary history file.
+
+    :param names: Operation names indexed by operation code.
+    :param codes: Operation code of every entry.
+    :param results: Result of every entry (NaN for none).
+    :return: Records as returned by ``HistorySummary.rows``.
+    """
+    totals = reduce_columns(codes, results, len(names))
+    return _rows(names, totals["count"], totals["results"], totals["sum"], totals["min"], totals["max"])
+
+
+def _rows(names: Sequence[str], count, results, sums, minima, maxima) -> List[Dict]:
+    rows = []
+    for code in sorted(range(len(names)), key=names.__getitem__):
+        if not count[code]:
+            continue
+        has_results = results[code] > 0
+        rows.append({
+            "operation": names[code],
+            "count": count[code],
+            "sum": sums[code] if has_results else None,
+            "mean": sums[code] / results[code] if has_results else None,
+            "min": minima[code] if has_results else None,
+            "max": maxima[code] if has_results else None,
+        })
+    return rows
+
+
+def format_summary(rows: List[Dict], precision: int) -> List[str]:
+    """
+    Render summary records as a table.
+
+    :param rows: Records from ``HistorySummary.rows`` or ``summarize_csv``.
+    :param precision: Decimal places of the aggregates.
+    :return: The lines to print.
+    """
+    if not rows:
+        return ["No calculations to summarize."]
+
+    def number(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.{precision}f}"
+
+    lines = [f"{'operation':18} {'count':>8} {'sum':>14} {'mean':>14} {'min':>14} {'max':>14}"]
+    for row in rows:
+        lines.append(f"{row['operation']:18} {row['count']:8d} {number(row['sum']):>14} {number(row['mean']):>14} "
+                     f"{number(row['min']):>14} {number(row['max']):>14}")
+    total = sum(row["count"] for row in rows)
+    lines.append(f"{'total':18} {total:8d}")
+    return lines
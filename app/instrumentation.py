@@ -0,0 +1,162 @@
+"""
+Per-command latency instrumentation.
+
+``process_command`` reports the time spent in each stage of a command (parse,
+dispatch, execute, round, history and every observer's ``update``) to an
+``Instrumentation`` instance, which keeps one histogram per command name and stage.
+Input that is not a registered command is recorded under ``unknown``, so the
+number of histograms stays bounded whatever is typed.
+When instrumentation is disabled no instance exists and the only cost is a
+``None`` check per stage.
+"""
+
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional
+
+_BUCKETS = 64
+# Command name the timings of unrecognised input are recorded under.
+UNKNOWN_COMMAND = "unknown"
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations in nanoseconds with power-of-two buckets.
+
+    Recording is a ``bit_length`` and a list increment; percentiles are estimated
+    from the bucket boundaries, so they are accurate to within a factor of two.
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, ns: int) -> None:
+        self.counts[ns.bit_length()] += 1
+        if ns > self.max:
+            self.max = ns
+        if ns < self.min or not self.count:
+            self.min = ns
+        self.count += 1
+        self.total += ns
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Estimate a percentile in nanoseconds.
+
+        :param fraction: The percentile as a fraction, e.g. 0.99.
+        :return: The geometric middle of the bucket holding it, clamped to min and max.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                low, high = (1 << (bucket - 1) if bucket else 0), (1 << bucket)
+                return min(max(math.sqrt(max(low, 1) * high), self.min), self.max)
+        return float(self.max)  # pragma: no cover
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Instrumentation:
+    """
+    Collects stage timings of the commands processed in a session.
+
+    :param dump_file: File receiving a JSON snapshot every ``dump_interval`` seconds.
+    :param dump_interval: Seconds between snapshots written to ``dump_file``.
+    """
+
+    def __init__(self, dump_file: Optional[str] = None, dump_interval: float = 60.0):
+        self.dump_file = dump_file or None
+        self.dump_interval = dump_interval
+        # command -> stage -> histogram
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.command = ""
+        self._stages: Dict[str, LatencyHistogram] = {}
+        self._start = 0
+        self._mark = 0
+        self._next_dump = time.monotonic() + dump_interval
+
+    def begin(self, command: str, start: int) -> None:
+        """
+        Start timing a command.
+
+        :param command: Name the timings are recorded under.
+        :param start: ``time.perf_counter_ns()`` when the command was received.
+        """
+        self.command = command
+        stages = self.histograms.get(command)
+        if stages is None:
+            stages = self.histograms[command] = {}
+        self._stages = stages
+        self._start = self._mark = start
+        self.lap("parse")
+
+    def lap(self, stage: str) -> None:
+        """Record the time since the previous lap as ``stage`` of the current command."""
+        now = time.perf_counter_ns()
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            histogram = self._stages[stage] = LatencyHistogram()
+        histogram.record(now - self._mark)
+        self._mark = now
+
+    def end(self) -> None:
+        """Record the total time of the current command and write a due snapshot."""
+        self._mark = self._start
+        self.lap("total")
+        if self.dump_file and time.monotonic() >= self._next_dump:
+            self.dump()
+
+    def reset(self) -> None:
+        """Forget every recorded timing."""
+        self.histograms.clear()
+        # Keep collecting the command that is running now, e.g. ``stats reset`` itself.
+        self._stages = self.histograms[self.command] = {}
+
+    def snapshot(self) -> List[Dict]:
+        """
+        Summaries of every histogram, in microseconds.
+
+        :return: One record per command and stage, sorted by command.
+        """
+        rows = []
+        for command, stages in sorted(self.histograms.items()):
+            for stage, h in stages.items():
+                rows.append({"command": command, "stage": stage, "count": h.count,
+                             "mean_us": h.mean() / 1000, "p50_us": h.percentile(0.5) / 1000,
+                             "p99_us": h.percentile(0.99) / 1000, "max_us": h.max / 1000})
+        return rows
+
+    def format_table(self) -> str:
+        """The snapshot as a text table, as printed by the ``stats`` command."""
+        lines = [f"{'command':12} {'stage':28} {'count':>8} {'mean us':>10} {'p50 us':>10} "
+                 f"{'p99 us':>10} {'max us':>10}"]
+        for row in self.snapshot():
+            lines.append(f"{row['command']:12} {row['stage']:28} {row['count']:8d} {row['mean_us']:10.2f} "
+                         f"{row['p50_us']:10.2f} {row['p99_us']:10.2f} {row['max_us']:10.2f}")
+        return "\n".join(lines)
+
+    def dump(self) -> None:
+        """Write the snapshot to ``dump_file``, replacing the previous one atomically."""
+        self._next_dump = time.monotonic() + self.dump_interval
+        if not self.dump_file:
+            return
+        directory = os.path.dirname(self.dump_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.dump_file}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"time": time.time(), "stats": self.snapshot()}, f, indent=2)
+        os.replace(temporary, self.dump_file)
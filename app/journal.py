@@ -0,0 +1,328 @@
+"""
+Append-only write-ahead journal of history events.
+
+Every calculation, undo, redo and clear is appended to a binary journal as a
+fixed-size 32-byte record, so a crash can at most lose the events that were not yet
+committed and never corrupts what is already on disk. A background thread commits
+appended records in groups: everything appended while the previous ``fsync`` was
+running is written and synced together.
+
+On startup the journal is replayed to rebuild the history and the undo/redo stacks,
+and then rewritten to contain only the events needed for that state, so replay time
+stays proportional to the history size rather than to the journal's age.
+
+Record layout (little endian): event type (1 byte), operation code (1 byte),
+6 bytes padding, then either three doubles (operand1, operand2, result) or, for
+``NAME`` records that define an operation code, the operation name in 24 bytes.
+"""
+
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from app.calculation import Calculation
+from app.calculator_memento import MementoManager
+from app.history import HistoryObserver
+from app.history_store import CalculationHistory
+from app.exceptions import FileProcessingError
+
+MAGIC = b"CALCJNL1"
+RECORD_SIZE = 32
+HEADER = MAGIC.ljust(RECORD_SIZE, b"\0")
+
+# Event types; 0 never occurs, so a zero-filled tail ends the replay.
+CALC, UNDO, REDO, CLEAR, NAME = 1, 2, 3, 4, 5
+
+_VALUES = struct.Struct("<BB6xddd")
+_NAME = struct.Struct("<BB6x24s")
+_UNDO_RECORD = _VALUES.pack(UNDO, 0, 0.0, 0.0, 0.0)
+_REDO_RECORD = _VALUES.pack(REDO, 0, 0.0, 0.0, 0.0)
+_CLEAR_RECORD = _VALUES.pack(CLEAR, 0, 0.0, 0.0, 0.0)
+
+
+class Journal:
+    """
+    Appends events to a journal file and commits them on a background thread.
+
+    With ``wait_for_commit`` each append returns only once its record is synced to
+    disk; otherwise appends return immediately and the thread commits at most every
+    ``commit_interval`` seconds, bounding what a crash can lose to that window.
+    """
+
+    def __init__(self, path: str, commit_interval: float = 0.01, wait_for_commit: bool = False):
+        """
+        Open (or create) the journal for appending.
+
+        :param path: The journal file.
+        :param commit_interval: Seconds to collect records before a commit, unless waiting.
+        :param wait_for_commit: Block every append until its record is on disk.
+        :raises FileProcessingError: If the file exists but is not a journal.
+        """
+        self.path = path
+        self.commit_interval = commit_interval
+        self.wait_for_commit = wait_for_commit
+        self._codes: Dict[str, int] = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        size = _prepare_file(path, self._codes)
+        self._file = open(path, "r+b")
+        self._file.seek(size)
+        self._pending = bytearray()
+        self._appended = 0
+        self._committed = 0
+        self.commits = 0
+        self.error: Optional[Exception] = None
+        self._closing = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._thread.start()
+
+    def append_calculation(self, operation: str, a: float, b: float, result: Optional[float]) -> None:
+        code = self._codes.get(operation)
+        record = b""
+        if code is None:
+            encoded = operation.encode("utf-8")
+            if len(encoded) > 24 or len(self._codes) > 255:
+                raise FileProcessingError(f"Cannot journal operation {operation!r}.")
+            code = self._codes[operation] = len(self._codes)
+            record = _NAME.pack(NAME, code, encoded)
+        result = float("nan") if result is None else result
+        self._append(record + _VALUES.pack(CALC, code, a, b, result))
+
+    def append_undo(self) -> None:
+        self._append(_UNDO_RECORD)
+
+    def append_redo(self) -> None:
+        self._append(_REDO_RECORD)
+
+    def append_clear(self) -> None:
+        self._append(_CLEAR_RECORD)
+
+    def flush(self) -> None:
+        """
+        Block until every appended record is on disk.
+
+        :raises FileProcessingError: If a commit failed.
+        """
+        with self._condition:
+            target = self._appended
+            self._condition.notify()
+            while self._committed < target and self.error is None and self._thread.is_alive():
+                self._condition.wait()
+        self._raise_error()
+
+    def close(self) -> None:
+        """
+        Commit the remaining records, stop the writer thread and close the file.
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._thread.join()
+        self._file.close()
+        self._raise_error()
+
+    def _append(self, record: bytes) -> None:
+        with self._condition:
+            self._raise_error()
+            self._pending += record
+            self._appended += 1
+            target = self._appended
+            self._condition.notify()
+            if self.wait_for_commit:
+                while self._committed < target and self.error is None:
+                    self._condition.wait()
+                self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise FileProcessingError(f"Journal write failed: {self.error}")
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._closing:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+            if not self.wait_for_commit and not self._closing:
+                time.sleep(self.commit_interval)
+            with self._condition:
+                data, self._pending = self._pending, bytearray()
+                target = self._appended
+            try:
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception as e:
+                with self._condition:
+                    self.error = e
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self._committed = target
+                self.commits += 1
+                self._condition.notify_all()
+
+
+class JournalObserver(HistoryObserver):
+    """
+    Records every history change in a Journal.
+    """
+
+    def __init__(self, journal: Journal):
+        self.journal = journal
+
+    def update(self, calculation: Calculation) -> None:
+        self.journal.append_calculation(calculation.__class__.__name__, calculation.a, calculation.b,
+                                        getattr(calculation, "result", None))
+
+    def update_values(self, operation: str, a: float, b: float, result: Optional[float]) -> None:
+        self.journal.append_calculation(operation, a, b, result)
+
+    def on_undo(self, calculation: Calculation) -> None:
+        self.journal.append_undo()
+
+    def on_redo(self, calculation: Calculation) -> None:
+        self.journal.append_redo()
+
+    def on_clear(self) -> None:
+        self.journal.append_clear()
+
+    def on_load(self, history: CalculationHistory) -> None:
+        self.journal.append_clear()
+        for calculation in history:
+            self.update(calculation)
+
+    def flush(self) -> None:
+        self.journal.flush()
+
+    def close(self) -> None:
+        self.journal.close()
+
+
+def read_journal(path: str, capacity: int) -> Tuple[List[Tuple[str, float, float, float]], int]:
+    """
+    Replay a journal into the resulting history and redo state.
+
+    Uses the same rules as the history and MementoManager: at most ``capacity`` entries
+    are kept, undo moves the newest entry to the redo stack, redo moves it back, a new
+    calculation empties the redo stack and clear empties both. An incomplete record at
+    the end (e.g. from a crash during a write) and anything after it are ignored.
+
+    :param path: The journal file.
+    :param capacity: History capacity.
+    :return: The live entries followed by the redo stack from top to bottom, as
+        ``(operation, a, b, result)`` tuples, and the size of the redo stack.
+    :raises FileProcessingError: If the file is not a journal.
+    """
+    import numpy as np
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise FileProcessingError(f"{path} is not a history journal.")
+    count = (len(data) - RECORD_SIZE) // RECORD_SIZE
+    records = np.frombuffer(data, dtype=np.dtype([("type", "u1"), ("code", "u1"), ("pad", "V6"),
+                                                  ("a", "<f8"), ("b", "<f8"), ("result", "<f8")]),
+                            count=max(count, 0), offset=RECORD_SIZE)
+    types = records["type"].tolist()
+
+    names: Dict[int, str] = {}
+    live: deque = deque(maxlen=capacity)
+    redo: deque = deque(maxlen=capacity)
+    for i, event in enumerate(types):
+        if event == CALC:
+            live.append(i)
+            if redo:
+                redo.clear()
+        elif event == UNDO:
+            if live:
+                redo.append(live.pop())
+        elif event == REDO:
+            if redo:
+                live.append(redo.pop())
+        elif event == CLEAR:
+            live.clear()
+            redo.clear()
+        elif event == NAME:
+            start = RECORD_SIZE * (i + 1) + 8
+            names[int(records["code"][i])] = data[start:start + 24].rstrip(b"\0").decode("utf-8")
+        else:
+            break
+
+    entries = []
+    for i in list(live) + list(reversed(redo)):
+        record = records[i]
+        entries.append((names[int(record["code"])], float(record["a"]), float(record["b"]),
+                        float(record["result"])))
+    return entries, len(redo)
+
+
+def restore_history(path: str, history: CalculationHistory, memento_manager: MementoManager) -> int:
+    """
+    Rebuild the history and undo/redo stacks from a journal, then rewrite the journal
+    so that it only holds the events needed for the restored state.
+
+    :param path: The journal file; nothing happens if it does not exist.
+    :param history: Empty history to fill.
+    :param memento_manager: Undo/redo manager of ``history``.
+    :return: The number of restored history entries.
+    """
+    if not os.path.exists(path):
+        return 0
+    entries, undone = read_journal(path, history.capacity)
+    for operation, a, b, result in entries:
+        position = history.append_values(operation, a, b, None if result != result else result)
+        memento_manager.save_state(position)
+    for _ in range(undone):
+        memento_manager.undo()
+    _write_checkpoint(path, entries, undone)
+    return len(history)
+
+
+def _write_checkpoint(path: str, entries: List[Tuple[str, float, float, float]], undone: int) -> None:
+    codes: Dict[str, int] = {}
+    out = bytearray(HEADER)
+    for operation, a, b, result in entries:
+        if operation not in codes:
+            codes[operation] = len(codes)
+            out += _NAME.pack(NAME, codes[operation], operation.encode("utf-8"))
+        out += _VALUES.pack(CALC, codes[operation], a, b, result)
+    out += _UNDO_RECORD * undone
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(out)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _prepare_file(path: str, codes: Dict[str, int]) -> int:
+    """
+    Create the journal if needed, drop an incomplete trailing record and load the
+    operation codes already defined.
+
+    :return: The offset at which new records are appended.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, "wb") as f:
+            f.write(HEADER)
+            f.flush()
+            os.fsync(f.fileno())
+        return RECORD_SIZE
+    with open(path, "r+b") as f:
+        data = f.read()
+        if not data.startswith(MAGIC):
+            raise FileProcessingError(f"{path} is not a history journal.")
+        end = RECORD_SIZE
+        while end + RECORD_SIZE <= len(data) and data[end] in (CALC, UNDO, REDO, CLEAR, NAME):
+            if data[end] == NAME:
+                codes[data[end + 8:end + 32].rstrip(b"\0").decode("utf-8")] = data[end + 1]
+            end += RECORD_SIZE
+        if end != len(data):
+            f.truncate(end)
+    return end
@@ -1,34 +1,268 @@
+"""
+Logging setup and the calculation-logging observer.
+
+Log records are not written by the thread that creates them: a ``QueueHandler`` on
+the root logger puts them on a queue, and a listener thread writes them to
+``calculator.log`` in batches, flushing once per batch. The log is rotated by size
+and the rotated files are gzip-compressed on the listener thread. Everything queued
+is written when the process exits.
+"""
+
+import atexit
+import gzip
+import locale
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
+import threading
+from typing import List, Optional, Sequence
 from app import config
 from app.calculation import Calculation
-from app.history import HistoryObserver
-
-# ✅ Ensure the log directory exists before setting up logging
-os.makedirs(config.CALCULATOR_LOG_DIR, exist_ok=True)
+from app.history import CALCULATION, FLUSH, HistoryEvent, HistoryObserver
 
 log_file = os.path.join(config.CALCULATOR_LOG_DIR, "calculator.log")
 
-# ✅ Configure logging once at module level
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format="%(asctime)s - %(message)s"
-)
+LOG_FORMAT = "%(asctime)s - %(message)s"
+MAX_BATCH = 1000
+CALCULATION_MESSAGE = "Calculation performed: %s (%s, %s) = %s"
+# The logger of LoggingObserver, whose records are formatted on the listener thread.
+LOGGER_NAME = "calculator"
+
+_listener: Optional["BatchingQueueListener"] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Size-rotated log file whose archives are gzip-compressed (``calculator.log.1.gz``).
+
+    Records are written without flushing; whoever drives the handler calls
+    ``flush`` once per batch. The file size (in encoded bytes) is tracked instead
+    of asked from the file system for every record.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 0, backup_count: int = 0,
+                 encoding: Optional[str] = None):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding, delay=True)
+        self.namer = lambda name: name + ".gz"
+        self.rotator = _gzip_rotator
+        self._size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        self._byte_encoding = encoding or locale.getpreferredencoding(False)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            message = self.format(record) + self.terminator
+            size = len(message) if message.isascii() else len(message.encode(self._byte_encoding, "replace"))
+            if self.maxBytes and self._size and self._size + size > self.maxBytes:
+                self.doRollover()
+                self._size = 0
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(message)
+            self._size += size
+        except Exception:
+            self.handleError(record)
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class _FlushRequest:
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting of the calculator's records to the listener thread.
+
+    The stock ``prepare`` formats every message in the logging thread. The
+    ``calculator`` logger's records only carry immutable arguments, so they are
+    queued as they are; records of other loggers may carry arguments that change
+    before the listener gets to them, so they are prepared as usual.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.name == LOGGER_NAME:
+            return record
+        return super().prepare(record)
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener that takes up to ``max_batch`` queued records at a time and
+    flushes its handlers once per batch instead of once per record.
+    """
+
+    def __init__(self, record_queue, *handlers, max_batch: int = MAX_BATCH):
+        super().__init__(record_queue, *handlers, respect_handler_level=True)
+        self.max_batch = max_batch
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every record queued so far has been written and flushed.
+
+        :param timeout: Seconds to wait at most.
+        :return: False if the listener did not catch up in time (or is not running).
+        """
+        if self._thread is None:
+            return False
+        request = _FlushRequest()
+        self.queue.put_nowait(request)
+        return request.done.wait(timeout)
+
+    def _monitor(self) -> None:
+        q = self.queue
+        while True:
+            item = q.get()
+            batch, requests = [], []
+            stop = False
+            while True:
+                if item is self._sentinel:
+                    stop = True
+                    break
+                if isinstance(item, _FlushRequest):
+                    requests.append(item)
+                elif isinstance(item, list):
+                    batch.extend(item)  # queued at once by log_records
+                else:
+                    batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+            for record in batch:
+                self.handle(record)
+            for handler in self.handlers:
+                handler.flush()
+            for request in requests:
+                request.done.set()
+            if stop:
+                break
+
+
+def configure_logging() -> None:
+    """
+    Create the log directory and start the asynchronous file logging pipeline.
+    Called once at startup rather than when this module is imported; calling it
+    again restarts the pipeline with the current settings.
+    """
+    global log_file, _listener, _queue_handler
+    shutdown_logging()
+    log_file = os.path.join(config.CALCULATOR_LOG_DIR, "calculator.log")
+    os.makedirs(config.CALCULATOR_LOG_DIR, exist_ok=True)
+
+    file_handler = CompressingRotatingFileHandler(log_file, config.CALCULATOR_LOG_MAX_BYTES,
+                                                  config.CALCULATOR_LOG_BACKUP_COUNT,
+                                                  encoding=config.CALCULATOR_DEFAULT_ENCODING)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    record_queue = queue.SimpleQueue()
+    _listener = BatchingQueueListener(record_queue, file_handler)
+    _queue_handler = _DeferredQueueHandler(record_queue)
+
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(logging.INFO)
+    _listener.start()
+    atexit.unregister(shutdown_logging)
+    atexit.register(shutdown_logging)
+
+
+def flush_logging(timeout: Optional[float] = 5.0) -> None:
+    """
+    Wait until everything logged so far is on disk.
+
+    :param timeout: Seconds to wait at most.
+    """
+    if _listener is not None:
+        _listener.flush(timeout)
+
+
+def log_records(logger: logging.Logger, records: List[logging.LogRecord]) -> None:
+    """
+    Log several records, handing them to the listener thread in one piece when the
+    queue handler is the only handler that would see them.
+
+    :param logger: The logger the records belong to.
+    :param records: The records, e.g. from ``logger.makeRecord``.
+    """
+    if (_queue_handler is not None and not logger.handlers and not logger.filters and logger.propagate
+            and logger.parent is logging.getLogger() and logger.parent.handlers == [_queue_handler]):
+        _queue_handler.queue.put_nowait(records)
+    else:
+        for record in records:
+            logger.handle(record)
+
+
+def shutdown_logging() -> None:
+    """
+    Write out every queued record and stop the logging pipeline.
+    Runs at exit once logging is configured; safe to call more than once.
+    """
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        listener, _listener = _listener, None
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
 
 class LoggingObserver(HistoryObserver):
     """
-    Logs calculations to a file using Python's logging module.
+    Logs calculations through the ``calculator`` logger.
+
+    Formatting and file I/O happen on the logging listener thread, so ``update``
+    only creates a log record and queues it.
     """
 
     def __init__(self, log_file: str = log_file): # pragama: no cover
         self.log_file = log_file  # pragma: no cover
+        self._logger = logging.getLogger(LOGGER_NAME)
 
     def update(self, calc: Calculation) -> None:
         """
-        Log the performed calculation to the log file.
+        Log the performed calculation.
 
         :param calc: The Calculation object with operands and result.
         """
-        message = f"Calculation performed: {calc.__class__.__name__} ({calc.a}, {calc.b}) = {calc.result}"  # pragma: no cover
-        logging.info(message)  # pragma: no cover
+        self.update_values(calc.__class__.__name__, calc.a, calc.b, calc.result)
+
+    def update_values(self, operation: str, a: float, b: float, result: Optional[float]) -> None:
+        self._logger.info(CALCULATION_MESSAGE, operation, a, b, result)
+
+    def update_many(self, events: Sequence[HistoryEvent]) -> None:
+        """
+        Log the calculations of a batch with a single hand-over to the listener thread.
+
+        :param events: The batch; events other than calculations are not logged.
+        """
+        logger = self._logger
+        if logger.isEnabledFor(logging.INFO):
+            records = [logger.makeRecord(logger.name, logging.INFO, __file__, 0, CALCULATION_MESSAGE,
+                                         (event.operation, event.a, event.b, event.result), None)
+                       for event in events if event.kind == CALCULATION]
+            if records:
+                log_records(logger, records)
+        if any(event.kind == FLUSH for event in events):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Wait until the logged calculations have been written.
+        """
+        flush_logging()
+
+    def close(self) -> None:
+        flush_logging()
@@ -0,0 +1,188 @@
+"""
+Multi-core evaluation of very large batches of calculations.
+
+The operands, results and error flags live in ``multiprocessing.shared_memory``
+blocks. The batch is split into shards and a process pool evaluates them with
+``CalculationFactory.evaluate_many`` — the same NumPy kernels as the registered
+calculations — each worker attaching to the blocks by name and writing its shard's
+results in place. Only the block names and shard bounds are sent to the workers;
+no operand data is pickled.
+
+``SharedOperands`` lets a caller fill the operand buffers directly and read the
+results without any copy; ``evaluate_parallel`` wraps it for ordinary arrays.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+from app.calculation import CalculationFactory
+import app.calculation_operations  # Ensures all @register_calculation decorators run
+import app.config as config
+
+# Shards per worker, so a slow shard does not leave the other workers idle.
+SHARDS_PER_WORKER = 4
+# Smallest shard worth sending to another process.
+MIN_SHARD_SIZE = 65_536
+
+_COLUMNS = (("a", "float64"), ("b", "float64"), ("results", "float64"), ("errors", "bool"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+def default_workers() -> int:
+    """The number of worker processes from CALCULATOR_BULK_WORKERS (0 means one per CPU)."""
+    return config.CALCULATOR_BULK_WORKERS or os.cpu_count() or 1
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """The shared process pool, recreated if a different number of workers is asked for."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes; the next parallel evaluation starts new ones."""
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+        _pool_workers = 0
+
+
+def _views(blocks: List[shared_memory.SharedMemory], size: int) -> list:
+    import numpy as np
+
+    return [np.ndarray((size,), dtype=dtype, buffer=block.buf) for block, (_, dtype) in zip(blocks, _COLUMNS)]
+
+
+def _evaluate_shard(names: List[str], size: int, calculation_name: str, start: int, stop: int,
+                    precision: int) -> int:
+    """Worker side: evaluate rows ``start:stop`` of the shared buffers in place."""
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        a, b, results, errors = _views(blocks, size)
+        results[start:stop], errors[start:stop] = CalculationFactory.evaluate_many(
+            calculation_name, a[start:stop], b[start:stop], precision)
+        failed = int(errors[start:stop].sum())
+        # The views must be gone before the blocks can be closed.
+        del a, b, results, errors
+        return failed
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class SharedOperands:
+    """
+    Operand, result and error buffers of a batch in shared memory.
+
+    ``a`` and ``b`` are writable NumPy arrays to fill before calling ``evaluate``;
+    ``results`` and ``errors`` hold the output afterwards. The arrays are only valid
+    until ``close``; copy what should outlive it.
+    """
+
+    def __init__(self, size: int):
+        """
+        :param size: Number of operand pairs.
+        """
+        self.size = size
+        self._blocks: List[shared_memory.SharedMemory] = []
+        try:
+            for _, dtype in _COLUMNS:
+                itemsize = 1 if dtype == "bool" else 8
+                self._blocks.append(shared_memory.SharedMemory(create=True, size=max(1, size * itemsize)))
+        except BaseException:
+            self._release()
+            raise
+        self.a, self.b, self.results, self.errors = _views(self._blocks, size)
+
+    def evaluate(self, calculation_name: str, workers: Optional[int] = None, shard_size: Optional[int] = None,
+                 precision: Optional[int] = None) -> int:
+        """
+        Evaluate a registered calculation over the buffers with a pool of processes.
+
+        :param calculation_name: Name of the registered class.
+        :param workers: Number of processes (defaults to CALCULATOR_BULK_WORKERS).
+        :param shard_size: Rows per task (by default the batch is split into
+            SHARDS_PER_WORKER shards per worker, of at least MIN_SHARD_SIZE rows).
+        :param precision: Decimal places to round to (defaults to CALCULATOR_PRECISION).
+        :return: The number of rows that failed.
+        :raises ValueError: If calculation_name is not registered.
+        """
+        if calculation_name not in CalculationFactory.registered():
+            raise ValueError(f"Calculation {calculation_name} is not registered.")
+        if precision is None:
+            precision = config.CALCULATOR_PRECISION
+        workers = workers or default_workers()
+        if shard_size is None:
+            shard_size = max(MIN_SHARD_SIZE, -(-self.size // (workers * SHARDS_PER_WORKER)))
+        if workers == 1 or self.size <= shard_size:
+            # Not worth a round trip to the pool.
+            self.results[:], self.errors[:] = CalculationFactory.evaluate_many(
+                calculation_name, self.a, self.b, precision)
+            return int(self.errors.sum())
+
+        pool = _get_pool(workers)
+        names = [block.name for block in self._blocks]
+        futures = [pool.submit(_evaluate_shard, names, self.size, calculation_name, start,
+                               min(start + shard_size, self.size), precision)
+                   for start in range(0, self.size, shard_size)]
+        return sum(future.result() for future in futures)
+
+    def close(self) -> None:
+        """
+        Free the shared memory.
+        """
+        self.a = self.b = self.results = self.errors = None
+        self._release()
+
+    def _release(self) -> None:
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedOperands":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def evaluate_parallel(calculation_name: str, a, b, workers: Optional[int] = None,
+                      shard_size: Optional[int] = None, precision: Optional[int] = None) -> Tuple:
+    """
+    Like ``CalculationFactory.evaluate_many``, spread over several processes.
+
+    The operands are copied into shared memory once and the results copied out once;
+    use ``SharedOperands`` directly to avoid both copies.
+
+    :param calculation_name: Name of the registered class.
+    :param a: Array-like of first operands.
+    :param b: Array-like of second operands.
+    :param workers: Number of processes (defaults to CALCULATOR_BULK_WORKERS).
+    :param shard_size: Rows per task (see ``SharedOperands.evaluate``).
+    :param precision: Decimal places to round to (defaults to CALCULATOR_PRECISION).
+    :return: Tuple of (results, errors); results of failed rows are NaN.
+    :raises ValueError: If calculation_name is not registered.
+    """
+    import numpy as np
+
+    if calculation_name not in CalculationFactory.registered():
+        raise ValueError(f"Calculation {calculation_name} is not registered.")
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    workers = workers or default_workers()
+    if workers == 1 or a.size <= (shard_size or MIN_SHARD_SIZE):
+        return CalculationFactory.evaluate_many(calculation_name, a, b, precision)
+
+    with SharedOperands(a.size) as shared:
+        shared.a[:] = a.ravel()
+        shared.b[:] = b.ravel()
+        shared.evaluate(calculation_name, workers, shard_size, precision)
+        return shared.results.reshape(a.shape).copy(), shared.errors.reshape(a.shape).copy()
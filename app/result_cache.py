@@ -0,0 +1,86 @@
+"""
+Memoizing cache for calculation results.
+
+Every registered operation is a pure function of its operands, so the result of a
+repeated ``(operation, a, b)`` can be reused instead of creating and executing a new
+calculation. Errors (e.g. division by zero) are cached as well and raised again on
+every later lookup.
+"""
+
+import math
+from collections import OrderedDict
+from typing import Dict, Optional
+from app.calculation import Calculation, CalculationFactory
+
+
+class ResultCache:
+    """
+    Bounded least-recently-used cache of raw (unrounded) calculation results.
+    """
+
+    def __init__(self, maxsize: int):
+        """
+        :param maxsize: Maximum number of cached entries; the least recently used
+            entry is evicted when it is exceeded.
+        :raises ValueError: If maxsize is not positive.
+        """
+        if maxsize < 1:
+            raise ValueError("Result cache size must be at least 1.")
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def evaluate(self, operation: str, a: float, b: float, calculation: Optional[Calculation] = None) -> float:
+        """
+        Return the result of a registered calculation, computing it on a miss.
+
+        :param operation: Registered calculation name.
+        :param a: First operand.
+        :param b: Second operand.
+        :param calculation: Already created calculation for these operands, executed on
+            a miss; without one the operation's scalar function is called.
+        :return: The unrounded result.
+        :raises ValueError: If the operation is not registered (never cached).
+        :raises Exception: Whatever the calculation raised, also on cache hits.
+        """
+        key = _key(operation, a, b)
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            self.hits += 1
+            value = entries[key]
+        else:
+            self.misses += 1
+            function = CalculationFactory.scalar_function(operation) if calculation is None else None
+            try:
+                value = calculation.execute() if function is None else function(a, b)
+            except Exception as e:
+                value = e
+            entries[key] = value
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+                self.evictions += 1
+        if isinstance(value, Exception):
+            raise value.with_traceback(None)
+        return value
+
+    def clear(self) -> None:
+        """Drop every entry; the counters are kept."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters plus the current and maximum size."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._entries), "maxsize": self.maxsize}
+
+
+def _key(operation: str, a: float, b: float) -> tuple:
+    # 0.0 == -0.0, but results can differ in sign (e.g. add), so keep them apart.
+    if a == 0 or b == 0:
+        return operation, a, b, math.copysign(1.0, a), math.copysign(1.0, b)
+    return operation, a, b
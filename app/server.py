@@ -0,0 +1,164 @@
+"""
+Asyncio TCP server exposing the calculator to many concurrent clients.
+
+Each connection is an independent calculator session with its own history and
+undo/redo state. Clients send one command per line, either as plain text exactly as
+typed in the REPL (the response is the REPL's output followed by an empty line) or
+as a JSON object ``{"id": ..., "command": "add 1 2"}`` (the response is one JSON
+line ``{"id": ..., "output": "Result: 3.0"}``). The empty line ends every
+plain-text response, including the empty response to a blank request line, and
+never occurs inside one, so a client reads lines until the empty one whether the
+command printed one line or many (e.g. ``help``). Both forms can be mixed and
+pipelined: every complete line received in one read is processed and the
+responses are sent back in a single write.
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+from typing import List, Optional
+from app.calculator import create_result_cache, process_command
+from app.calculator_memento import MementoManager
+from app.history_store import CalculationHistory
+from app.result_cache import ResultCache
+import app.config as config
+
+READ_SIZE = 1 << 16
+MAX_LINE_LENGTH = 1 << 16
+
+# Commands (or command forms) that act on the server's files rather than the session.
+UNAVAILABLE_COMMANDS = {"save", "load", "summary file"}
+
+
+class Session:
+    """
+    State of one connection: its history and undo/redo stacks.
+    """
+
+    __slots__ = ("history", "memento_manager", "cache", "open")
+
+    def __init__(self, cache: Optional[ResultCache] = None):
+        self.history = CalculationHistory(config.CALCULATOR_MAX_HISTORY_SIZE)
+        self.memento_manager = MementoManager(self.history)
+        self.cache = cache
+        self.open = True
+
+    def execute(self, command: str) -> str:
+        """
+        Run one command and return what the REPL would have printed.
+
+        :param command: The command line, without its line terminator.
+        :return: The command output, one line per printed line.
+        """
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            self._run(command)
+        return buffer.getvalue()
+
+    def _run(self, command: str) -> None:
+        words = command.lower().split()
+        for name in (words[:1], words[:2]):
+            if name and " ".join(name) in UNAVAILABLE_COMMANDS:
+                print(f"Command not available over the network: {' '.join(name)}")
+                return
+        try:
+            if not process_command(command, self.history, [], self.memento_manager, self.cache):
+                self.open = False
+        except Exception as e:
+            print(f"An error occurred: {e}")
+
+    def respond(self, line: str) -> str:
+        """
+        Run a request line in either protocol and build its response.
+
+        :param line: A plain-text command or a JSON request object.
+        :return: The text to send back: a JSON line, or the output lines followed by an empty line.
+        """
+        if not line.lstrip().startswith("{"):
+            output = self.execute(line)
+            return "".join(text + "\n" for text in output.splitlines() if text.strip()) + "\n"
+        try:
+            request = json.loads(line)
+            command = request["command"]
+            if not isinstance(command, str):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            return json.dumps({"error": "Invalid request: expected {\"command\": \"...\"}."}) + "\n"
+        output = self.execute(command)
+        return json.dumps({"id": request.get("id"), "output": output.rstrip("\n")}) + "\n"
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            cache: Optional[ResultCache] = None) -> None:
+    """
+    Serve one client until it sends ``exit`` or disconnects.
+
+    :param reader: Stream of the client's requests.
+    :param writer: Stream receiving the responses.
+    :param cache: Result cache shared by all sessions, or None.
+    """
+    session = Session(cache)
+    pending = b""
+    try:
+        while session.open:
+            data = await reader.read(READ_SIZE)
+            if not data:
+                break
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            if len(pending) > MAX_LINE_LENGTH:
+                writer.write(b"Request line too long.\n\n")
+                break
+            responses: List[str] = []
+            for line in lines:
+                responses.append(session.respond(line.decode(config.CALCULATOR_DEFAULT_ENCODING, "replace")))
+                if not session.open:
+                    break
+            writer.write("".join(responses).encode(config.CALCULATOR_DEFAULT_ENCODING))
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+
+
+async def start_server(host: str, port: int, cache: Optional[ResultCache] = None) -> asyncio.AbstractServer:
+    """
+    Start listening for clients.
+
+    :param host: Interface to bind to.
+    :param port: Port to bind to (0 picks a free one).
+    :param cache: Result cache shared by all sessions, or None.
+    :return: The running server.
+    """
+    async def handler(reader, writer):
+        await handle_connection(reader, writer, cache)
+
+    return await asyncio.start_server(handler, host, port, limit=MAX_LINE_LENGTH, backlog=4096)
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None) -> None:
+    """
+    Run the server until interrupted.
+
+    :param host: Interface to bind to (defaults to CALCULATOR_SERVER_HOST).
+    :param port: Port to bind to (defaults to CALCULATOR_SERVER_PORT).
+    """
+    host = host or config.CALCULATOR_SERVER_HOST
+    port = config.CALCULATOR_SERVER_PORT if port is None else port
+    cache = create_result_cache()
+
+    async def run():
+        server = await start_server(host, port, cache)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Calculator server listening on {addresses}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
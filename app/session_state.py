@@ -0,0 +1,218 @@
+"""
+Undo/redo state kept on disk between sessions.
+
+The session file mirrors the in-memory history: a header with the positions of the
+oldest live entry, the next entry and the number of redoable entries, a table of
+operation names, and one column each for operation codes, operands and results
+with ``capacity`` slots. The entry at position ``p`` is stored in slot
+``p % capacity`` — the same ring layout the history uses — so::
+
+    append  writes one slot of each column and the header
+    undo    moves ``next`` down and ``redo`` up (header only)
+    redo    the opposite
+    clear   moves ``first`` up to ``next``
+
+Every change is a few ``pwrite`` calls of fixed size. Loading copies the columns
+into the history in one piece each, and the undo and redo stacks are restored as
+position ranges, so a session with 100k entries can undo right after startup.
+"""
+
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional
+from app import config
+from app.calculation import Calculation
+from app.calculator_memento import MementoManager
+from app.history import HistoryObserver
+from app.history_store import CalculationHistory
+
+MAGIC = b"CALCSES1"
+_HEADER = struct.Struct("<8sqqqqq")  # magic, capacity, first, next, redo, name count
+_STATE = struct.Struct("<qqq")  # first, next, redo
+_STATE_OFFSET = 16
+_NAMES_OFFSET = 64
+_NAME_SIZE = 24
+_MAX_NAMES = 256
+_COLUMNS_OFFSET = _NAMES_OFFSET + _MAX_NAMES * _NAME_SIZE
+_DOUBLE = struct.Struct("<d")
+
+
+def _layout(capacity: int) -> Dict[str, int]:
+    """Byte offsets of the columns (and the file size) for a capacity."""
+    a = _COLUMNS_OFFSET + (capacity + 7) // 8 * 8
+    return {"codes": _COLUMNS_OFFSET, "a": a, "b": a + 8 * capacity,
+            "results": a + 16 * capacity, "size": a + 24 * capacity}
+
+
+class SessionStateObserver(HistoryObserver):
+    """
+    Keeps the session file in step with the history and its undo/redo stacks.
+    """
+
+    def __init__(self, history: CalculationHistory, path: Optional[str] = None):
+        """
+        Open the session file; if it does not describe ``history`` (e.g. it is missing
+        or the history was restored from elsewhere), write the history to it.
+
+        :param history: The session's calculation history.
+        :param path: The session file (defaults to CALCULATOR_SESSION_FILE).
+        """
+        self.path = path or config.CALCULATOR_SESSION_FILE
+        self.capacity = history.capacity
+        self._layout = _layout(self.capacity)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._codes: Dict[str, int] = {}
+        header = _read_header(self._fd)
+        first = history.next_position - len(history)
+        if (header is not None and header["capacity"] == self.capacity
+                and (header["first"], header["next"]) == (first, history.next_position)):
+            self.first, self.next, self.redo = header["first"], header["next"], header["redo"]
+            names = _read_names(self._fd, header["names"])
+            self._codes = {name: code for code, name in enumerate(names)}
+        else:
+            self._write_snapshot(history)
+
+    def update(self, calculation: Calculation) -> None:
+        self.update_values(calculation.__class__.__name__, calculation.a, calculation.b,
+                           getattr(calculation, "result", None))
+
+    def update_values(self, operation: str, a: float, b: float, result: Optional[float]) -> None:
+        self._write_entry(self.next, self._code(operation), a, b, float("nan") if result is None else result)
+        self.next += 1
+        if self.next - self.first > self.capacity:
+            self.first = self.next - self.capacity
+        self.redo = 0
+        self._write_state()
+
+    def on_undo(self, calculation: Calculation) -> None:
+        self.next -= 1
+        self.redo += 1
+        self._write_state()
+
+    def on_redo(self, calculation: Calculation) -> None:
+        self.next += 1
+        self.redo -= 1
+        self._write_state()
+
+    def on_clear(self) -> None:
+        self.first = self.next
+        self.redo = 0
+        self._write_state()
+
+    def on_load(self, history: CalculationHistory) -> None:
+        self._write_snapshot(history)
+
+    def flush(self) -> None:
+        os.fsync(self._fd)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.fsync(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+    def _code(self, operation: str) -> int:
+        code = self._codes.get(operation)
+        if code is None:
+            code = len(self._codes)
+            if code >= _MAX_NAMES:
+                raise ValueError("Too many distinct operations in history.")
+            self._codes[operation] = code
+            os.pwrite(self._fd, operation.encode("utf-8")[:_NAME_SIZE].ljust(_NAME_SIZE, b"\0"),
+                      _NAMES_OFFSET + code * _NAME_SIZE)
+            os.pwrite(self._fd, struct.pack("<q", len(self._codes)), _HEADER.size - 8)
+        return code
+
+    def _write_entry(self, position: int, code: int, a: float, b: float, result: float) -> None:
+        slot = position % self.capacity
+        layout = self._layout
+        os.pwrite(self._fd, bytes((code,)), layout["codes"] + slot)
+        os.pwrite(self._fd, _DOUBLE.pack(a), layout["a"] + 8 * slot)
+        os.pwrite(self._fd, _DOUBLE.pack(b), layout["b"] + 8 * slot)
+        os.pwrite(self._fd, _DOUBLE.pack(result), layout["results"] + 8 * slot)
+
+    def _write_state(self) -> None:
+        os.pwrite(self._fd, _STATE.pack(self.first, self.next, self.redo), _STATE_OFFSET)
+
+    def _write_snapshot(self, history: CalculationHistory) -> None:
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, self._layout["size"])
+        self.first = history.next_position - len(history)
+        self.next = history.next_position
+        self.redo = 0
+        os.pwrite(self._fd, _HEADER.pack(MAGIC, self.capacity, self.first, self.next, 0, 0), 0)
+        self._codes = {}
+        for name in history.operation_names:
+            self._code(name)
+        if not len(history):
+            return
+        # The history's codes are valid here since its name table was copied; each
+        # column is written with one call.
+        import numpy as np
+
+        slots = np.arange(self.first, self.next) % self.capacity
+        views = history.columns()
+        for column, name, dtype in (("operation_code", "codes", np.uint8), ("operand1", "a", np.float64),
+                                    ("operand2", "b", np.float64), ("result", "results", np.float64)):
+            ring = np.zeros(self.capacity, dtype=dtype)
+            ring[slots] = np.frombuffer(views[column], dtype=dtype)
+            os.pwrite(self._fd, ring.tobytes(), self._layout[name])
+
+
+def _read_header(fd: int) -> Optional[Dict[str, int]]:
+    data = os.pread(fd, _HEADER.size, 0)
+    if len(data) < _HEADER.size:
+        return None
+    magic, capacity, first, next_position, redo, names = _HEADER.unpack(data)
+    if magic != MAGIC or os.fstat(fd).st_size < _layout(capacity)["size"]:
+        return None
+    return {"capacity": capacity, "first": first, "next": next_position, "redo": redo, "names": names}
+
+
+def _read_names(fd: int, count: int) -> List[str]:
+    data = os.pread(fd, count * _NAME_SIZE, _NAMES_OFFSET)
+    return [data[i:i + _NAME_SIZE].rstrip(b"\0").decode("utf-8") for i in range(0, len(data), _NAME_SIZE)]
+
+
+def load_session_state(path: str, history: CalculationHistory, memento_manager: MementoManager) -> int:
+    """
+    Restore the history and its undo/redo stacks from a session file.
+
+    With the same capacity the columns are copied into the history as they are and
+    the stacks become position ranges. If the capacity changed, the newest live
+    entries are appended one by one instead and the redo stack is dropped.
+
+    :param path: The session file; nothing happens if it is missing or not a session file.
+    :param history: Empty history to fill.
+    :param memento_manager: Undo/redo manager of ``history``.
+    :return: The number of restored history entries.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        header = _read_header(f.fileno())
+        if header is None:
+            return 0
+        names = _read_names(f.fileno(), header["names"])
+        capacity, first, next_position = header["capacity"], header["first"], header["next"]
+        layout = _layout(capacity)
+        with mmap.mmap(f.fileno(), layout["size"], access=mmap.ACCESS_READ) as data:
+            if capacity == history.capacity:
+                columns = {name: data[layout[name]:layout[name] + (1 if name == "codes" else 8) * capacity]
+                           for name in ("codes", "a", "b", "results")}
+                history.load_ring(names, columns["codes"], columns["a"], columns["b"], columns["results"],
+                                  first, next_position, header["redo"])
+                memento_manager.restore(range(first, next_position),
+                                        range(next_position + header["redo"] - 1, next_position - 1, -1))
+                return len(history)
+            for position in range(max(first, next_position - history.capacity), next_position):
+                slot = position % capacity
+                result = _DOUBLE.unpack_from(data, layout["results"] + 8 * slot)[0]
+                memento_manager.save_state(history.append_values(
+                    names[data[layout["codes"] + slot]], _DOUBLE.unpack_from(data, layout["a"] + 8 * slot)[0],
+                    _DOUBLE.unpack_from(data, layout["b"] + 8 * slot)[0], None if result != result else result))
+    return len(history)
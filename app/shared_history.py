@@ -0,0 +1,322 @@
+"""
+History file shared by several calculator processes.
+
+With ``CALCULATOR_AUTO_SAVE_MODE=shared`` no process rewrites the history file.
+Every process appends its own rows, tagged with a session id and a per-session
+sequence number, to one CSV file::
+
+    session,sequence,operation,operand1,operand2,result
+
+Rows are collected by a BackgroundWriter and each batch is appended with a single
+``write`` on an ``O_APPEND`` descriptor while holding an exclusive ``flock``. The
+lock is held for that one system call only (no reads, no fsync), and a busy process
+writes one batch per lock acquisition rather than one row, so writers do not queue
+up behind each other. Readers hold a shared lock while they read the file, which
+only ever contains complete batches.
+
+The file is never rewritten by appends, so each process compacts it after every
+``CALCULATOR_AUTO_SAVE_COMPACT_THRESHOLD`` rows it has appended: under the exclusive
+lock it merges the file (see below) and, if enough rows are dead, writes the live
+rows to a new file that replaces the old one. Rows keep their session and sequence
+number, so undo rows written later still find their targets. A writer that finds the
+file replaced after taking the lock reopens it before appending.
+
+Undo and clear are written as ``__undo__`` / ``__clear__`` rows. A clear applies to
+its own session only. An undo row names the row it undoes by session and sequence
+number (in the operand columns), since after ``load`` the undone calculation may
+have been appended by another session; undo rows without a target remove their own
+session's newest row. ``merge_shared_history`` replays every session in one pass and
+merges the live rows in the order they were appended.
+"""
+
+import csv
+import io
+import os
+import uuid
+from collections import deque
+from itertools import compress
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+from app import config
+from app.autosave import BackgroundWriter, CLEAR_MARKER, UNDO_MARKER
+from app.calculation import Calculation
+from app.history import HistoryObserver
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows; appends still use a single O_APPEND write
+    fcntl = None
+
+SHARED_FIELDNAMES = ["session", "sequence", "operation", "operand1", "operand2", "result"]
+
+
+def new_session_id() -> str:
+    """A session id that is unique across processes and hosts."""
+    return f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+
+
+class SharedHistoryObserver(HistoryObserver):
+    """
+    Appends this session's calculations, undos and clears to the shared history file.
+    """
+
+    def __init__(self, output_file: Optional[str] = None, session: Optional[str] = None,
+                 background: Optional[bool] = None, max_rows: Optional[int] = None,
+                 compact_threshold: Optional[int] = None):
+        """
+        :param output_file: The shared history CSV (defaults to CALCULATOR_SHARED_HISTORY_FILE).
+        :param session: Session id written with every row (a new unique one by default).
+        :param background: Write on a background thread (defaults to CALCULATOR_AUTO_SAVE_BACKGROUND).
+        :param max_rows: Size of the history (defaults to CALCULATOR_MAX_HISTORY_SIZE).
+        :param compact_threshold: Rows appended between compactions (defaults to
+            CALCULATOR_AUTO_SAVE_COMPACT_THRESHOLD).
+        """
+        self.output_file = output_file or config.CALCULATOR_SHARED_HISTORY_FILE
+        self.session = session or new_session_id()
+        self.sequence = 0
+        self.max_rows = max_rows or config.CALCULATOR_MAX_HISTORY_SIZE
+        self.compact_threshold = (compact_threshold if compact_threshold is not None
+                                  else config.CALCULATOR_AUTO_SAVE_COMPACT_THRESHOLD)
+        # (session, sequence) of each history entry, oldest first, for targeted undo rows.
+        self._origins: Deque[Tuple[str, int]] = deque(maxlen=self.max_rows)
+        self.lock_acquisitions = 0
+        self.compactions = 0
+        self._appended = 0
+        self._fd: Optional[int] = None
+        if background is None:
+            background = config.CALCULATOR_AUTO_SAVE_BACKGROUND
+        self.writer = BackgroundWriter(self._write_rows, name="shared-history-writer") if background else None
+
+    def update(self, calculation: Calculation) -> None:
+        """
+        Append the new calculation to the shared file.
+
+        :param calculation: The most recent Calculation.
+        """
+        self.update_values(calculation.__class__.__name__, calculation.a, calculation.b,
+                           getattr(calculation, "result", None))
+
+    def update_values(self, operation: str, a: float, b: float, result: Optional[float]) -> None:
+        self._origins.append((self.session, self._submit(operation, a, b, result)))
+
+    def on_undo(self, calculation: Calculation) -> None:
+        if self._origins:
+            session, sequence = self._origins.pop()
+            self._submit(UNDO_MARKER, session, sequence, "")
+        else:
+            self._submit(UNDO_MARKER, "", "", "")
+
+    def on_redo(self, calculation: Calculation) -> None:
+        self.update(calculation)
+
+    def on_clear(self) -> None:
+        self._submit(CLEAR_MARKER, "", "", "")
+        self._origins.clear()
+
+    def on_load(self, history: Sequence[Calculation]) -> None:
+        """
+        Take over the origins of the loaded rows (see ``restore_loaded``), so that
+        undoing one of them removes it from the shared history.
+        """
+        self._origins.clear()
+        self._origins.extend(getattr(history, "origins", None) or ())
+
+    def flush(self) -> None:
+        """
+        Wait until every submitted row has been appended.
+        """
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self) -> None:
+        """
+        Append pending rows and close the file.
+        """
+        if self.writer is not None:
+            self.writer.close()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _submit(self, operation: str, a, b, result) -> int:
+        self.sequence += 1
+        row = [self.session, self.sequence, operation, a, b, "" if result is None else result]
+        if self.writer is not None:
+            self.writer.put(row)
+        else:
+            self._write_rows([row])
+        return self.sequence
+
+    def _write_rows(self, rows: List[List]) -> None:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        data = buffer.getvalue().encode(config.CALCULATOR_DEFAULT_ENCODING)
+        self._lock_file()
+        try:
+            self.lock_acquisitions += 1
+            if os.fstat(self._fd).st_size == 0:
+                data = (",".join(SHARED_FIELDNAMES) + "\r\n").encode() + data
+            _write_all(self._fd, data)
+            self._appended += len(rows)
+            if self._appended >= self.compact_threshold:
+                self._appended = 0
+                self._compact_locked()
+        finally:
+            _unlock(self._fd)
+
+    def compact(self) -> bool:
+        """
+        Rewrite the shared file with only the live rows, if at least half of it is dead.
+        Runs synchronously; the writer does this every ``compact_threshold`` rows.
+
+        :return: True if the file was rewritten.
+        """
+        self._lock_file()
+        try:
+            return self._compact_locked()
+        finally:
+            _unlock(self._fd)
+
+    def _lock_file(self) -> None:
+        # Take the exclusive lock on the file currently at output_file; a compaction
+        # by another process may have replaced the one we had open.
+        while True:
+            if self._fd is None:
+                output_dir = os.path.dirname(self.output_file)
+                if output_dir:
+                    os.makedirs(output_dir, exist_ok=True)
+                self._fd = os.open(self.output_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            _lock(self._fd, exclusive=True)
+            try:
+                current = os.stat(self.output_file).st_ino == os.fstat(self._fd).st_ino
+            except FileNotFoundError:
+                current = False
+            if current:
+                return
+            _unlock(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+    def _compact_locked(self) -> bool:
+        with open(self.output_file, "rb") as f:
+            rows = _parse_rows(f.read())
+        live = _merge_rows(rows, self.max_rows)
+        if 2 * len(live) > len(rows):
+            return False
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(SHARED_FIELDNAMES)
+        writer.writerows(live)
+        tmp_file = self.output_file + ".tmp"
+        with open(tmp_file, "wb") as out:
+            out.write(buffer.getvalue().encode(config.CALCULATOR_DEFAULT_ENCODING))
+        # Writers waiting for our lock notice the new file and reopen it.
+        os.replace(tmp_file, self.output_file)
+        old_fd, self._fd = self._fd, os.open(self.output_file, os.O_WRONLY | os.O_APPEND, 0o644)
+        _unlock(old_fd)
+        os.close(old_fd)
+        _lock(self._fd, exclusive=True)
+        self.compactions += 1
+        return True
+
+
+def _lock(fd: int, exclusive: bool) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _parse_rows(data: bytes) -> List[List[str]]:
+    rows = csv.reader(io.StringIO(data.decode(config.CALCULATOR_DEFAULT_ENCODING), newline=""))
+    next(rows, None)
+    return [row for row in rows if len(row) == len(SHARED_FIELDNAMES)]
+
+
+def read_shared_rows(path: str) -> List[List[str]]:
+    """
+    Read every complete row of a shared history file.
+
+    :param path: The shared history CSV.
+    :return: The rows without the header, in file order.
+    """
+    with open(path, "rb") as f:
+        _lock(f.fileno(), exclusive=False)
+        try:
+            data = f.read()
+        finally:
+            _unlock(f.fileno())
+    return _parse_rows(data)
+
+
+def merge_shared_history(path: str, max_rows: Optional[int] = None) -> List[List[str]]:
+    """
+    Merge the histories of every session in a shared history file.
+
+    Each session's clear rows are applied to that session's rows and undo rows to the
+    row they name (or to the session's newest row if they name none); rows whose
+    sequence number is not above the last one seen for their session (duplicates) are
+    skipped. The live rows of all sessions are then taken in file order, in one pass
+    over the file and one over a keep-mask instead of sorting.
+
+    :param path: The shared history CSV.
+    :param max_rows: Keep at most this many rows per session and in the result.
+    :return: The live rows (session, sequence, operation, operand1, operand2, result), oldest first.
+    """
+    return _merge_rows(read_shared_rows(path), max_rows)
+
+
+def _merge_rows(rows: List[List[str]], max_rows: Optional[int]) -> List[List[str]]:
+    live: Dict[str, Deque[int]] = {}
+    last_sequence: Dict[str, int] = {}
+    index_of: Dict[Tuple[str, str], int] = {}
+    for index, row in enumerate(rows):
+        session = row[0]
+        try:
+            sequence = int(row[1])
+        except ValueError:
+            continue
+        if sequence <= last_sequence.get(session, 0):
+            continue
+        last_sequence[session] = sequence
+        rows_of_session = live.get(session)
+        if rows_of_session is None:
+            rows_of_session = live[session] = deque(maxlen=max_rows)
+        operation = row[2]
+        if operation == UNDO_MARKER:
+            if row[3]:
+                _remove_row(live, rows, index_of.pop((row[3], row[4]), None))
+            elif rows_of_session:
+                rows_of_session.pop()
+        elif operation == CLEAR_MARKER:
+            rows_of_session.clear()
+        else:
+            rows_of_session.append(index)
+            index_of[(session, row[1])] = index
+    keep = bytearray(len(rows))
+    for indices in live.values():
+        for index in indices:
+            keep[index] = 1
+    merged = list(compress(rows, keep))
+    return merged[-max_rows:] if max_rows else merged
+
+
+def _remove_row(live: Dict[str, Deque[int]], rows: List[List[str]], index: Optional[int]) -> None:
+    """Remove the row at ``index`` from its session's live rows, if it is still there."""
+    if index is None:
+        return
+    rows_of_session = live.get(rows[index][0])
+    if not rows_of_session:
+        return
+    if rows_of_session[-1] == index:
+        rows_of_session.pop()
+    elif index in rows_of_session:
+        rows_of_session.remove(index)
@@ -0,0 +1,110 @@
+"""
+NumPy counterparts of the scalar functions in app/operations.py.
+
+Every kernel takes two float arrays and returns ``(result, errors)`` where
+``errors`` marks the rows for which the scalar operation would have raised.
+Kernels are looked up by the registered calculation name.
+"""
+
+import math
+import numpy as np
+from typing import Tuple
+
+KernelResult = Tuple[np.ndarray, np.ndarray]
+
+
+_libm_pow = np.frompyfunc(math.pow, 2, 1)
+
+
+def _no_errors(result: np.ndarray) -> KernelResult:
+    return result, np.zeros(result.shape, dtype=bool)
+
+
+class vector_operations:
+
+    @staticmethod
+    def add(a: np.ndarray, b: np.ndarray) -> KernelResult:
+        return _no_errors(np.add(a, b))
+
+    @staticmethod
+    def subtract(a: np.ndarray, b: np.ndarray) -> KernelResult:
+        return _no_errors(np.subtract(a, b))
+
+    @staticmethod
+    def multiply(a: np.ndarray, b: np.ndarray) -> KernelResult:
+        return _no_errors(np.multiply(a, b))
+
+    @staticmethod
+    def divide(a: np.ndarray, b: np.ndarray) -> KernelResult:
+        return np.divide(a, b), b == 0
+
+    @staticmethod
+    def power(a: np.ndarray, b: np.ndarray) -> KernelResult:
+        result = np.power(a, b)
+        # Python raises on overflow and 0 ** -n, and returns a complex number for a
+        # negative base with a fractional exponent, which cannot be rounded.
+        errors = ~np.isfinite(result) & np.isfinite(a) & np.isfinite(b)
+        # NumPy's SIMD pow may differ from the C library by an ulp; redo the valid
+        # rows with the same pow() that ``a ** b`` uses.
+        valid = ~errors
+        try:
+            result[valid] = _libm_pow(a[valid], b[valid])
+        except (ValueError, OverflowError):
+            for i in np.flatnonzero(valid):
+                try:
+                    result.flat[i] = math.pow(a.flat[i], b.flat[i])
+                except (ValueError, OverflowError):
+                    errors.flat[i] = True
+        return result, errors
+
+    @staticmethod
+    def modulus(a: np.ndarray, b: np.ndarray) -> KernelResult:
+        return np.mod(a, b), b == 0
+
+    @staticmethod
+    def percentage(a: np.ndarray, b: np.ndarray) -> KernelResult:
+        zero = b == 0
+        result = np.divide(a, np.where(zero, 1.0, b)) * 100
+        result[zero] = 0.0
+        return _no_errors(result)
+
+    @staticmethod
+    def absolute_difference(a: np.ndarray, b: np.ndarray) -> KernelResult:
+        return _no_errors(np.abs(np.subtract(a, b)))
+
+    @staticmethod
+    def square_root(a: np.ndarray, b: np.ndarray) -> KernelResult:
+        # ``a ** 0.5`` rather than np.sqrt so the last bit matches the scalar path.
+        return np.power(a, 0.5), a < 0
+
+    @staticmethod
+    def integer_division(a: np.ndarray, b: np.ndarray) -> KernelResult:
+        whole_a = np.trunc(a)
+        whole_b = np.trunc(b)
+        errors = (whole_b == 0) | ~np.isfinite(a) | ~np.isfinite(b)
+        return np.floor_divide(whole_a, whole_b), errors
+
+
+def round_results(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Round an array exactly like the builtin ``round(value, ndigits)``.
+
+    ``np.round`` scales by ``10 ** ndigits`` before rounding, which can pick the other
+    neighbour for values within an ulp of a tie and loses precision once the scaled
+    value no longer has a fractional part. Those rows are rare, so they are
+    re-rounded with the builtin.
+
+    :param values: Float array to round.
+    :param ndigits: Number of decimal places.
+    :return: A new array of rounded values.
+    """
+    values = np.asarray(values, dtype=float)
+    with np.errstate(all="ignore"):
+        scaled = values * 10.0 ** ndigits
+        fraction = scaled - np.floor(scaled)
+        rounded = np.round(values, ndigits)
+        tie_distance = np.abs(scaled) * 2.0 ** -50 + 1e-12
+        suspect = np.isfinite(values) & ((np.abs(scaled) >= 2.0 ** 52) | (np.abs(fraction - 0.5) <= tie_distance))
+    for i in np.flatnonzero(suspect):
+        rounded.flat[i] = round(float(values.flat[i]), ndigits)
+    return rounded
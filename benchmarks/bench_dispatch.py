@@ -0,0 +1,54 @@
+"""
+Command dispatch microbenchmark.
+
+Times ``process_command`` for commands at different places in the command table
+(an early built-in, a late one, calculations under their own and aliased names,
+and an unknown command), with no observers and no result cache, and reports the
+best per-command latency of a few rounds. Printed output goes to a discarding
+stream.
+
+Run with ``python -m benchmarks.bench_dispatch [--calls 100000] [--rounds 5]``.
+"""
+
+import argparse
+import contextlib
+import time
+
+COMMANDS = ("help", "cache", "add 1.5 2.5", "abs_diff 1.5 2.5", "int_divide 7 2", "foobar 1 2")
+
+
+class _Discard:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def main(argv=None) -> None:
+    from app.calculator import process_command
+    from app.calculator_memento import MementoManager
+    from app.history_store import CalculationHistory
+    import app.calculation_operations  # registers the operations
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    history = CalculationHistory(100)
+    memento_manager = MementoManager(history)
+    for command in COMMANDS:
+        calls = args.calls // 20 if command == "help" else args.calls
+        best = float("inf")
+        with contextlib.redirect_stdout(_Discard()):
+            for _ in range(args.rounds):
+                began = time.perf_counter()
+                for _ in range(calls):
+                    process_command(command, history, [], memento_manager)
+                best = min(best, time.perf_counter() - began)
+        print(f"{command:18}: {best / calls * 1e6:7.2f} us/command")
+
+
+if __name__ == "__main__":
+    main()
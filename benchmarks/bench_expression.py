@@ -0,0 +1,58 @@
+"""
+Expression benchmark: parsing every time vs. reusing the compiled program.
+
+Compares, per evaluation of the same expression,
+  * parsing and compiling from scratch (the cache bypassed),
+  * looking up the cached compiled program and evaluating it,
+  * evaluating an already compiled program,
+and the per-row cost of evaluating the program over NumPy arrays.
+
+Run with ``python -m benchmarks.bench_expression [--repeat N] [--rows N]``.
+"""
+
+import argparse
+import time
+from app.expression import compile_expression, evaluate_expression
+import app.calculation_operations  # Ensures all @register_calculation decorators run
+
+EXPRESSION = "(x + 3) * 2 ^ 5 - root(y) / (x % 7 + 1) + abs_diff(x, y)"
+
+
+def per_call(function, repeat: int) -> float:
+    """Average microseconds per call of ``function``."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20_000)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    bindings = {"x": 12.5, "y": 16.0}
+    compiled = compile_expression(EXPRESSION)
+    uncached = compile_expression.__wrapped__
+    parse = per_call(lambda: uncached(EXPRESSION).evaluate(bindings), args.repeat)
+    cached = per_call(lambda: evaluate_expression(EXPRESSION, bindings), args.repeat)
+    direct = per_call(lambda: compiled.evaluate(bindings), args.repeat)
+
+    rng = np.random.default_rng(0)
+    arrays = {"x": rng.uniform(-100, 100, args.rows), "y": rng.uniform(0, 100, args.rows)}
+    start = time.perf_counter()
+    compiled.evaluate_many(arrays)
+    vector = (time.perf_counter() - start) / args.rows * 1e6
+
+    print(f"expression: {EXPRESSION}")
+    print(f"parse + evaluate          {parse:8.2f} us/eval")
+    print(f"cached compile + evaluate {cached:8.2f} us/eval {parse / cached:6.1f}x faster")
+    print(f"compiled evaluate         {direct:8.2f} us/eval {parse / direct:6.1f}x faster")
+    print(f"NumPy evaluate_many       {vector:8.4f} us/row  {parse / vector:6.0f}x faster ({args.rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
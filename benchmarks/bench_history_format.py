@@ -0,0 +1,61 @@
+"""
+History file format benchmark.
+
+Writes N rows as a history CSV and as a binary history file, then times loading
+each (parsing the CSV versus mapping the binary file) and restoring the newest
+``capacity`` rows into a history.
+
+Run with ``python -m benchmarks.bench_history_format [--rows 2000000] [--capacity 1000]``.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+
+def main(argv=None) -> None:
+    import numpy as np
+    import pandas as pd
+    from app.calculator_memento import MementoManager
+    from app.history_binary import load_binary_history, write_binary_columns
+    from app.history_file import parse_history_csv, restore_loaded
+    from app.history_store import CalculationHistory
+    import app.calculation_operations  # registers the operations
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--capacity", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    names = ["add", "subtract", "multiply", "divide"]
+    codes = rng.integers(0, len(names), args.rows).astype(np.uint8)
+    a = rng.uniform(-1000, 1000, args.rows)
+    b = rng.uniform(1, 1000, args.rows)
+    results = a + b
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, "history.csv")
+        binary_path = os.path.join(workdir, "history.bin")
+
+        began = time.perf_counter()
+        pd.DataFrame({"operation": pd.Categorical.from_codes(codes, categories=names),
+                      "operand1": a, "operand2": b, "result": results}).to_csv(csv_path, index=False)
+        csv_write = time.perf_counter() - began
+        began = time.perf_counter()
+        write_binary_columns(binary_path, names, codes, a, b, results)
+        binary_write = time.perf_counter() - began
+
+        for label, path, load, write in (("csv", csv_path, parse_history_csv, csv_write),
+                                         ("binary", binary_path, load_binary_history, binary_write)):
+            history = CalculationHistory(args.capacity)
+            began = time.perf_counter()
+            restore_loaded(load(path, args.capacity), history, MementoManager(history))
+            loaded = time.perf_counter() - began
+            print(f"{label:6}: write {write:7.3f} s, load {loaded * 1000:9.2f} ms, "
+                  f"{os.path.getsize(path) / 2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
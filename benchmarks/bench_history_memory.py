@@ -0,0 +1,73 @@
+"""
+Memory benchmark: list of Calculation objects vs. the columnar CalculationHistory.
+
+The "dict-based" baseline reproduces the layout Calculation had before it used
+``__slots__`` (one instance ``__dict__`` per entry), i.e. the old ``List[Calculation]``.
+
+Run with ``python -m benchmarks.bench_history_memory [--entries N]``.
+"""
+
+import argparse
+import gc
+import tracemalloc
+from app.calculation import CalculationFactory
+from app.history_store import CalculationHistory
+import app.calculation_operations  # Ensures all @register_calculation decorators run
+
+
+class _DictCalculation:
+    def __init__(self, a: float, b: float):
+        self.a = a
+        self.b = b
+        self.result = None
+
+
+def measure_list(entries: int, slotted: bool = True) -> int:
+    """Bytes held by a plain list of executed Calculation objects."""
+    gc.collect()
+    tracemalloc.start()
+    history = []
+    for i in range(entries):
+        if slotted:
+            calc = CalculationFactory.create_calculation("add", float(i), 0.5)
+        else:
+            calc = _DictCalculation(float(i), 0.5)
+        calc.result = round(float(i) + 0.5, 2)
+        history.append(calc)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size
+
+
+def measure_store(entries: int, capacity: int) -> int:
+    """Bytes held by a CalculationHistory after ``entries`` appends."""
+    gc.collect()
+    tracemalloc.start()
+    history = CalculationHistory(capacity)
+    for i in range(entries):
+        history.append_values("add", float(i), 0.5, round(i + 0.5, 2))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    results = [
+        ("list, dict-based objects", measure_list(args.entries, slotted=False)),
+        ("list, __slots__ objects", measure_list(args.entries)),
+        ("CalculationHistory", measure_store(args.entries, args.entries)),
+        ("CalculationHistory, wrapped", measure_store(args.entries + 1, args.entries)),
+    ]
+    baseline = results[0][1]
+    print(f"entries: {args.entries}")
+    for label, size in results:
+        print(f"{label:30} {size / 2**20:8.1f} MiB {size / args.entries:7.1f} B/entry "
+              f"{size / baseline:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Write-ahead journal benchmark.
+
+Appends N events (mostly calculations, with some undo/redo) through a ``Journal``,
+then times replaying the journal into a history of the configured capacity and the
+size of the checkpoint written afterwards.
+
+Run with ``python -m benchmarks.bench_journal [--events 1000000] [--capacity 1000]``.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+
+def main(argv=None) -> None:
+    from app.calculator_memento import MementoManager
+    from app.history_store import CalculationHistory
+    from app.journal import Journal, restore_history
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--capacity", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "journal.bin")
+        journal = Journal(path)
+        operations = ("add", "subtract", "multiply", "divide")
+        began = time.perf_counter()
+        for i in range(args.events):
+            if i % 10 == 8:
+                journal.append_undo()
+            elif i % 10 == 9:
+                journal.append_redo()
+            else:
+                journal.append_calculation(operations[i % 4], float(i), 2.0, i + 2.0)
+        appended = time.perf_counter() - began
+        journal.close()
+        written = time.perf_counter() - began
+        size = os.path.getsize(path)
+        print(f"append: {args.events / appended:12.0f} events/s ({appended:.2f} s), "
+              f"on disk after {written:.2f} s in {journal.commits} commits, {size / 2**20:.1f} MiB")
+
+        history = CalculationHistory(args.capacity)
+        began = time.perf_counter()
+        restored = restore_history(path, history, MementoManager(history))
+        replayed = time.perf_counter() - began
+        print(f"replay: {args.events / replayed:12.0f} events/s ({replayed:.2f} s), "
+              f"{restored} entries restored, checkpoint {os.path.getsize(path) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Observer bus benchmark.
+
+Runs a batch of ``multiply`` commands against a history of ``--history`` entries
+with a full-mode AutoSaveObserver and a LoggingObserver, notified either
+
+  direct  synchronously after every command (CALCULATOR_OBSERVER_BUS=false)
+  bus     through an ObserverBus, one worker per observer, with the block and the
+          coalesce backpressure policies
+
+and reports the time until the commands have run (what the REPL waits for) and
+until the observers have caught up (``flush``), plus the number of history writes.
+
+Run with ``python -m benchmarks.bench_observer_bus [--commands 2000] [--history 1000]``.
+"""
+
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+
+class _Discard:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def main(argv=None) -> None:
+    from app import config
+    from app.autosave import AutoSaveObserver
+    from app.calculator import process_command
+    from app.calculator_memento import MementoManager
+    from app.history import ObserverBus
+    from app.history_store import CalculationHistory
+    from app.logger import LoggingObserver, configure_logging, shutdown_logging
+    import app.calculation_operations  # registers the operations
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--history", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        config.CALCULATOR_LOG_DIR = directory
+        configure_logging()
+
+        class CountingAutoSave(AutoSaveObserver):
+            writes = 0
+
+            def _write(self, history) -> None:
+                CountingAutoSave.writes += 1
+                super()._write(history)
+
+        def run(mode: str) -> None:
+            history = CalculationHistory(args.history)
+            memento_manager = MementoManager(history)
+            for i in range(args.history):
+                history.append_values("add", i, i, 2 * i)
+            observers = [CountingAutoSave(history, os.path.join(directory, f"{mode}.csv")), LoggingObserver()]
+            if mode != "direct":
+                observers = [ObserverBus(history, observers, policy=mode, queue_size=256)]
+            CountingAutoSave.writes = 0
+            began = time.perf_counter()
+            with contextlib.redirect_stdout(_Discard()):
+                for i in range(args.commands):
+                    process_command(f"multiply {i} 2.5", history, observers, memento_manager)
+            commands = time.perf_counter() - began
+            for observer in observers:
+                observer.flush()
+            caught_up = time.perf_counter() - began
+            for observer in observers:
+                observer.close()
+            print(f"{mode:8}: commands {commands / args.commands * 1e6:8.1f} us/command, "
+                  f"caught up after {caught_up:6.3f}s, {CountingAutoSave.writes} history writes")
+
+        for mode in ("direct", "block", "coalesce"):
+            run(mode)
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
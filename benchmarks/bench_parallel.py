@@ -0,0 +1,59 @@
+"""
+Parallel bulk evaluation benchmark.
+
+Fills the shared operand buffers of one batch of N pairs and evaluates an
+operation over them with 1, 2, 4 and 8 worker processes, reporting the throughput
+and the speedup over one worker. The pool is started (and the workers' imports
+done) before timing; the best of a few repeats is reported.
+
+Run with ``python -m benchmarks.bench_parallel [--rows 20000000] [--workers 1 2 4 8]
+[--operation power]``.
+"""
+
+import argparse
+import os
+import time
+
+
+def measure(shared, operation: str, workers: int, repeats: int) -> float:
+    """
+    Evaluate ``operation`` over the whole batch ``repeats`` times.
+
+    :return: The best time in seconds.
+    """
+    shared.evaluate(operation, workers=workers)  # warm up the pool
+    best = float("inf")
+    for _ in range(repeats):
+        began = time.perf_counter()
+        shared.evaluate(operation, workers=workers)
+        best = min(best, time.perf_counter() - began)
+    return best
+
+
+def main(argv=None) -> None:
+    import numpy as np
+    from app.parallel import SharedOperands, shutdown_pool
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--operation", default="power")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    print(f"{args.rows} rows of {args.operation}, {os.cpu_count()} CPUs")
+    with SharedOperands(args.rows) as shared:
+        shared.a[:] = rng.uniform(-100, 100, args.rows)
+        shared.b[:] = rng.uniform(0, 3, args.rows)
+        baseline = None
+        for workers in args.workers:
+            seconds = measure(shared, args.operation, workers, args.repeats)
+            baseline = baseline or seconds
+            print(f"{workers:3d} workers: {args.rows / seconds:12.0f} rows/s ({seconds:.3f} s), "
+                  f"speedup {baseline / seconds:.2f}x")
+        shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
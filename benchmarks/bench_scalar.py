@@ -0,0 +1,110 @@
+"""
+Scalar calculation fast path benchmark.
+
+Compares, per calculation, evaluating through a Calculation object versus the
+operation's scalar function, the work done after a command has been parsed:
+
+  object  create a Calculation through the factory, execute it, record it in the
+          history and undo stack and hand the object to an observer
+  fast    call the operation's scalar function, record the values in the history
+          and undo stack and hand the values to an observer
+
+and the whole ``process_command`` with an observer that takes values and with one
+that needs a Calculation object. Rounds of the cases are interleaved and the best
+round is reported, which keeps the comparison stable on a busy machine.
+
+Run with ``python -m benchmarks.bench_scalar [--calls 200000] [--rounds 5]``.
+"""
+
+import argparse
+import contextlib
+import time
+
+
+class _Discard:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def main(argv=None) -> None:
+    from app.calculation import CalculationFactory
+    from app.calculator import process_command
+    from app.calculator_memento import MementoManager
+    from app.history import HistoryObserver
+    from app.history_store import CalculationHistory
+    import app.calculation_operations  # registers the operations
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    class ObjectObserver(HistoryObserver):
+        def update(self, calculation) -> None:
+            self.last = calculation.result
+
+    class ValuesObserver(ObjectObserver):
+        def update_values(self, operation, a, b, result) -> None:
+            self.last = result
+
+    history = CalculationHistory(1000)
+    memento_manager = MementoManager(history)
+    object_observer, values_observer = ObjectObserver(), ValuesObserver()
+    create_calculation = CalculationFactory.create_calculation
+    function = CalculationFactory.scalar_function("multiply")
+
+    def object_path(a: float, b: float) -> None:
+        calculation = create_calculation("multiply", a, b)
+        calculation.result = round(calculation.execute(), 2)
+        memento_manager.save_state(history.append_values("multiply", a, b, calculation.result))
+        object_observer.update(calculation)
+
+    def fast_path(a: float, b: float) -> None:
+        result = round(function(a, b), 2)
+        memento_manager.save_state(history.append_values("multiply", a, b, result))
+        values_observer.update_values("multiply", a, b, result)
+
+    def evaluate_object() -> None:
+        for _ in range(args.calls):
+            create_calculation("multiply", 7.5, 2.5).execute()
+
+    def evaluate_function() -> None:
+        for _ in range(args.calls):
+            function(7.5, 2.5)
+
+    def run_path(path) -> None:
+        for _ in range(args.calls):
+            path(7.5, 2.5)
+
+    def run_command(observer) -> None:
+        observers = [observer]
+        for _ in range(args.calls):
+            process_command("multiply 7.5 2.5", history, observers, memento_manager)
+
+    cases = {
+        "evaluate, object": evaluate_object,
+        "evaluate, function": evaluate_function,
+        "object path": lambda: run_path(object_path),
+        "fast path": lambda: run_path(fast_path),
+        "command, object observer": lambda: run_command(object_observer),
+        "command, values observer": lambda: run_command(values_observer),
+    }
+    best = dict.fromkeys(cases, float("inf"))
+    with contextlib.redirect_stdout(_Discard()):
+        for _ in range(args.rounds):
+            for name, case in cases.items():
+                began = time.perf_counter()
+                case()
+                best[name] = min(best[name], time.perf_counter() - began)
+    for name, seconds in best.items():
+        print(f"{name:26}: {seconds / args.calls * 1e6:6.2f} us/calculation")
+    print(f"evaluate speedup: {best['evaluate, object'] / best['evaluate, function']:.1f}x, "
+          f"fast path speedup: {best['object path'] / best['fast path']:.1f}x, "
+          f"command speedup: {best['command, object observer'] / best['command, values observer']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Load generator for the calculator server.
+
+Starts the server in a separate process, opens N concurrent connections and has each
+send JSON-lines requests in a closed loop (one outstanding request per connection)
+for a fixed time. Reports requests/second and p50/p99 latency per concurrency level.
+
+Run with ``python -m benchmarks.bench_server [--connections 1 100 1000] [--duration S]``.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import statistics
+import time
+from typing import List
+
+COMMANDS = ["add 1 2", "multiply 3.5 4", "divide 10 4", "power 2 10", "undo", "redo", "eval (3 + 4) * 2 ^ 5"]
+
+
+def _run_server(ready) -> None:
+    from app.server import start_server
+    from app.calculator import create_result_cache
+
+    async def run():
+        server = await start_server("127.0.0.1", 0, create_result_cache())
+        ready.put(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(run())
+
+
+async def _drive(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, deadline: float,
+                 latencies: List[float]) -> None:
+    i = 0
+    while time.perf_counter() < deadline:
+        request = json.dumps({"id": i, "command": COMMANDS[i % len(COMMANDS)]}) + "\n"
+        sent = time.perf_counter()
+        writer.write(request.encode())
+        await reader.readline()
+        latencies.append(time.perf_counter() - sent)
+        i += 1
+    writer.close()
+    await writer.wait_closed()
+
+
+async def measure(port: int, connections: int, duration: float) -> dict:
+    """
+    Drive the server at a given concurrency.
+
+    All connections are opened before the clock starts.
+
+    :return: Request count, requests per second and latency percentiles in milliseconds.
+    """
+    streams = await asyncio.gather(*(asyncio.open_connection("127.0.0.1", port) for _ in range(connections)))
+    latencies: List[float] = []
+    began = time.perf_counter()
+    deadline = began + duration
+    await asyncio.gather(*(_drive(reader, writer, deadline, latencies) for reader, writer in streams))
+    elapsed = time.perf_counter() - began
+    latencies.sort()
+    return {
+        "connections": connections,
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(0.99 * (len(latencies) - 1))] * 1000,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_run_server, args=(ready,), daemon=True)
+    server.start()
+    try:
+        port = ready.get(timeout=30)
+        for connections in args.connections:
+            result = asyncio.run(measure(port, connections, args.duration))
+            print(f"{result['connections']:5d} connections: {result['requests_per_second']:9.0f} req/s, "
+                  f"p50 {result['p50_ms']:7.2f} ms, p99 {result['p99_ms']:7.2f} ms "
+                  f"({result['requests']} requests)")
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Shared history file benchmark.
+
+Starts N processes that each append R calculations to one shared history file
+through a SharedHistoryObserver, and reports the total rows per second, how many
+rows each lock acquisition wrote and how long merging the file takes.
+
+Run with ``python -m benchmarks.bench_shared_history [--writers 1 4 16] [--rows 20000]``.
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+
+def _write(path: str, rows: int, start, results) -> None:
+    from app.calculation import CalculationFactory
+    from app.shared_history import SharedHistoryObserver
+    import app.calculation_operations  # registers the operations
+
+    observer = SharedHistoryObserver(path, background=True)
+    calc = CalculationFactory.create_calculation("add", 1.5, 2.5)
+    calc.result = 4.0
+    start.wait()
+    for _ in range(rows):
+        observer.update(calc)
+    observer.close()
+    results.put(observer.lock_acquisitions)
+
+
+def measure(writers: int, rows: int, workdir: str) -> dict:
+    """
+    Run ``writers`` concurrent processes appending ``rows`` rows each.
+
+    :return: Throughput, rows per lock acquisition and merge time.
+    """
+    from app.shared_history import merge_shared_history
+
+    path = os.path.join(workdir, f"shared-{writers}.csv")
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_write, args=(path, rows, start, results)) for _ in range(writers)]
+    for process in processes:
+        process.start()
+    time.sleep(0.5)  # let every process import and open the file
+    began = time.perf_counter()
+    start.set()
+    locks = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - began
+
+    began = time.perf_counter()
+    merged = merge_shared_history(path)
+    merge_seconds = time.perf_counter() - began
+    assert len(merged) == writers * rows
+    return {"writers": writers, "rows_per_second": writers * rows / elapsed,
+            "rows_per_lock": writers * rows / locks, "merge_seconds": merge_seconds}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--rows", type=int, default=20000, help="rows per writer")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for writers in args.writers:
+            r = measure(writers, args.rows, workdir)
+            print(f"{r['writers']:3d} writers: {r['rows_per_second']:10.0f} rows/s, "
+                  f"{r['rows_per_lock']:7.1f} rows per lock, merge {r['merge_seconds']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Startup benchmark: time to import the calculator, measured in fresh interpreters.
+
+Each run starts a new ``python`` process and reports the import time of ``main``
+(and so of ``app.calculator``) on top of a bare interpreter start. The modules that
+should only be loaded on demand are listed so regressions are easy to spot.
+
+Run with ``python -m benchmarks.bench_startup [--runs N]``.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED_MODULES = ("pandas", "numpy", "readline", "dotenv")
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [m for m in {deferred!r} if m in sys.modules]
+print(elapsed * 1000, ",".join(loaded))
+"""
+
+
+def measure_import(module: str = "main") -> tuple:
+    """
+    Import ``module`` in a fresh interpreter.
+
+    :return: The import time in milliseconds and the deferred modules it loaded.
+    """
+    code = _PROBE.format(module=module, deferred=DEFERRED_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.split()
+    return float(output[0]), output[1].split(",") if len(output) > 1 else []
+
+
+def measure_interpreter() -> float:
+    """Wall-clock milliseconds to start and exit a bare interpreter."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True, capture_output=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    interpreter = [measure_interpreter() for _ in range(args.runs)]
+    print(f"bare interpreter          {statistics.median(interpreter):8.1f} ms")
+    for module in ("app.calculator", "main"):
+        runs = [measure_import(module) for _ in range(args.runs)]
+        times = [elapsed for elapsed, _ in runs]
+        loaded = sorted(set().union(*(modules for _, modules in runs)))
+        print(f"import {module:18} {statistics.median(times):8.1f} ms (min {min(times):.1f}), "
+              f"deferred modules loaded: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Benchmark suite for the calculator's hot paths.
+
+Measures throughput and latency of
+  * the functions in ``app.operations``,
+  * ``CalculationFactory.create_calculation`` plus ``execute``,
+  * command dispatch through ``process_command`` (what ``calculator()`` runs per line),
+    with and without latency instrumentation,
+  * ``AutoSaveObserver.update`` (full and incremental) and ``LoggingObserver.update``,
+  * the ``load`` command (parsing the file, and from the cache of parsed files),
+    indexed ``history`` queries and ``summary``,
+at several history sizes. Everything runs offline in a temporary directory.
+
+Results are written as JSON. Given a baseline (an earlier results file), every case
+whose median latency grew by more than the threshold is reported as a regression and
+the command exits with status 1, so it can gate changes:
+
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.25
+
+Save a new baseline with ``--output benchmarks/baseline.json``.
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_SIZES = (10, 100, 1000)
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results.json")
+
+
+def measure(name: str, function: Callable[[], object], samples: int, batch: int,
+            history_size: Optional[int] = None) -> Dict:
+    """
+    Time ``function`` in ``samples`` batches of ``batch`` calls after one warm-up batch.
+
+    :return: A result record with per-call latency percentiles (in microseconds) and
+        throughput (calls per second).
+    """
+    for _ in range(batch):
+        function()
+    latencies = []
+    perf_counter = time.perf_counter
+    for _ in range(samples):
+        start = perf_counter()
+        for _ in range(batch):
+            function()
+        latencies.append((perf_counter() - start) / batch)
+    latencies.sort()
+    return {
+        "name": name,
+        "history_size": history_size,
+        "calls": samples * batch,
+        "ops_per_second": 1 / statistics.mean(latencies),
+        "p50_us": statistics.median(latencies) * 1e6,
+        "p99_us": latencies[math.ceil(0.99 * len(latencies)) - 1] * 1e6,
+        "min_us": latencies[0] * 1e6,
+    }
+
+
+def _filled_history(size: int):
+    from app.history_store import CalculationHistory
+
+    history = CalculationHistory(size)
+    for i in range(size):
+        history.append_values("add", float(i), 1.0, i + 1.0)
+    return history
+
+
+def run_suite(sizes: Iterable[int] = DEFAULT_SIZES, samples: int = 50, batch: int = 200,
+              workdir: Optional[str] = None) -> List[Dict]:
+    """
+    Run every benchmark case.
+
+    :param sizes: History sizes for the cases that depend on it.
+    :param samples: Timed batches per case.
+    :param batch: Calls per batch; the I/O-bound cases time single calls in half as many samples.
+    :param workdir: Directory for the files written by the I/O cases (a temporary one by default).
+    :return: One result record per case.
+    """
+    from app import config, history_file
+    from app.autosave import AutoSaveObserver, IncrementalAutoSaveObserver
+    from app.calculation import CalculationFactory
+    from app.calculator import process_command
+    from app.calculator_memento import MementoManager
+    from app.instrumentation import Instrumentation
+    from app.logger import LoggingObserver, configure_logging, shutdown_logging
+    from app.operations import operations
+    import app.calculation_operations  # Ensures all @register_calculation decorators run
+
+    results = []
+    for name in ("add", "subtract", "multiply", "divide", "power", "modulus"):
+        function = getattr(operations, name)
+        results.append(measure(f"operations.{name}", lambda f=function: f(7.5, 2.5), samples, batch * 10))
+
+    calc = CalculationFactory.create_calculation("add", 1.5, 2.5)
+    calc.result = calc.execute()
+    results.append(measure("factory.create_calculation",
+                           lambda: CalculationFactory.create_calculation("multiply", 7.5, 2.5).execute(),
+                           samples, batch * 10))
+
+    io_samples = max(5, samples // 2)
+    with contextlib.ExitStack() as stack:
+        if workdir is None:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory())
+        devnull = stack.enter_context(open(os.devnull, "w"))
+        stack.enter_context(contextlib.redirect_stdout(devnull))
+        stack.callback(setattr, config, "CALCULATOR_HISTORY_DIR", config.CALCULATOR_HISTORY_DIR)
+        config.CALCULATOR_HISTORY_DIR = workdir
+
+        stack.callback(setattr, config, "CALCULATOR_LOG_DIR", config.CALCULATOR_LOG_DIR)
+        config.CALCULATOR_LOG_DIR = workdir
+        stack.callback(logging.getLogger().setLevel, logging.getLogger().level)
+        configure_logging()
+        stack.callback(shutdown_logging)
+        logger = LoggingObserver()
+        results.append(measure("logging.update", lambda: logger.update(calc), samples, batch))
+
+        incremental = IncrementalAutoSaveObserver(output_file=os.path.join(workdir, "incremental.csv"),
+                                                  background=False)
+        stack.callback(incremental.close)
+        results.append(measure("autosave.incremental.update", lambda: incremental.update(calc), samples, batch))
+
+        for size in sizes:
+            history = _filled_history(size)
+            memento_manager = MementoManager(history)
+            results.append(measure("dispatch.process_command",
+                                   lambda: process_command("add 1.5 2.5", history, [], memento_manager),
+                                   samples, batch, size))
+            stats = Instrumentation()
+            results.append(measure("dispatch.process_command.instrumented",
+                                   lambda: process_command("add 1.5 2.5", history, [], memento_manager, None, stats),
+                                   samples, batch, size))
+
+            results.append(measure("dispatch.history_query",
+                                   lambda: process_command("history result=0:50 last=20", history, [],
+                                                           memento_manager),
+                                   samples, batch, size))
+            results.append(measure("dispatch.summary",
+                                   lambda: process_command("summary", history, [], memento_manager),
+                                   samples, batch, size))
+
+            history = _filled_history(size)
+            full = AutoSaveObserver(history, output_file=os.path.join(workdir, "history.csv"), background=False)
+            results.append(measure("autosave.full.update", lambda: full.update(calc), io_samples, 1, size))
+
+            history = _filled_history(size)
+            memento_manager = MementoManager(history)
+            load = lambda: process_command("load", history, [], memento_manager)
+            results.append(measure("dispatch.load.parse", lambda: (history_file._cache.clear(), load()),
+                                   io_samples, 1, size))
+            results.append(measure("dispatch.load.cached", load, io_samples, 1, size))
+    return results
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Find the cases whose median latency regressed against a baseline.
+
+    :param results: Records from ``run_suite``.
+    :param baseline: Records from an earlier run; cases missing from either side are skipped.
+    :param threshold: Allowed relative slowdown, e.g. 0.25 for 25%.
+    :return: One record per regressed case with both medians and the ratio.
+    """
+    previous = {(r["name"], r["history_size"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["name"], result["history_size"]))
+        if before is None or before["p50_us"] <= 0:
+            continue
+        ratio = result["p50_us"] / before["p50_us"]
+        if ratio > 1 + threshold:
+            regressions.append({"name": result["name"], "history_size": result["history_size"],
+                                "baseline_p50_us": before["p50_us"], "p50_us": result["p50_us"],
+                                "ratio": ratio})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="history sizes to benchmark")
+    parser.add_argument("--samples", type=int, default=50, help="timed batches per case")
+    parser.add_argument("--batch", type=int, default=200, help="calls per batch")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the results JSON")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown of the median latency (default 0.25)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.samples, args.batch)
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for r in results:
+        size = "" if r["history_size"] is None else f"[{r['history_size']}]"
+        print(f"{r['name'] + size:46} {r['ops_per_second']:12.0f} ops/s  "
+              f"p50 {r['p50_us']:10.2f} us  p99 {r['p99_us']:10.2f} us")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        for r in regressions:
+            size = "" if r["history_size"] is None else f"[{r['history_size']}]"
+            print(f"REGRESSION {r['name'] + size}: {r['baseline_p50_us']:.2f} us -> {r['p50_us']:.2f} us "
+                  f"({r['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,44 @@
-from app.calculator import calculator
+import argparse
+from app.calculator import calculator, initialize
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Command-line calculator")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run commands from FILE ('-' for stdin) without prompts")
+    parser.add_argument("--compute", nargs=2, metavar=("INPUT", "OUTPUT"),
+                        help="evaluate a CSV of operation,operand1,operand2 rows into OUTPUT")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="rows per chunk for --compute")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for --compute (0 = one per CPU, default 1)")
+    parser.add_argument("--convert", nargs=2, metavar=("INPUT", "OUTPUT"),
+                        help="convert a history file between CSV and the binary format (by INPUT's format)")
+    parser.add_argument("--serve", action="store_true",
+                        help="serve calculator sessions over TCP instead of the REPL")
+    parser.add_argument("--host", default=None, help="interface for --serve")
+    parser.add_argument("--port", type=int, default=None, help="port for --serve")
+    args = parser.parse_args(argv)
+    initialize()
+
+    if args.compute:
+        from app.bulk import compute_csv, DEFAULT_CHUNK_SIZE
+        compute_csv(args.compute[0], args.compute[1], chunk_size=args.chunk_size or DEFAULT_CHUNK_SIZE,
+                    workers=1 if args.workers is None else args.workers)
+    elif args.convert:
+        from app.history_binary import binary_to_csv, csv_to_binary, is_binary_history
+        convert = binary_to_csv if is_binary_history(args.convert[0]) else csv_to_binary
+        rows = convert(args.convert[0], args.convert[1])
+        print(f"Converted {rows} rows to {args.convert[1]}.")
+    elif args.serve:
+        from app.server import serve
+        serve(args.host, args.port)
+    elif args.batch:
+        from app.batch import run_batch
+        run_batch(args.batch)
+    else:
+        calculator()
+
+
 if __name__ == "__main__":
-    calculator()
\ No newline at end of file
+    main()
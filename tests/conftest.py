@@ -0,0 +1,9 @@
+import pytest
+from app import config
+
+
+@pytest.fixture(autouse=True)
+def history_dir(tmp_path, monkeypatch):
+    """Keep the history files written by autosave out of the working tree."""
+    monkeypatch.setattr(config, "CALCULATOR_HISTORY_DIR", str(tmp_path / "history"))
+    return tmp_path / "history"
@@ -0,0 +1,269 @@
+import csv
+import threading
+import pytest
+from app.autosave import (
+    AutoSaveObserver,
+    BackgroundWriter,
+    IncrementalAutoSaveObserver,
+    replay_rows,
+    UNDO_MARKER,
+    CLEAR_MARKER,
+)
+from app.calculation import CalculationFactory
+from app.exceptions import FileProcessingError
+from app.history_store import CalculationHistory
+import app.calculation_operations  # registers the operations
+
+
+def make_calc(name, a, b):
+    calc = CalculationFactory.create_calculation(name, a, b)
+    calc.result = calc.execute()
+    return calc
+
+
+def read_rows(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_incremental_appends_one_row_per_calculation(tmp_path):
+    output_file = tmp_path / "history.csv"
+    observer = IncrementalAutoSaveObserver(output_file=str(output_file))
+    observer.update(make_calc("add", 1, 2))
+    observer.update(make_calc("multiply", 3, 4))
+    observer.close()
+
+    rows = read_rows(output_file)
+    assert rows[0] == ["operation", "operand1", "operand2", "result"]
+    assert rows[1] == ["add", "1", "2", "3"]
+    assert rows[2] == ["multiply", "3", "4", "12"]
+
+
+def test_incremental_records_tombstones(tmp_path):
+    output_file = tmp_path / "history.csv"
+    observer = IncrementalAutoSaveObserver(output_file=str(output_file))
+    first = make_calc("add", 1, 2)
+    observer.update(first)
+    observer.on_undo(first)
+    observer.on_redo(first)
+    observer.on_clear()
+    observer.close()
+
+    operations = [row[0] for row in read_rows(output_file)[1:]]
+    assert operations == ["add", UNDO_MARKER, "add", CLEAR_MARKER]
+
+
+def test_incremental_keeps_earlier_sessions_rows(tmp_path):
+    output_file = tmp_path / "history.csv"
+    first = IncrementalAutoSaveObserver(output_file=str(output_file), background=False)
+    first.update(make_calc("add", 1, 2))
+    first.on_undo(make_calc("add", 1, 2))
+    first.update(make_calc("add", 3, 4))
+    first.close()
+
+    second = IncrementalAutoSaveObserver(output_file=str(output_file), compact_threshold=1, background=False)
+    second.update(make_calc("multiply", 2, 5))
+    second.close()
+
+    rows = read_rows(output_file)
+    assert rows[0] == ["operation", "operand1", "operand2", "result"]
+    # The first session's dead rows were counted, so the second session compacted them away.
+    assert [row[:3] for row in rows[1:]] == [["add", "3", "4"], ["multiply", "2", "5"]]
+
+
+def test_replay_rows_applies_tombstones_and_limit():
+    rows = [
+        ["add", "1", "1", "2"],
+        [CLEAR_MARKER, "", "", ""],
+        ["add", "2", "2", "4"],
+        ["add", "3", "3", "6"],
+        ["add", "4", "4", "8"],
+        [UNDO_MARKER, "", "", ""],
+    ]
+    assert replay_rows(rows) == [["add", "2", "2", "4"], ["add", "3", "3", "6"]]
+    # Evicted rows are not brought back by a later undo, just like the in-memory history.
+    assert replay_rows(rows, max_rows=2) == [["add", "3", "3", "6"]]
+
+
+def test_compaction_keeps_only_live_rows(tmp_path):
+    output_file = tmp_path / "history.csv"
+    observer = IncrementalAutoSaveObserver(output_file=str(output_file), max_rows=3, compact_threshold=4)
+    for i in range(10):
+        calc = make_calc("add", i, i)
+        observer.update(calc)
+        if i % 2:
+            observer.on_undo(calc)
+    observer.close()
+
+    rows = read_rows(output_file)
+    assert len(rows) - 1 < 15  # without compaction there would be 15 rows
+    assert replay_rows(rows[1:], max_rows=3) == [["add", "6", "6", "12"], ["add", "8", "8", "16"]]
+
+
+def test_appends_after_compaction_go_to_new_file(tmp_path):
+    output_file = tmp_path / "history.csv"
+    observer = IncrementalAutoSaveObserver(output_file=str(output_file), compact_threshold=1000, background=False)
+    observer.update(make_calc("add", 1, 1))
+    observer.on_clear()
+    observer.compact()
+    observer.update(make_calc("add", 2, 2))
+    observer.close()
+
+    assert read_rows(output_file)[1:] == [["add", "2", "2", "4"]]
+
+
+def test_incremental_mode_selected_from_config(monkeypatch, tmp_path):
+    from app import config
+    from app.calculator import calculator
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_MODE", "incremental")
+    monkeypatch.setattr(config, "CALCULATOR_HISTORY_DIR", str(tmp_path))
+    inputs = iter(["add 1 2", "add 3 4", "undo", "exit"])
+    monkeypatch.setattr("builtins.input", lambda _: next(inputs))
+
+    with pytest.raises(SystemExit):
+        calculator()
+
+    rows = read_rows(tmp_path / "history.csv")
+    assert [row[0] for row in rows[1:]] == ["add", "add", UNDO_MARKER]
+
+
+def test_background_writer_coalesces_bursts():
+    batches = []
+    release = threading.Event()
+
+    def write_batch(batch):
+        release.wait()
+        batches.append(list(batch))
+
+    writer = BackgroundWriter(write_batch, flush_interval=0.01, max_batch=50)
+    for i in range(120):
+        writer.put(i)
+    assert writer.queue_depth > 0
+    release.set()
+    writer.close()
+
+    assert [record for batch in batches for record in batch] == list(range(120))
+    assert len(batches) < 120
+    assert max(len(batch) for batch in batches) <= 50
+    stats = writer.stats()
+    assert stats["records_written"] == 120
+    assert stats["flushes"] == len(batches)
+    assert stats["max_flush_ms"] >= stats["last_flush_ms"] >= 0
+
+
+def test_background_writer_flush_waits_for_writes():
+    written = []
+    writer = BackgroundWriter(written.extend, flush_interval=1.0)
+    writer.put("a")
+    writer.put("b")
+    writer.flush()  # returns before the flush interval once the queue is drained
+    assert written == ["a", "b"]
+    writer.close()
+
+
+def test_background_writer_reports_errors():
+    def write_batch(batch):
+        raise IOError("disk full")
+
+    writer = BackgroundWriter(write_batch, flush_interval=0)
+    writer.put(1)
+    with pytest.raises(FileProcessingError, match="disk full"):
+        writer.flush()
+    writer.close()
+
+
+def test_incremental_background_writes_on_close(tmp_path):
+    output_file = tmp_path / "history.csv"
+    observer = IncrementalAutoSaveObserver(output_file=str(output_file), background=True)
+    for i in range(100):
+        observer.update(make_calc("add", i, 1))
+    observer.close()
+
+    rows = read_rows(output_file)
+    assert len(rows) == 101
+    assert observer.writer.stats()["records_written"] == 100
+
+
+def test_full_background_rewrites_off_the_command_thread(tmp_path, monkeypatch):
+    from app import config
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_FLUSH_INTERVAL", 10.0)
+    output_file = tmp_path / "history.csv"
+    history = CalculationHistory(50)
+    observer = AutoSaveObserver(history, str(output_file), background=True)
+    for i in range(100):
+        history.append_values("add", i, 1, i + 1)
+        observer.update_values("add", i, 1, i + 1)
+    # Nothing is written until the burst ends, and the history can change meanwhile.
+    assert not output_file.exists()
+    history.clear()
+    observer.flush()
+
+    rows = read_rows(output_file)
+    assert [float(row[1]) for row in rows[1:]] == list(range(50, 100))
+    assert observer.writer.stats()["flushes"] == 1
+    observer.close()
+
+
+@pytest.mark.parametrize("mode", ["incremental", "full"])
+@pytest.mark.parametrize("ending", ["exit", EOFError, KeyboardInterrupt])
+def test_calculator_flushes_background_writer_on_exit(monkeypatch, tmp_path, ending, mode):
+    from app import config
+    from app.calculator import calculator
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_MODE", mode)
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_BACKGROUND", True)
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_FLUSH_INTERVAL", 10.0)
+    monkeypatch.setattr(config, "CALCULATOR_HISTORY_DIR", str(tmp_path))
+    inputs = iter(["add 1 2", "add 3 4", ending])
+
+    def fake_input(_):
+        value = next(inputs)
+        if not isinstance(value, str):
+            raise value
+        return value
+
+    monkeypatch.setattr("builtins.input", fake_input)
+
+    with pytest.raises(SystemExit):
+        calculator()
+
+    rows = read_rows(tmp_path / "history.csv")
+    assert [row[3] for row in rows[1:]] == ["3.0", "7.0"]
+
+
+def test_full_rewrite_leaves_the_old_file_until_complete(tmp_path, monkeypatch):
+    import pandas as pd
+    output_file = tmp_path / "history.csv"
+    history = CalculationHistory(10)
+    observer = AutoSaveObserver(history, str(output_file), background=False)
+    history.append_values("add", 1, 2, 3)
+    observer.update_values("add", 1, 2, 3)
+    before = output_file.read_text()
+
+    def interrupted(self, path, **kwargs):
+        with open(path, "w") as f:
+            f.write("operation,oper")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pd.DataFrame, "to_csv", interrupted)
+    history.append_values("add", 3, 4, 7)
+    with pytest.raises(OSError, match="disk full"):
+        observer.update_values("add", 3, 4, 7)
+    assert output_file.read_text() == before
+@pytest.mark.parametrize("mode", ["incremental", "full"])
+def test_load_and_summary_file_see_rows_still_queued(monkeypatch, tmp_path, capsys, mode):
+    from app import config
+    from app.calculator import calculator
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_MODE", mode)
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_BACKGROUND", True)
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_FLUSH_INTERVAL", 10.0)
+    monkeypatch.setattr(config, "CALCULATOR_HISTORY_DIR", str(tmp_path))
+    inputs = iter(["add 1 2", "add 3 4", "summary file", "load", "exit"])
+    monkeypatch.setattr("builtins.input", lambda _: next(inputs))
+
+    with pytest.raises(SystemExit):
+        calculator()
+
+    output = capsys.readouterr().out
+    assert "Failed" not in output
+    assert "Loaded 2 calculations" in output
+    assert any(line.split()[:2] == ["add", "2"] for line in output.splitlines())
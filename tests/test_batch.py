@@ -0,0 +1,108 @@
+import io
+import pytest
+from app import config
+from app.batch import BufferedOutput, run_batch
+
+
+@pytest.fixture(autouse=True)
+def no_autosave(monkeypatch):
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE", False)
+
+
+def test_run_batch_from_file(tmp_path):
+    commands = tmp_path / "commands.txt"
+    commands.write_text("add 1 2\n\nmultiply 3 4\nundo\nredo\nfoobar\n")
+    output, report = io.StringIO(), io.StringIO()
+
+    count = run_batch(str(commands), output=output, report=report)
+
+    assert count == 6
+    lines = output.getvalue().splitlines()
+    assert lines == [
+        "Result: 3.0",
+        "Result: 12.0",
+        "Undid last operation.",
+        "Redid operation.",
+        "Unknown command: foobar",
+    ]
+    assert "Processed 6 commands" in report.getvalue()
+    assert "commands/s" in report.getvalue()
+
+
+def test_run_batch_stops_at_exit(monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.StringIO("add 1 1\nexit\nadd 2 2\n"))
+    output = io.StringIO()
+
+    count = run_batch("-", output=output, report=io.StringIO())
+
+    assert count == 2
+    assert "Result: 2.0" in output.getvalue()
+    assert "Result: 4.0" not in output.getvalue()
+    assert "Goodbye!" in output.getvalue()
+
+
+def test_run_batch_matches_interactive_errors(tmp_path):
+    commands = tmp_path / "commands.txt"
+    commands.write_text("divide 1 0\nadd 1\nadd a b\n")
+    output = io.StringIO()
+
+    run_batch(str(commands), output=output, report=io.StringIO())
+
+    text = output.getvalue()
+    assert "[ValueError] Cannot divide by zero" in text
+    assert "Usage: add <a> <b>" in text
+    assert "could not convert string to float" in text
+
+
+def test_buffered_output_flushes_in_chunks():
+    stream = io.StringIO()
+    buffered = BufferedOutput(stream, buffer_size=10)
+    buffered.write("12345")
+    assert stream.getvalue() == ""
+    buffered.write("67890")
+    assert stream.getvalue() == "1234567890"
+    buffered.write("x")
+    buffered.flush()
+    assert stream.getvalue() == "1234567890x"
+
+
+def test_run_batch_cache_command(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CALCULATOR_RESULT_CACHE_SIZE", 10000)
+    commands = tmp_path / "commands.txt"
+    commands.write_text("add 1 2\nadd 1 2\ndivide 1 0\ndivide 1 0\ncache\n")
+    output, report = io.StringIO(), io.StringIO()
+
+    run_batch(str(commands), output=output, report=report)
+
+    lines = output.getvalue().splitlines()
+    assert lines[:4] == ["Result: 3.0", "Result: 3.0",
+                         "[ValueError] Cannot divide by zero", "[ValueError] Cannot divide by zero"]
+    assert lines[4] == f"Result cache: 2/{config.CALCULATOR_RESULT_CACHE_SIZE} entries, 2 hits, 2 misses, 0 evictions"
+    assert "Result cache: 2 hits" in report.getvalue()
+
+
+def test_run_batch_cache_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CALCULATOR_RESULT_CACHE_SIZE", 0)
+    commands = tmp_path / "commands.txt"
+    commands.write_text("add 1 2\ncache\n")
+    output = io.StringIO()
+
+    run_batch(str(commands), output=output, report=io.StringIO())
+
+    assert output.getvalue().splitlines() == ["Result: 3.0", "Result cache is disabled."]
+
+
+def test_run_batch_eval_command(tmp_path):
+    commands = tmp_path / "commands.txt"
+    commands.write_text("eval (3 + 4) * 2 ^ 5\neval 1 / 3\neval 1 / 0\neval 1 +\neval\n")
+    output = io.StringIO()
+
+    run_batch(str(commands), output=output, report=io.StringIO())
+
+    assert output.getvalue().splitlines() == [
+        "Result: 224.0",
+        "Result: 0.33",
+        "[ValueError] Cannot divide by zero",
+        "[ValueError] Unexpected end of expression.",
+        "Usage: eval <expression>",
+    ]
@@ -0,0 +1,46 @@
+import json
+from benchmarks.suite import compare, main, run_suite
+
+
+def test_run_suite_covers_every_case(tmp_path):
+    results = run_suite(sizes=[5, 20], samples=2, batch=2, workdir=str(tmp_path))
+
+    names = {(r["name"], r["history_size"]) for r in results}
+    assert ("operations.add", None) in names
+    assert ("factory.create_calculation", None) in names
+    assert ("logging.update", None) in names
+    assert ("autosave.incremental.update", None) in names
+    for size in (5, 20):
+        for name in ("dispatch.process_command", "autosave.full.update", "dispatch.load.parse",
+                     "dispatch.load.cached"):
+            assert (name, size) in names
+    for r in results:
+        assert r["ops_per_second"] > 0
+        assert 0 < r["min_us"] <= r["p50_us"] <= r["p99_us"]
+
+
+def test_compare_reports_slowdowns_beyond_threshold():
+    baseline = [{"name": "a", "history_size": None, "p50_us": 1.0},
+                {"name": "b", "history_size": 10, "p50_us": 1.0}]
+    results = [{"name": "a", "history_size": None, "p50_us": 1.2},
+               {"name": "b", "history_size": 10, "p50_us": 1.5},
+               {"name": "c", "history_size": None, "p50_us": 9.0}]
+
+    regressions = compare(results, baseline, threshold=0.25)
+
+    assert [(r["name"], r["ratio"]) for r in regressions] == [("b", 1.5)]
+
+
+def test_main_writes_json_and_gates_on_baseline(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    args = ["--sizes", "5", "--samples", "2", "--batch", "2", "--output", str(output)]
+    assert main(args) == 0
+    report = json.loads(output.read_text())
+    assert report["results"]
+
+    baseline = tmp_path / "baseline.json"
+    for r in report["results"]:
+        r["p50_us"] /= 100
+    baseline.write_text(json.dumps(report))
+    assert main(args + ["--baseline", str(baseline)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,62 @@
+import io
+import pandas as pd
+from app.autosave import IncrementalAutoSaveObserver
+from app.bulk import compute_csv
+from app.calculation import CalculationFactory
+import app.calculation_operations  # registers the operations
+
+
+def test_compute_csv_streams_chunks(tmp_path):
+    input_file = tmp_path / "input.csv"
+    output_file = tmp_path / "output.csv"
+    pd.DataFrame({
+        "operation": ["add", "divide", "square_root", "divide", "unknown", "power"],
+        "operand1": [1, 1, 16, 1, 1, 2],
+        "operand2": [2, 0, 0, 4, 1, 3],
+    }).to_csv(input_file, index=False)
+    report = io.StringIO()
+
+    totals = compute_csv(str(input_file), str(output_file), chunk_size=4, report=report)
+
+    df = pd.read_csv(output_file)
+    assert df["operation"].tolist() == ["add", "divide", "square_root", "divide", "unknown", "power"]
+    assert df["result"].tolist()[0] == 3
+    assert df["result"].tolist()[2:4] == [4, 0.25]
+    assert df["error"].tolist() == [False, True, False, False, True, False]
+    assert "expected" not in df.columns
+    assert totals == {"rows": 6, "errors": 2, "mismatches": 0}
+    assert "rows/s" in report.getvalue()
+
+
+def test_compute_csv_verifies_autosaved_history(tmp_path):
+    history_file = tmp_path / "history.csv"
+    output_file = tmp_path / "verified.csv"
+    observer = IncrementalAutoSaveObserver(output_file=str(history_file))
+    for name, a, b in [("add", 1, 2), ("multiply", 2, 3), ("divide", 1, 3)]:
+        calc = CalculationFactory.create_calculation(name, a, b)
+        calc.result = round(calc.execute(), 2)
+        observer.update(calc)
+    observer.on_undo(calc)
+    observer.close()
+
+    # Corrupt the expected value of the first row.
+    content = history_file.read_text().replace("add,1,2,3", "add,1,2,4")
+    history_file.write_text(content)
+
+    totals = compute_csv(str(history_file), str(output_file), report=io.StringIO())
+
+    df = pd.read_csv(output_file)
+    assert len(df) == 3  # the tombstone row is skipped
+    assert df["match"].tolist() == [False, True, True]
+    assert totals["mismatches"] == 1
+
+
+def test_compute_csv_empty_input(tmp_path):
+    input_file = tmp_path / "input.csv"
+    input_file.write_text("operation,operand1,operand2\n")
+    output_file = tmp_path / "output.csv"
+
+    totals = compute_csv(str(input_file), str(output_file), report=io.StringIO())
+
+    assert totals["rows"] == 0
+    assert output_file.read_text().startswith("operation,operand1,operand2,result,error")
@@ -54,3 +54,11 @@ def test_integer_division_by_zero():
 def test_unregistered_calculation():
     with pytest.raises(ValueError, match="Calculation fake_op is not registered."):
         CalculationFactory.create_calculation("fake_op", 1, 1)
+
+
+def test_registered_is_a_read_only_view():
+    import app.calculation_operations  # registers the operations
+    registered = CalculationFactory.registered()
+    assert registered["add"].__name__ == "add"
+    with pytest.raises(TypeError):
+        registered["add"] = None
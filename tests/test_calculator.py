@@ -26,7 +26,7 @@ def test_display_help_output(capsys):
 def test_display_history(mock_readline, capsys):
     mock_readline.get_current_history_length.return_value = 2
     mock_readline.get_history_item.side_effect = ["add 1 2", "multiply 3 4"]
-    display_history([])
+    display_history()
     output = capsys.readouterr().out
     assert "0: add 1 2" in output
     assert "1: multiply 3 4" in output
@@ -82,17 +82,13 @@ def test_invalid_number_input(mock_exit, mock_input, capsys):
 @patch("builtins.input", side_effect=infinite_inputs("add 2 3", "exit"))
 @patch("sys.exit", side_effect=SystemExit)
 def test_valid_add_command(mock_exit, mock_input, mock_create, capsys):
-    mock_calc = MagicMock()
-    mock_calc.execute.return_value = 5
-    mock_create.return_value = mock_calc
-
     with pytest.raises(SystemExit):
         calculator()
 
     output = capsys.readouterr().out
-    assert "Result: 5" in output
-    mock_create.assert_called_once_with("add", 2.0, 3.0)
-    mock_calc.execute.assert_called_once()
+    assert "Result: 5.0" in output
+    # The default observers take plain values, so no Calculation is created.
+    mock_create.assert_not_called()
 
 
 # --------- Interrupt Handling ---------
@@ -124,7 +120,7 @@ def test_observer_raises_generic_exception(monkeypatch, capsys):
 
     # Patch observers to raise a generic Exception
     bad_observer = MagicMock()
-    bad_observer.update.side_effect = Exception("Something unexpected")
+    bad_observer.update_values.side_effect = Exception("Something unexpected")
 
     with patch("app.calculator.LoggingObserver", return_value=bad_observer), \
          patch("app.calculator.AutoSaveObserver", return_value=bad_observer):
@@ -0,0 +1,83 @@
+import pytest
+from app.calculation import Calculation, CalculationFactory
+from app.calculator import COMMANDS, display_help, process_command
+from app.calculator_memento import MementoManager
+from app.commands import CommandRegistry
+from app.history_store import CalculationHistory
+import app.calculation_operations  # registers the operations
+
+
+@pytest.fixture
+def session():
+    history = CalculationHistory(10)
+    return history, MementoManager(history)
+
+
+def run(command, session):
+    history, memento_manager = session
+    return process_command(command, history, [], memento_manager)
+
+
+def test_registry_looks_up_names_and_aliases():
+    registry = CommandRegistry()
+    handler = lambda *args: None
+    registry.register("ping", handler, 1, "<host>", "Ping a host", aliases=("p",))
+
+    assert registry.get("ping") is registry.get("p")
+    assert registry.get("ping").arity == 1
+    assert registry.get("pong") is None
+    assert registry.help_lines() == ["  ping <host>       - Ping a host"]
+
+    registry.register("p", handler, description="Replaces the alias")
+    assert [line.split()[0] for line in registry.help_lines()] == ["ping", "p"]
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("root 16 0", "Result: 4.0"),
+    ("square_root 16 0", "Result: 4.0"),
+    ("int_divide 7 2", "Result: 3"),
+    ("percent 50 200", "Result: 25.0"),
+    ("abs_diff 3 10", "Result: 7.0"),
+])
+def test_aliases_dispatch_to_the_registered_calculation(command, expected, session, capsys):
+    run(command, session)
+    assert capsys.readouterr().out.strip() == expected
+
+
+def test_arity_is_checked_before_the_handler(session, capsys):
+    run("root 16", session)
+    run("undo now", session)
+    assert capsys.readouterr().out.splitlines() == ["Usage: root <a> <b>", "Usage: undo"]
+
+
+def test_new_calculations_are_dispatched_and_listed(session, capsys, monkeypatch):
+    monkeypatch.setattr(CalculationFactory, "_calculations", dict(CalculationFactory._calculations))
+    monkeypatch.setattr(COMMANDS, "_commands", dict(COMMANDS._commands))
+    monkeypatch.setattr(COMMANDS, "_order", list(COMMANDS._order))
+    monkeypatch.setattr(COMMANDS, "_help", None)
+
+    class hypotenuse(Calculation):
+        __slots__ = ()
+        command_aliases = ("hypot",)
+        description = "Length of the hypotenuse of a right triangle with legs a and b"
+
+        def execute(self) -> float:
+            self.result = (self.a ** 2 + self.b ** 2) ** 0.5
+            return self.result
+
+    CalculationFactory.register_calculation(hypotenuse)
+    run("hypot 3 4", session)
+    run("hypotenuse 6 8", session)
+    display_help()
+
+    out = capsys.readouterr().out.splitlines()
+    assert out[:2] == ["Result: 5.0", "Result: 10.0"]
+    assert "  hypot <a> <b>     - Length of the hypotenuse of a right triangle with legs a and b" in out
+    assert [c.__class__.__name__ for c in session[0]] == ["hypotenuse", "hypotenuse"]
+
+    run("eval hypot(3, 4) + 1", session)
+    run("history op=hypot", session)
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == "Result: 6.0"
+    assert out[1:] == ["Calculations 1-2 of 2 (page 1/1):", "  #2: hypotenuse 6.0 8.0 = 10.0",
+                       "  #1: hypotenuse 3.0 4.0 = 5.0"]
@@ -0,0 +1,113 @@
+import math
+import subprocess
+import sys
+import numpy as np
+import pytest
+from app import config
+from app.calculation import CalculationFactory
+from app.expression import CALL, CONST, NEG, VAR, compile_expression, evaluate_expression
+import app.calculation_operations  # registers the operations
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("(3 + 4) * 2 ^ 5", 224),
+    ("2 ^ 3 ^ 2", 512),
+    ("-2 ^ 2", -4),
+    ("2 ^ -1", 0.5),
+    ("10 - 4 - 3", 3),
+    ("10 // 3 + 7 % 4", 6),
+    ("root(16) + percent(50, 20)", 254),
+    ("abs_diff(3, 10) * -(1 + 1)", -14),
+    ("1.5e2 + .5", 150.5),
+])
+def test_evaluate(source, expected):
+    assert evaluate_expression(source) == expected
+
+
+def test_constants_are_folded():
+    assert compile_expression("(3 + 4) * 2 ^ 5").program == ((CONST, 224.0),)
+    assert compile_expression("-(x) * (2 + 3)").program == (
+        (VAR, "x"), (NEG, None), (CONST, 5.0), (CALL, "multiply"))
+
+
+def test_failing_constants_are_not_folded():
+    assert compile_expression("1 / 0").program[-1] == (CALL, "divide")
+    with pytest.raises(ValueError, match="Cannot divide by zero"):
+        evaluate_expression("1 / 0")
+
+
+def test_compiled_expressions_are_cached():
+    assert compile_expression("x * 2 + y") is compile_expression("x * 2 + y")
+
+
+def test_variables():
+    compiled = compile_expression("x * 2 + y")
+    assert compiled.variables == ("x", "y")
+    assert compiled.evaluate({"x": 3, "y": 1}) == 7
+    with pytest.raises(ValueError, match="Unbound variable: y"):
+        compiled.evaluate({"x": 3})
+
+
+@pytest.mark.parametrize("source, message", [
+    ("", "Empty expression"),
+    ("(1 + 2", "Unexpected end"),
+    ("1 + * 2", "Unexpected '\\*'"),
+    ("1 2", "Unexpected '2'"),
+    ("foo(1)", "Unknown function: foo"),
+    ("3 $ 4", "Invalid character '\\$'"),
+    ("add(1, 2 3)", "Expected '\\)'"),
+])
+def test_syntax_errors(source, message):
+    with pytest.raises(ValueError, match=message):
+        compile_expression(source)
+
+
+def test_evaluate_many_matches_scalar_evaluation():
+    rng = np.random.default_rng(7)
+    x = np.round(rng.uniform(-100, 100, 2000), 2)
+    y = np.round(rng.uniform(-10, 10, 2000), 1)
+    y[::50] = 0
+    compiled = compile_expression("(x + 3) / y - abs_diff(x, y) * 2 ^ 3 + x // y")
+
+    results, errors = compiled.evaluate_many({"x": x, "y": y}, precision=4)
+
+    for i in range(len(x)):
+        try:
+            expected = round(compiled.evaluate({"x": x[i], "y": y[i]}), 4)
+            assert not errors[i] and results[i] == expected
+        except ValueError:
+            assert errors[i] and math.isnan(results[i])
+    assert 40 <= errors.sum() < len(x)
+
+
+def test_evaluate_many_broadcasts_scalars():
+    results, errors = compile_expression("x * k").evaluate_many({"x": [1, 2, 3], "k": 10})
+    assert results.tolist() == [10, 20, 30]
+    assert not errors.any()
+    with pytest.raises(ValueError, match="Unbound variable: k"):
+        compile_expression("x * k").evaluate_many({"x": [1]})
+
+
+@pytest.mark.parametrize("name", sorted(CalculationFactory._calculations))
+def test_function_calls_match_calculations(name):
+    compiled = compile_expression(f"{name}(x, y)")
+    for x, y in [(7.5, 2.0), (3.0, -1.5), (16.0, 3.0)]:
+        expected = CalculationFactory.create_calculation(name, x, y).execute()
+        assert compiled.evaluate({"x": x, "y": y}) == expected
+
+
+def test_importing_the_module_alone_registers_the_operations():
+    code = "from app.expression import evaluate_expression; print(evaluate_expression('root(16, 2) + 1'))"
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == "5.0"
+
+
+def test_literals_above_the_input_limit_are_rejected(monkeypatch):
+    with pytest.raises(ValueError, match="exceed the maximum"):
+        evaluate_expression("1e400 - 1")
+    assert evaluate_expression("500 * 2") == 1000
+    monkeypatch.setattr(config, "CALCULATOR_MAX_INPUT_VALUE", 100)
+    with pytest.raises(ValueError, match="exceed the maximum"):
+        evaluate_expression("500 * 2")  # compiled before the limit was lowered
+    with pytest.raises(ValueError, match="exceed the maximum"):
+        compile_expression("x + 500").evaluate_many({"x": np.arange(3)})
@@ -0,0 +1,108 @@
+import csv
+import math
+import pytest
+from app import config
+from app.calculator import create_observers, process_command
+from app.calculator_memento import MementoManager
+from app.history_binary import (BinaryAutoSaveObserver, binary_to_csv, csv_to_binary, is_binary_history,
+                                load_binary_history, write_binary_history)
+from app.history_store import CalculationHistory
+import app.calculation_operations  # registers the operations
+
+
+def filled_history(entries):
+    history = CalculationHistory(10)
+    for operation, a, b, result in entries:
+        history.append_values(operation, a, b, result)
+    return history
+
+
+def test_round_trip_keeps_exact_floats(tmp_path):
+    path = str(tmp_path / "history.bin")
+    history = filled_history([("add", 0.1, 0.2, 0.1 + 0.2), ("divide", 1.0, 3.0, 1 / 3),
+                              ("square_root", -4.0, 0.0, None)])
+    write_binary_history(history, path)
+
+    loaded = load_binary_history(path)
+    assert is_binary_history(path)
+    assert [loaded.names[c] for c in loaded.codes] == ["add", "divide", "square_root"]
+    assert loaded.a.tolist() == [0.1, 1.0, -4.0]
+    assert loaded.results[:2].tolist() == [0.1 + 0.2, 1 / 3]
+    assert math.isnan(loaded.results[2])
+    assert not loaded.a.flags.writeable  # a view of the mapped file
+
+    newest = load_binary_history(path, capacity=2)
+    assert newest.a.tolist() == [1.0, -4.0]
+
+
+def test_empty_history_and_bad_files(tmp_path):
+    path = str(tmp_path / "history.bin")
+    write_binary_history(CalculationHistory(5), path)
+    assert len(load_binary_history(path)) == 0
+
+    (tmp_path / "history.csv").write_text("operation,operand1,operand2,result\n")
+    assert not is_binary_history(str(tmp_path / "history.csv"))
+    with pytest.raises(ValueError, match="not a binary history file"):
+        load_binary_history(str(tmp_path / "history.csv"))
+    write_binary_history(filled_history([("add", 1.0, 2.0, 3.0)] * 4), path)
+    with open(path, "r+b") as f:
+        f.truncate(80)
+    with pytest.raises(ValueError, match="truncated"):
+        load_binary_history(path)
+
+
+def test_csv_conversion_round_trip(tmp_path):
+    source = tmp_path / "history.csv"
+    with open(source, "w", newline="") as f:
+        csv.writer(f).writerows([["operation", "operand1", "operand2", "result"], ["add", "1", "2", "3"],
+                                 ["multiply", "2", "3", "6"], ["__undo__", "", "", ""], ["power", "2", "10", "1024"],
+                                 ["cube", "2", "0", "8"]])
+
+    assert csv_to_binary(str(source), str(tmp_path / "history.bin")) == 2
+    assert binary_to_csv(str(tmp_path / "history.bin"), str(tmp_path / "back.csv")) == 2
+    with open(tmp_path / "back.csv", newline="") as f:
+        assert list(csv.reader(f))[1:] == [["add", "1.0", "2.0", "3.0"], ["power", "2.0", "10.0", "1024.0"]]
+
+
+def test_binary_mode_saves_and_loads(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(config, "CALCULATOR_HISTORY_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE", True)
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_MODE", "binary")
+    monkeypatch.setattr(config, "CALCULATOR_LOG_CALCULATIONS", False)
+    history = CalculationHistory(5)
+    memento_manager = MementoManager(history)
+    observers = create_observers(history)
+    assert isinstance(observers[-1], BinaryAutoSaveObserver)
+    for command in ("add 1 2", "multiply 2 3", "undo", "divide 9 3"):
+        process_command(command, history, observers, memento_manager)
+    for observer in observers:
+        observer.close()
+
+    restored = CalculationHistory(5)
+    restored_manager = MementoManager(restored)
+    capsys.readouterr()
+    process_command("load", restored, [], restored_manager)
+    assert capsys.readouterr().out.splitlines()[0] == f"Loaded 2 calculations from {tmp_path / 'history.bin'}."
+    assert [(c.__class__.__name__, c.result) for c in restored] == [("add", 3.0), ("divide", 3.0)]
+    assert restored_manager.can_undo()
+
+    process_command("summary file", restored, [], restored_manager)
+    assert "add" in capsys.readouterr().out
+
+
+def test_binary_autosave_writes_off_the_command_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_FLUSH_INTERVAL", 10.0)
+    path = tmp_path / "history.bin"
+    history = CalculationHistory(50)
+    observer = BinaryAutoSaveObserver(history, str(path), background=True)
+    for i in range(100):
+        history.append_values("add", float(i), 1.0, i + 1.0)
+        observer.update_values("add", float(i), 1.0, i + 1.0)
+    history.pop()
+    observer.on_undo(None)
+    assert not path.exists()
+    observer.close()
+
+    loaded = load_binary_history(str(path))
+    assert len(loaded) == 49 and loaded.a[-1] == 98.0
+    assert observer.writer.stats()["flushes"] == 1
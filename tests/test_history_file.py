@@ -0,0 +1,121 @@
+import csv
+import random
+import pytest
+from app import config
+from app import history_file
+from app.autosave import CLEAR_MARKER, UNDO_MARKER, replay_rows
+from app.calculator import process_command
+from app.calculator_memento import MementoManager
+from app.history_file import load_history_file
+from app.history_store import CalculationHistory
+from app.session_state import SessionStateObserver, load_session_state
+import app.calculation_operations  # registers the operations
+
+
+def write_rows(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["operation", "operand1", "operand2", "result"])
+        writer.writerows(rows)
+
+
+def random_rows(count, seed):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.2:
+            rows.append([UNDO_MARKER, "", "", ""])
+        elif roll < 0.22:
+            rows.append([CLEAR_MARKER, "", "", ""])
+        else:
+            a, b = rng.randint(-50, 50), rng.randint(1, 9)
+            operation = rng.choice(["add", "multiply", "divide"])
+            result = {"add": a + b, "multiply": a * b, "divide": a / b}[operation]
+            rows.append([operation, str(a), str(b), "" if i % 17 == 0 else str(result)])
+    return rows
+
+
+@pytest.mark.parametrize("capacity", [1, 7, 1000])
+def test_chunked_parse_matches_row_by_row_replay(tmp_path, monkeypatch, capacity):
+    monkeypatch.setattr(history_file, "CHUNK_SIZE", 13)
+    rows = random_rows(600, capacity) + [["add", "1", "2", "3"]] * 40  # ends with a tombstone-free chunk
+    path = tmp_path / "history.csv"
+    write_rows(path, rows)
+
+    loaded = load_history_file(str(path), capacity)
+    expected = replay_rows(rows, capacity)
+    assert [loaded.names[c] for c in loaded.codes] == [row[0] for row in expected]
+    assert loaded.a.tolist() == [float(row[1]) for row in expected]
+    assert [None if r != r else r for r in loaded.results.tolist()] == [
+        float(row[3]) if row[3] else None for row in expected]
+
+
+def test_tombstones_are_not_operation_names(tmp_path):
+    path = tmp_path / "history.csv"
+    write_rows(path, [[UNDO_MARKER, "", "", ""], ["add", "1", "2", "3"], [CLEAR_MARKER, "", "", ""],
+                      ["power", "2", "3", "8"], [UNDO_MARKER, "", "", ""], ["multiply", "2", "3", "6"]])
+
+    loaded = history_file.parse_history_csv(str(path), 10)
+    assert loaded.names == ["add", "power", "multiply"]
+    assert [loaded.names[c] for c in loaded.codes] == ["multiply"]
+
+
+def test_more_operations_than_codes_are_rejected(tmp_path, monkeypatch):
+    from app.calculation import CalculationFactory
+    names = [f"operation{i}" for i in range(257)]
+    monkeypatch.setattr(CalculationFactory, "_calculations",
+                        dict(CalculationFactory._calculations, **{name: object for name in names}))
+    path = tmp_path / "history.csv"
+    write_rows(path, [[name, "1", "2", "3"] for name in names])
+
+    with pytest.raises(ValueError, match="Too many distinct operations"):
+        history_file.parse_history_csv(str(path), 1000)
+
+
+def test_unchanged_file_is_not_parsed_again(tmp_path, monkeypatch):
+    path = tmp_path / "history.csv"
+    write_rows(path, [["add", "1", "2", "3"], ["cube", "2", "0", "8"]])
+    calls = []
+    parse = history_file.parse_history_csv
+    monkeypatch.setattr(history_file, "parse_history_csv", lambda *args: calls.append(args) or parse(*args))
+
+    first = load_history_file(str(path), 10)
+    assert load_history_file(str(path), 10) is first
+    assert first.skipped == 1 and len(first) == 1
+    write_rows(path, [["add", "1", "2", "3"], ["add", "2", "2", "4"]])
+    assert len(load_history_file(str(path), 10)) == 2
+    assert len(calls) == 2
+
+
+def test_load_restores_history_and_pages_output(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(config, "CALCULATOR_HISTORY_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "CALCULATOR_HISTORY_PAGE_SIZE", 2)
+    write_rows(tmp_path / "history.csv", [["add", "1", "2", "3"], ["multiply", "3", "4", "12"],
+                                          [UNDO_MARKER, "", "", ""], ["divide", "8", "2", "4"]])
+    history = CalculationHistory(5)
+    memento_manager = MementoManager(history)
+    process_command("add 9 9", history, [], memento_manager)
+    observer = SessionStateObserver(history, str(tmp_path / "session.bin"))
+    capsys.readouterr()
+
+    process_command("load", history, [observer], memento_manager)
+    assert capsys.readouterr().out.splitlines() == [
+        f"Loaded 2 calculations from {tmp_path / 'history.csv'}.",
+        "Calculations 1-2 of 2 (page 1/1):",
+        "  #2: divide 8.0 2.0 = 4.0", "  #1: add 1.0 2.0 = 3.0"]
+    assert not memento_manager.can_redo()
+    assert memento_manager.undo().__class__.__name__ == "divide"
+    observer.on_undo(None)
+    observer.close()
+
+    restored = CalculationHistory(5)
+    load_session_state(str(tmp_path / "session.bin"), restored, MementoManager(restored))
+    assert [(c.a, c.b) for c in restored] == [(1.0, 2.0)]
+
+
+def test_load_reports_missing_file(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(config, "CALCULATOR_HISTORY_DIR", str(tmp_path))
+    history = CalculationHistory(5)
+    process_command("load", history, [], MementoManager(history))
+    assert capsys.readouterr().out.startswith("Failed to load history:")
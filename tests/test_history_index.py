@@ -0,0 +1,111 @@
+import math
+import random
+import pytest
+from app import config
+from app.calculator import process_command
+from app.calculator_memento import MementoManager
+from app.history_index import HistoryQuery, _SortedResults, parse_query, search
+from app.history_store import CalculationHistory
+import app.calculation_operations  # registers the operations
+
+
+def brute_force(history, query):
+    first = history.next_position - len(history)
+    matches = []
+    for i in range(len(history) - 1, -1, -1):
+        calc = history[i]
+        result = math.nan if calc.result is None else calc.result
+        if query.operation is not None and calc.__class__.__name__ != query.operation:
+            continue
+        if any(r is not None and not r[0] <= v <= r[1]
+               for r, v in ((query.a, calc.a), (query.b, calc.b), (query.result, result))):
+            continue
+        matches.append(first + i)
+    return matches[:query.last]
+
+
+def test_index_follows_appends_evictions_undo_and_redo():
+    rng = random.Random(7)
+    history = CalculationHistory(50)
+    memento_manager = MementoManager(history)
+    operations = ["add", "subtract", "multiply", "divide"]
+    queries = [HistoryQuery(), HistoryQuery(operation="divide"), HistoryQuery(result=(-5.0, 5.0)),
+               HistoryQuery(operation="add", result=(0.0, math.inf), last=3),
+               HistoryQuery(a=(2.0, 6.0), b=(1.0, 1.0)), HistoryQuery(operation="multiply", a=(-3.0, 3.0), last=2),
+               HistoryQuery(operation="power")]
+    history.index()
+    for step in range(3000):
+        roll = rng.random()
+        if roll < 0.15 and memento_manager.can_undo():
+            memento_manager.undo()
+        elif roll < 0.25 and memento_manager.can_redo():
+            memento_manager.redo()
+        elif roll < 0.26:
+            history.clear()
+            memento_manager.clear()
+        else:
+            a, b = rng.randint(-9, 9), rng.randint(-3, 3)
+            result = None if rng.random() < 0.05 else float(rng.randint(-20, 20))
+            memento_manager.save_state(history.append_values(rng.choice(operations), a, b, result))
+        if step % 50 == 0:
+            for query in queries:
+                assert list(search(history, query)) == brute_force(history, query)
+
+
+def test_sorted_results_keep_positions_of_equal_results_in_order():
+    rng = random.Random(1)
+    values = [float(rng.randint(0, 700)) for _ in range(5000)]
+    results = _SortedResults((v, p) for p, v in enumerate(values[:1000]))
+    for position in range(1000, 5000):
+        results.add(values[position], position)
+    for position in range(2500):
+        results.remove_first(values[position])
+    for position in range(4999, 4000, -1):
+        results.remove_last(values[position])
+    expected = sorted((values[p], p) for p in range(2500, 4001) if 100 <= values[p] <= 120)
+    assert results.positions_between(100, 120) == [p for _, p in expected]
+    assert len(results) == 1501
+
+
+def test_parse_query():
+    assert parse_query(["op=ROOT", "result=10:", "a=:2", "b=3", "last=5", "page=2"]) == HistoryQuery(
+        "square_root", (-math.inf, 2.0), (3.0, 3.0), (10.0, math.inf), 5, 2)
+    assert parse_query(["op=percent"]).operation == "percentage"
+    assert parse_query(["op=abs_diff"]).operation == "absolute_difference"
+    for args in (["op"], ["last=0"], ["page=x"], ["result=a:b"], ["colour=red"]):
+        with pytest.raises(ValueError):
+            parse_query(args)
+
+
+def test_history_command_pages(capsys, monkeypatch):
+    monkeypatch.setattr(config, "CALCULATOR_HISTORY_PAGE_SIZE", 2)
+    history = CalculationHistory(10)
+    memento_manager = MementoManager(history)
+    for command in ("add 1 2", "multiply 3 4", "add 5 6", "divide 1 0", "add 10 1"):
+        process_command(command, history, [], memento_manager)
+    capsys.readouterr()
+
+    process_command("history op=add", history, [], memento_manager)
+    assert capsys.readouterr().out.splitlines() == [
+        "Calculations 1-2 of 3 (page 1/2):", "  #4: add 10.0 1.0 = 11.0", "  #3: add 5.0 6.0 = 11.0"]
+    process_command("history op=add page=2", history, [], memento_manager)
+    assert capsys.readouterr().out.splitlines() == [
+        "Calculations 3-3 of 3 (page 2/2):", "  #1: add 1.0 2.0 = 3.0"]
+    process_command("history result=11 a=:6", history, [], memento_manager)
+    assert "#3: add 5.0 6.0 = 11.0" in capsys.readouterr().out
+    process_command("history op=power", history, [], memento_manager)
+    assert capsys.readouterr().out == "No matching calculations.\n"
+    process_command("history last=x", history, [], memento_manager)
+    assert "last must be a positive integer." in capsys.readouterr().out
+
+
+def test_unfiltered_search_does_not_build_the_index():
+    history = CalculationHistory(1000)
+    for i in range(1000):
+        history.append_values("add", i, 1, i + 1)
+
+    positions = search(history, HistoryQuery())
+    assert isinstance(positions, range) and len(positions) == 1000 and positions[0] == 999
+    assert list(search(history, HistoryQuery(a=(5.0, 7.0)))) == [7, 6, 5]
+    assert list(search(history, HistoryQuery(last=3))) == [999, 998, 997]
+    assert history._index is None
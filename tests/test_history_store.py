@@ -0,0 +1,125 @@
+import math
+import tracemalloc
+import numpy as np
+import pytest
+from app.calculation import CalculationFactory
+from app.history_store import CalculationHistory
+import app.calculation_operations  # registers the operations
+
+
+def make_calc(name, a, b):
+    calc = CalculationFactory.create_calculation(name, a, b)
+    calc.result = round(calc.execute(), 2)
+    return calc
+
+
+def test_append_and_read_back():
+    history = CalculationHistory(10)
+    history.append(make_calc("add", 1, 2))
+    history.append_values("divide", 1.0, 3.0, 0.33)
+
+    assert len(history) == 2
+    assert history[0].__class__.__name__ == "add"
+    assert history[0].result == 3
+    assert history[-1].string() == "divide(1.0, 3.0)"
+    assert [c.result for c in history] == [3, 0.33]
+    assert [c.a for c in history[0:2]] == [1, 1]
+
+
+def test_oldest_entries_are_evicted():
+    history = CalculationHistory(3)
+    for i in range(5):
+        history.append_values("add", i, i, 2 * i)
+
+    assert len(history) == 3
+    assert [c.a for c in history] == [2, 3, 4]
+
+
+def test_snapshot_is_unaffected_by_later_changes():
+    history = CalculationHistory(4)
+    for i in range(6):  # wraps around
+        history.append_values("add", i, i, 2 * i)
+    snapshot = history.snapshot()
+    history.append_values("multiply", 9, 9, 81)
+    history.pop()
+    history.pop()
+
+    assert [c.a for c in snapshot] == [2, 3, 4, 5]
+    assert snapshot.next_position == 6
+    assert list(snapshot.to_dataframe()["operand1"]) == [2, 3, 4, 5]
+    assert history._start == 3  # not rotated by taking the snapshot
+    assert len(CalculationHistory(4).snapshot()) == 0
+
+
+def test_index_out_of_range():
+    history = CalculationHistory(2)
+    with pytest.raises(IndexError):
+        history[0]
+    with pytest.raises(IndexError):
+        history.pop()
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        CalculationHistory(0)
+
+
+def test_pop_remove_and_clear():
+    history = CalculationHistory(3)
+    first, second, third, fourth = (make_calc("add", i, i) for i in range(4))
+    for calc in (first, second, third, fourth):
+        history.append(calc)
+
+    assert first not in history  # evicted
+    assert third in history
+    history.remove(third)
+    assert [c.a for c in history] == [1, 3]
+    assert history.pop().a == 3
+    with pytest.raises(ValueError):
+        history.remove(fourth)
+    history.clear()
+    assert len(history) == 0
+
+
+def test_missing_result_round_trips_as_none():
+    history = CalculationHistory(2)
+    history.append(CalculationFactory.create_calculation("add", 1, 1))
+    assert history[0].result is None
+    assert CalculationFactory.create_calculation("add", 1, 1) in history
+
+
+def test_to_dataframe_shares_memory_after_wrapping():
+    history = CalculationHistory(4)
+    for i in range(6):
+        history.append_values("multiply" if i % 2 else "add", i, 2, i * 2)
+
+    df = history.to_dataframe()
+    assert df["operation"].tolist() == ["add", "multiply", "add", "multiply"]
+    assert df["operand1"].tolist() == [2, 3, 4, 5]
+    view = np.frombuffer(history.columns()["operand1"], dtype=np.float64)
+    assert np.shares_memory(df["operand1"].to_numpy(), view)
+
+
+def test_empty_to_dataframe():
+    df = CalculationHistory(4).to_dataframe()
+    assert list(df.columns) == ["operation", "operand1", "operand2", "result"]
+    assert len(df) == 0
+
+
+def test_calculations_have_no_instance_dict():
+    calc = make_calc("add", 1, 2)
+    assert not hasattr(calc, "__dict__")
+
+
+def test_memory_per_entry_is_a_fraction_of_object_list():
+    entries = 100_000
+    tracemalloc.start()
+    history = CalculationHistory(entries)
+    for i in range(entries + 1):  # wrap around once
+        history.append_values("add", float(i), 0.5, i + 0.5)
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Four columns: 1 byte operation code + three 8-byte floats.
+    assert store_bytes / entries < 30
+    assert not math.isnan(history[-1].result)
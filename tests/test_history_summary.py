@@ -0,0 +1,100 @@
+import math
+import random
+import pytest
+from app import config
+from app.autosave import IncrementalAutoSaveObserver
+from app.calculator import process_command
+from app.calculator_memento import MementoManager
+from app.history_store import CalculationHistory
+from app.history_summary import summarize_csv
+import app.calculation_operations  # registers the operations
+
+
+def expected_rows(history):
+    groups = {}
+    for calc in history:
+        groups.setdefault(calc.__class__.__name__, []).append(calc.result)
+    rows = []
+    for name in sorted(groups):
+        results = [r for r in groups[name] if r is not None]
+        rows.append({"operation": name, "count": len(groups[name]),
+                     "sum": sum(results) if results else None,
+                     "mean": sum(results) / len(results) if results else None,
+                     "min": min(results) if results else None, "max": max(results) if results else None})
+    return rows
+
+
+def assert_rows_equal(actual, expected):
+    assert [(r["operation"], r["count"]) for r in actual] == [(r["operation"], r["count"]) for r in expected]
+    for a, e in zip(actual, expected):
+        for key in ("sum", "mean", "min", "max"):
+            assert (a[key] is None) == (e[key] is None)
+            if a[key] is not None:
+                assert a[key] == pytest.approx(e[key])
+
+
+def test_summary_follows_appends_evictions_undo_and_redo():
+    rng = random.Random(11)
+    history = CalculationHistory(40)
+    memento_manager = MementoManager(history)
+    history.summary()
+    for step in range(3000):
+        roll = rng.random()
+        if roll < 0.15 and memento_manager.can_undo():
+            memento_manager.undo()
+        elif roll < 0.25 and memento_manager.can_redo():
+            memento_manager.redo()
+        elif roll < 0.255:
+            history.clear()
+            memento_manager.clear()
+        else:
+            result = None if rng.random() < 0.05 else float(rng.randint(-50, 50))
+            position = history.append_values(rng.choice(["add", "subtract", "power"]), 1.0, 2.0, result)
+            memento_manager.save_state(position)
+        if step % 25 == 0:
+            assert_rows_equal(history.summary().rows(), expected_rows(history))
+
+
+def test_repeated_summary_does_not_rescan(monkeypatch):
+    history = CalculationHistory(100)
+    history.append_values("add", 2.0, 3.0, 5.0)
+    for i in range(99):
+        history.append_values("add", float(i), 1.0, float(i % 10))
+    summary = history.summary()
+    monkeypatch.setattr(summary, "_reduce", lambda codes: pytest.fail("rescanned the history"))
+    history.append_values("add", 1.0, 1.0, 2.0)  # evicts the 5.0, which is not an extreme
+    row = summary.rows()[0]
+    assert (row["count"], row["min"], row["max"]) == (100, 0.0, 9.0)
+
+
+def test_summarize_csv_applies_tombstones(tmp_path):
+    path = str(tmp_path / "history.csv")
+    observer = IncrementalAutoSaveObserver(output_file=path, background=False)
+    history = CalculationHistory(10)
+    memento_manager = MementoManager(history)
+    for command in ("add 1 2", "add 3 4", "divide 9 3", "undo", "multiply 2 5"):
+        process_command(command, history, [observer], memento_manager)
+    observer.close()
+    assert_rows_equal(summarize_csv(path), expected_rows(history))
+
+
+def test_summary_command(capsys, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CALCULATOR_HISTORY_DIR", str(tmp_path))
+    history = CalculationHistory(10)
+    memento_manager = MementoManager(history)
+    process_command("summary", history, [], memento_manager)
+    assert capsys.readouterr().out == "No calculations to summarize.\n"
+
+    for command in ("add 1 2", "add 3 4", "divide 9 3"):
+        process_command(command, history, [], memento_manager)
+    capsys.readouterr()
+    process_command("summary", history, [], memento_manager)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1].split() == ["add", "2", "10.00", "5.00", "3.00", "7.00"]
+    assert lines[2].split() == ["divide", "1", "3.00", "3.00", "3.00", "3.00"]
+    assert lines[3].split() == ["total", "3"]
+
+    process_command("summary file", history, [], memento_manager)
+    assert "Failed to summarize" in capsys.readouterr().out
+    process_command("summary everything", history, [], memento_manager)
+    assert capsys.readouterr().out == "Usage: summary [file]\n"
@@ -0,0 +1,88 @@
+import json
+from app.calculator import process_command
+from app.calculator_memento import MementoManager
+from app.history import HistoryObserver
+from app.history_store import CalculationHistory
+from app.instrumentation import Instrumentation, LatencyHistogram
+from app.result_cache import ResultCache
+import app.calculation_operations  # registers the operations
+
+
+class RecordingObserver(HistoryObserver):
+    def update(self, calculation):
+        pass
+
+
+def run(commands, stats, observers=(), cache=None):
+    history = CalculationHistory(10)
+    memento_manager = MementoManager(history)
+    for command in commands:
+        process_command(command, history, list(observers), memento_manager, cache, stats)
+
+
+def test_histogram_percentiles_are_bucket_accurate():
+    histogram = LatencyHistogram()
+    for ns in [1000] * 98 + [1_000_000, 2_000_000]:
+        histogram.record(ns)
+
+    assert histogram.count == 100
+    assert histogram.min == 1000 and histogram.max == 2_000_000
+    assert 512 <= histogram.percentile(0.5) <= 2048
+    assert 2 ** 19 <= histogram.percentile(0.99) <= 2 ** 21
+    assert histogram.percentile(1.0) <= histogram.max
+    assert LatencyHistogram().percentile(0.5) == 0
+
+
+def test_stages_are_recorded_per_command(capsys):
+    stats = Instrumentation()
+    run(["add 1 2", "add 2 3", "divide 1 0", "undo"], stats, [RecordingObserver()])
+
+    counts = {(row["command"], row["stage"]): row["count"] for row in stats.snapshot()}
+    for stage in ("parse", "dispatch", "execute", "round", "history",
+                  "observer.RecordingObserver", "total"):
+        assert counts[("add", stage)] == 2
+    assert counts[("divide", "total")] == 1
+    assert ("divide", "round") not in counts  # failed in execute
+    assert counts[("undo", "total")] == 1
+
+
+def test_unknown_commands_share_one_histogram(capsys):
+    stats = Instrumentation()
+    run([f"typo{i} 1 2" for i in range(100)] + ["ROOT 16 0", "add 1 2"], stats)
+
+    assert set(stats.histograms) == {"unknown", "root", "add"}
+    counts = {(row["command"], row["stage"]): row["count"] for row in stats.snapshot()}
+    assert counts[("unknown", "total")] == 100
+
+
+def test_cached_calculations_are_timed():
+    stats = Instrumentation()
+    cache = ResultCache(8)
+    run(["add 1 2", "add 1 2"], stats, cache=cache)
+    rows = {r["stage"]: r for r in stats.snapshot() if r["command"] == "add"}
+    assert rows["execute"]["count"] == 2
+    assert cache.hits == 1
+
+
+def test_stats_command(capsys):
+    stats = Instrumentation()
+    run(["multiply 2 3", "stats"], stats)
+    output = capsys.readouterr().out
+    assert "p99 us" in output
+    assert "multiply" in output and "execute" in output
+
+    run(["stats reset"], stats)
+    assert "Statistics reset." in capsys.readouterr().out
+    assert [r["command"] for r in stats.snapshot()] == ["stats"]
+
+    run(["stats"], None)
+    assert "Statistics are disabled" in capsys.readouterr().out
+
+
+def test_periodic_dump(tmp_path):
+    dump_file = tmp_path / "stats" / "latency.json"
+    stats = Instrumentation(str(dump_file), dump_interval=0)
+    run(["add 1 2"], stats)
+
+    snapshot = json.loads(dump_file.read_text())
+    assert any(row["command"] == "add" and row["stage"] == "total" for row in snapshot["stats"])
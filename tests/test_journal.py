@@ -0,0 +1,126 @@
+import io
+import os
+import random
+import threading
+import pytest
+from app import config
+from app.batch import run_batch
+from app.calculator import process_command
+from app.calculator_memento import MementoManager
+from app.exceptions import FileProcessingError
+from app.history_store import CalculationHistory
+from app.journal import RECORD_SIZE, Journal, JournalObserver, read_journal, restore_history
+import app.calculation_operations  # registers the operations
+
+
+def state(history, memento_manager):
+    entries = [(c.__class__.__name__, c.a, c.b, c.result) for c in history]
+    redone = []
+    while memento_manager.can_redo():
+        calc = memento_manager.redo()
+        redone.append((calc.__class__.__name__, calc.a, calc.b, calc.result))
+    return entries, redone
+
+
+def test_replay_matches_the_session(tmp_path, capsys):
+    path = str(tmp_path / "journal.bin")
+    rng = random.Random(3)
+    history = CalculationHistory(5)
+    memento_manager = MementoManager(history)
+    observers = [JournalObserver(Journal(path, commit_interval=0))]
+    commands = ["add", "multiply", "divide", "power", "undo", "undo", "redo", "clear"]
+    for _ in range(500):
+        command = rng.choices(commands, weights=[3, 3, 2, 2, 3, 2, 3, 0.2])[0]
+        if command in ("undo", "redo", "clear"):
+            process_command(command, history, observers, memento_manager)
+        else:
+            process_command(f"{command} {rng.randint(-9, 9)} {rng.randint(0, 5)}", history, observers,
+                            memento_manager)
+    observers[0].close()
+    capsys.readouterr()
+
+    restored = CalculationHistory(5)
+    restored_manager = MementoManager(restored)
+    restore_history(path, restored, restored_manager)
+
+    assert restored_manager.can_undo() == memento_manager.can_undo()
+    assert state(restored, restored_manager) == state(history, memento_manager)
+
+
+def test_checkpoint_keeps_only_needed_events(tmp_path):
+    path = str(tmp_path / "journal.bin")
+    journal = Journal(path, commit_interval=0)
+    for i in range(1000):
+        journal.append_calculation("add", float(i), 1.0, i + 1.0)
+    journal.append_undo()
+    journal.close()
+
+    history = CalculationHistory(10)
+    memento_manager = MementoManager(history)
+    assert restore_history(path, history, memento_manager) == 9
+    # Header, one name record, ten calculations and one undo.
+    assert os.path.getsize(path) == RECORD_SIZE * 13
+    assert memento_manager.redo().a == 999
+
+    again = CalculationHistory(10)
+    restore_history(path, again, MementoManager(again))
+    assert [c.a for c in again] == [c.a for c in history][:9]
+
+
+def test_incomplete_record_is_ignored_and_truncated(tmp_path):
+    path = str(tmp_path / "journal.bin")
+    journal = Journal(path)
+    journal.append_calculation("add", 1.0, 2.0, 3.0)
+    journal.close()
+    with open(path, "ab") as f:
+        f.write(b"\x01\x00\x00")  # crash in the middle of a record
+
+    entries, undone = read_journal(path, 10)
+    assert entries == [("add", 1.0, 2.0, 3.0)] and undone == 0
+
+    journal = Journal(path)
+    journal.append_calculation("subtract", 5.0, 2.0, 3.0)
+    journal.close()
+    entries, _ = read_journal(path, 10)
+    assert entries == [("add", 1.0, 2.0, 3.0), ("subtract", 5.0, 2.0, 3.0)]
+
+
+def test_group_commit_shares_fsyncs(tmp_path):
+    journal = Journal(str(tmp_path / "journal.bin"), wait_for_commit=True)
+
+    def worker():
+        for _ in range(50):
+            journal.append_undo()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+    assert journal.commits < 400
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "journal.bin"
+    path.write_bytes(b"operation,operand1\n")
+    with pytest.raises(FileProcessingError):
+        Journal(str(path))
+    with pytest.raises(FileProcessingError):
+        read_journal(str(path), 10)
+
+
+def test_batch_sessions_continue_from_the_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE", False)
+    monkeypatch.setattr(config, "CALCULATOR_JOURNAL", True)
+    monkeypatch.setattr(config, "CALCULATOR_JOURNAL_FILE", str(tmp_path / "journal.bin"))
+    commands = tmp_path / "commands.txt"
+
+    commands.write_text("add 1 2\nmultiply 3 4\n")
+    run_batch(str(commands), output=io.StringIO(), report=io.StringIO())
+    commands.write_text("undo\nundo\nundo\nredo\n")
+    output = io.StringIO()
+    run_batch(str(commands), output=output, report=io.StringIO())
+
+    assert output.getvalue().splitlines() == [
+        "Undid last operation.", "Undid last operation.", "Nothing to undo.", "Redid operation."]
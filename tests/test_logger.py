@@ -0,0 +1,151 @@
+import gzip
+import logging
+import queue
+import threading
+import pytest
+from app import config
+from app.calculation import CalculationFactory
+from app.history import CALCULATION, FLUSH, UNDO, HistoryEvent
+from app.logger import (
+    BatchingQueueListener,
+    CompressingRotatingFileHandler,
+    LoggingObserver,
+    configure_logging,
+    shutdown_logging,
+)
+import app.calculation_operations  # registers the operations
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CALCULATOR_LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "CALCULATOR_LOG_MAX_BYTES", 0)
+    level = logging.getLogger().level
+    yield tmp_path
+    shutdown_logging()
+    logging.getLogger().setLevel(level)
+
+
+def make_calc(name, a, b):
+    calc = CalculationFactory.create_calculation(name, a, b)
+    calc.result = calc.execute()
+    return calc
+
+
+def test_observer_logs_through_the_queue(log_dir):
+    configure_logging()
+    observer = LoggingObserver()
+    observer.update(make_calc("add", 10, 5))
+    observer.flush()
+
+    content = (log_dir / "calculator.log").read_text()
+    assert content.endswith("Calculation performed: add (10, 5) = 15\n")
+
+
+def test_update_many_logs_a_batch(log_dir):
+    configure_logging()
+    observer = LoggingObserver()
+    events = [HistoryEvent(CALCULATION, "add", 1, 2, 3), HistoryEvent(UNDO),
+              HistoryEvent(CALCULATION, "divide", 1, 4, 0.25), HistoryEvent(FLUSH)]
+    observer.update_many(events)
+
+    lines = (log_dir / "calculator.log").read_text().splitlines()
+    assert [line.split(" - ", 1)[1] for line in lines] == [
+        "Calculation performed: add (1, 2) = 3", "Calculation performed: divide (1, 4) = 0.25"]
+
+    # With another handler listening, the records are handled one by one and reach both.
+    handler = CountingHandler()
+    logging.getLogger("calculator").addHandler(handler)
+    try:
+        observer.update_many(events)
+    finally:
+        logging.getLogger("calculator").removeHandler(handler)
+    assert handler.records == ["Calculation performed: add (1, 2) = 3", "Calculation performed: divide (1, 4) = 0.25"]
+    assert len((log_dir / "calculator.log").read_text().splitlines()) == 4
+
+
+def test_shutdown_writes_everything_queued(log_dir):
+    configure_logging()
+    observer = LoggingObserver()
+    for i in range(5000):
+        observer.update(make_calc("multiply", i, 2))
+    shutdown_logging()
+    shutdown_logging()
+
+    lines = (log_dir / "calculator.log").read_text().splitlines()
+    assert len(lines) == 5000
+    assert lines[-1].endswith("multiply (4999, 2) = 9998")
+
+
+def test_rotation_compresses_archives(log_dir, monkeypatch):
+    monkeypatch.setattr(config, "CALCULATOR_LOG_MAX_BYTES", 2000)
+    monkeypatch.setattr(config, "CALCULATOR_LOG_BACKUP_COUNT", 2)
+    configure_logging()
+    observer = LoggingObserver()
+    for i in range(200):
+        observer.update(make_calc("add", i, 1))
+    shutdown_logging()
+
+    names = sorted(p.name for p in log_dir.iterdir())
+    assert names == ["calculator.log", "calculator.log.1.gz", "calculator.log.2.gz"]
+    assert (log_dir / "calculator.log").stat().st_size <= 2000
+    archived = gzip.decompress((log_dir / "calculator.log.1.gz").read_bytes()).decode()
+    assert len(archived) <= 2000
+    assert (log_dir / "calculator.log").read_text().splitlines()[-1].endswith("add (199, 1) = 200")
+
+
+class CountingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.flushes = 0
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+
+    def flush(self):
+        self.flushes += 1
+
+
+def test_listener_flushes_once_per_batch():
+    record_queue = queue.SimpleQueue()
+    handler = CountingHandler()
+    listener = BatchingQueueListener(record_queue, handler, max_batch=100)
+    for i in range(1000):
+        record_queue.put(logging.makeLogRecord({"msg": "record %d", "args": (i,), "levelno": logging.INFO}))
+    listener.start()
+    assert listener.flush(timeout=5)
+    listener.stop()
+
+    assert handler.records == [f"record {i}" for i in range(1000)]
+    assert handler.flushes <= 1000 // 100 + 2
+
+
+def test_handler_tracks_size_without_flushing(tmp_path):
+    handler = CompressingRotatingFileHandler(str(tmp_path / "x.log"), max_bytes=50, backup_count=1)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(10):
+        handler.handle(logging.makeLogRecord({"msg": "0123456789"}))
+    handler.close()
+    assert (tmp_path / "x.log").stat().st_size <= 50
+    assert (tmp_path / "x.log.1.gz").exists()
+
+
+def test_other_loggers_records_are_formatted_when_logged(log_dir):
+    configure_logging()
+    values = ["before"]
+    logging.getLogger("thirdparty").warning("values: %s", values)
+    values[0] = "after"
+    LoggingObserver().flush()
+
+    assert (log_dir / "calculator.log").read_text().splitlines()[-1].endswith("values: ['before']")
+
+
+def test_handler_counts_encoded_bytes(tmp_path):
+    handler = CompressingRotatingFileHandler(str(tmp_path / "x.log"), max_bytes=50, backup_count=1,
+                                             encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(10):
+        handler.handle(logging.makeLogRecord({"msg": "äöüßéèêë"}))  # 16 bytes + newline
+    handler.close()
+    assert (tmp_path / "x.log").stat().st_size <= 50
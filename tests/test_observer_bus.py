@@ -0,0 +1,275 @@
+import csv
+import threading
+import tracemalloc
+import pytest
+from app.autosave import AutoSaveObserver, IncrementalAutoSaveObserver
+from app.history import CALCULATION, CLEAR, FLUSH, LOAD, REDO, UNDO, HistoryEvent, HistoryObserver, ObserverBus
+from app.history_store import CalculationHistory
+import app.calculation_operations  # registers the operations
+
+
+class RecordingObserver(HistoryObserver):
+    """Records every batch; the first one waits until ``gate`` is set."""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.entered = threading.Event()
+        self.batches = []
+        self.flushes = 0
+        self.closed = False
+
+    def update(self, calculation):
+        pass  # pragma: no cover
+
+    def update_many(self, events):
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait()
+        self.batches.append([(event.kind, event.a) for event in events])
+
+    @property
+    def events(self):
+        return [event for batch in self.batches for event in batch]
+
+    def close(self):
+        self.closed = True
+
+
+def calculation(a):
+    return HistoryEvent(CALCULATION, "add", a, a, 2 * a)
+
+
+def gated_bus(policy, queue_size=3):
+    """A bus whose observer is stuck in the delivery of calculation 1 until the gate opens."""
+    gate = threading.Event()
+    observer = RecordingObserver(gate)
+    observer.reads_history = policy != "block"  # lossy policies only apply to such observers
+    bus = ObserverBus(CalculationHistory(10), [observer], queue_size=queue_size, policy=policy)
+    bus.update_many([calculation(1)])
+    assert observer.entered.wait(5)
+    return bus, observer, gate
+
+
+def test_default_update_many_calls_the_matching_methods():
+    calls = []
+
+    class Observer(HistoryObserver):
+        def update(self, calc):
+            pass  # pragma: no cover
+
+        def update_values(self, operation, a, b, result):
+            calls.append((operation, a, b, result))
+
+        def on_undo(self, calc):
+            calls.append("undo")
+
+        def on_redo(self, calc):
+            calls.append("redo")
+
+        def on_clear(self):
+            calls.append("clear")
+
+        def on_load(self, history):
+            calls.append(("load", history))
+
+        def flush(self):
+            calls.append("flush")
+
+    Observer().update_many([calculation(1), HistoryEvent(UNDO), HistoryEvent(REDO), HistoryEvent(CLEAR),
+                            HistoryEvent(LOAD, history=[]), HistoryEvent(FLUSH)])
+    assert calls == [("add", 1, 1, 2), "undo", "redo", "clear", ("load", []), "flush"]
+
+
+def test_events_arrive_in_order_and_in_batches():
+    bus, observer, gate = gated_bus("block", queue_size=100)
+    for a in range(2, 50):
+        bus.update_values("add", a, a, 2 * a)
+        if a == 25:
+            bus.on_undo(None)
+    gate.set()
+    bus.flush()
+    bus.close()
+
+    calculations = [a for kind, a in observer.events if kind == CALCULATION]
+    assert calculations == list(range(1, 50))
+    assert observer.events.index(("undo", 0.0)) == 25
+    assert observer.events[-1] == ("flush", 0.0)
+    assert len(observer.batches) < 10
+    assert observer.closed
+
+
+def test_block_keeps_every_event_and_bounds_the_queue():
+    bus, observer, gate = gated_bus("block", queue_size=2)
+    released = threading.Timer(0.05, gate.set)
+    released.start()
+    for a in range(2, 20):
+        bus.update_values("add", a, a, 2 * a)
+    bus.close()
+
+    assert [a for _, a in observer.events] == list(range(1, 20))
+    stats = bus.stats()["RecordingObserver"]
+    assert stats["max_queue_depth"] == 2
+    assert stats["dropped"] == stats["coalesced"] == 0
+
+
+def test_drop_oldest_discards_waiting_calculations_only():
+    bus, observer, gate = gated_bus("drop_oldest")
+    for a in (2, 3, 4):
+        bus.update_values("add", a, a, 2 * a)
+    bus.on_undo(None)
+    bus.update_values("add", 5, 5, 10)
+    gate.set()
+    bus.close()
+
+    assert observer.events == [(CALCULATION, 1), (CALCULATION, 4), ("undo", 0.0), (CALCULATION, 5)]
+    assert bus.stats()["RecordingObserver"]["dropped"] == 2
+
+
+def test_coalesce_keeps_the_newest_event():
+    bus, observer, gate = gated_bus("coalesce")
+    for a in (2, 3, 4):
+        bus.update_values("add", a, a, 2 * a)
+    bus.on_clear()
+    bus.update_values("add", 5, 5, 10)
+    gate.set()
+    bus.close()
+
+    assert observer.events == [(CALCULATION, 1), ("clear", 0.0), (CALCULATION, 5)]
+    assert bus.stats()["RecordingObserver"]["coalesced"] == 3
+
+
+def test_observers_that_record_events_always_block(tmp_path):
+    gate = threading.Event()
+
+    class SlowIncremental(IncrementalAutoSaveObserver):
+        def update_many(self, events):
+            gate.wait()
+            super().update_many(events)
+
+    output_file = tmp_path / "history.csv"
+    bus = ObserverBus(CalculationHistory(100), [SlowIncremental(str(output_file), background=False)],
+                      queue_size=4, policy="coalesce")
+    threading.Timer(0.05, gate.set).start()
+    for a in range(50):
+        bus.update_values("add", a, a, 2 * a)
+    bus.close()
+
+    with open(output_file, newline="") as f:
+        assert [float(row[1]) for row in list(csv.reader(f))[1:]] == list(range(50))
+    stats = bus.stats()["SlowIncremental"]
+    assert stats["coalesced"] == stats["dropped"] == 0
+    assert stats["max_queue_depth"] <= 4
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        ObserverBus(CalculationHistory(10), [], policy="ignore")
+
+
+def test_observer_errors_are_raised_by_flush():
+    class Failing(RecordingObserver):
+        def update_many(self, events):
+            super().update_many(events)
+            raise OSError("disk full")
+
+    healthy, failing = RecordingObserver(), Failing()
+    bus = ObserverBus(CalculationHistory(10), [failing, healthy])
+    bus.update_values("add", 1, 1, 2)
+    with pytest.raises(OSError, match="disk full"):
+        bus.flush()
+    bus.close()
+    assert healthy.events == [(CALCULATION, 1), ("flush", 0.0)]
+
+
+def test_history_readers_get_a_copy_of_the_history(tmp_path):
+    output_file = tmp_path / "history.csv"
+    history = CalculationHistory(100)
+    observer = AutoSaveObserver(history, str(output_file))
+    bus = ObserverBus(history, [observer], policy="coalesce", queue_size=4)
+    for i in range(200):
+        with bus.lock:
+            history.append_values("add", i, 1, i + 1)
+            bus.update_values("add", i, 1, i + 1)
+    bus.flush()
+    bus.close()
+
+    with open(output_file, newline="") as f:
+        rows = list(csv.reader(f))[1:]
+    assert [float(row[1]) for row in rows] == list(range(100, 200))
+    assert bus.stats()["AutoSaveObserver"]["batches"] < 200
+
+
+def test_queued_events_hold_no_copies_of_the_history(tmp_path):
+    history = CalculationHistory(10_000)
+    for i in range(10_000):
+        history.append_values("add", i, 1, i + 1)
+    gate = threading.Event()
+
+    class SlowAutoSave(AutoSaveObserver):
+        def update_many(self, events):
+            gate.wait()
+            super().update_many(events)
+
+    bus = ObserverBus(history, [SlowAutoSave(history, str(tmp_path / "history.csv"))], queue_size=500)
+    tracemalloc.start()
+    try:
+        for i in range(400):
+            with bus.lock:
+                history.append_values("add", i, 2, i + 2)
+                bus.update_values("add", i, 2, i + 2)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    gate.set()
+    bus.close()
+
+    # One copy of the history is about 250 kB; at most the batch being delivered holds one.
+    assert peak < 1_000_000
+    with open(tmp_path / "history.csv", newline="") as f:
+        assert len(list(csv.reader(f))) == 10_001
+
+
+def test_calculator_session_with_the_bus(monkeypatch, tmp_path):
+    from app import config
+    from app.calculator import calculator
+    monkeypatch.setattr(config, "CALCULATOR_OBSERVER_BUS", True)
+    monkeypatch.setattr(config, "CALCULATOR_LOG_CALCULATIONS", False)
+    monkeypatch.setattr(config, "CALCULATOR_HISTORY_DIR", str(tmp_path))
+    inputs = iter(["add 1 2", "multiply 3 4", "undo", "save", "subtract 9 1", "exit"])
+    monkeypatch.setattr("builtins.input", lambda _: next(inputs))
+
+    with pytest.raises(SystemExit):
+        calculator()
+
+    with open(tmp_path / "history.csv", newline="") as f:
+        rows = list(csv.reader(f))
+    assert [row[0] for row in rows[1:]] == ["add", "subtract"]
+
+
+def test_commands_run_while_holding_observer_locks():
+    from app.calculator import process_command
+    from app.calculator_memento import MementoManager
+
+    class Lock:
+        held = False
+
+        def __enter__(self):
+            self.held = True
+
+        def __exit__(self, *exc):
+            self.held = False
+
+    class LockingObserver(HistoryObserver):
+        lock = Lock()
+        seen = []
+
+        def update(self, calculation):
+            pass
+
+        def update_values(self, operation, a, b, result):
+            self.seen.append(self.lock.held)
+
+    history = CalculationHistory(10)
+    observer = LockingObserver()
+    process_command("add 1 2", history, [observer], MementoManager(history))
+    assert observer.seen == [True] and not observer.lock.held
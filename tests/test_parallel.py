@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from app.calculation import CalculationFactory
+from app.parallel import SharedOperands, evaluate_parallel, shutdown_pool
+
+
+@pytest.fixture(autouse=True)
+def stop_pool():
+    yield
+    shutdown_pool()
+
+
+@pytest.mark.parametrize("name", ["add", "divide", "power", "square_root", "integer_division", "modulus"])
+def test_evaluate_parallel_matches_evaluate_many(name):
+    rng = np.random.default_rng(7)
+    a = rng.uniform(-1000, 1000, 10_000).round(1)
+    b = rng.integers(-5, 5, 10_000).astype(float)
+
+    results, errors = evaluate_parallel(name, a, b, workers=2, shard_size=1_000)
+    expected, expected_errors = CalculationFactory.evaluate_many(name, a, b)
+
+    np.testing.assert_array_equal(errors, expected_errors)
+    np.testing.assert_array_equal(results, expected)
+
+
+def test_shared_operands_write_results_in_place():
+    with SharedOperands(5_000) as shared:
+        shared.a[:] = np.arange(5_000)
+        shared.b[:] = 2.0
+        shared.b[10] = 0.0
+
+        failed = shared.evaluate("divide", workers=3, shard_size=700, precision=1)
+
+        assert failed == 1
+        assert shared.errors[10] and np.isnan(shared.results[10])
+        assert shared.results[11] == 5.5
+        np.testing.assert_array_equal(shared.results[:10], np.round(np.arange(10) / 2, 1))
+
+
+def test_small_batches_stay_in_process():
+    results, errors = evaluate_parallel("multiply", [1, 2, 3], 4, workers=4)
+
+    assert results.tolist() == [4, 8, 12]
+    assert not errors.any()
+
+
+def test_unknown_operation_is_rejected():
+    with pytest.raises(ValueError, match="not registered"):
+        evaluate_parallel("nope", [1], [2], workers=2)
@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import patch
+from app.calculation import CalculationFactory
+from app.result_cache import ResultCache
+import app.calculation_operations  # registers the operations
+
+
+def test_hits_misses_and_evictions():
+    cache = ResultCache(2)
+    assert cache.evaluate("add", 1.0, 2.0) == 3
+    assert cache.evaluate("add", 1.0, 2.0) == 3
+    cache.evaluate("multiply", 2.0, 3.0)
+    cache.evaluate("subtract", 5.0, 1.0)  # evicts add, the least recently used
+    assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 1, "size": 2, "maxsize": 2}
+
+    cache.evaluate("add", 1.0, 2.0)
+    assert cache.stats()["misses"] == 4
+
+
+def test_hit_skips_calculation():
+    cache = ResultCache(4)
+    cache.evaluate("power", 2.0, 10.0)
+    with patch.object(CalculationFactory, "create_calculation") as create:
+        assert cache.evaluate("power", 2.0, 10.0) == 1024
+    create.assert_not_called()
+
+
+def test_errors_are_cached():
+    cache = ResultCache(4)
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Cannot divide by zero"):
+            cache.evaluate("divide", 1.0, 0.0)
+        with pytest.raises(ValueError, match="negative"):
+            cache.evaluate("square_root", -4.0, 0.0)
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_unknown_operation_is_not_cached():
+    cache = ResultCache(4)
+    with pytest.raises(ValueError, match="not registered"):
+        cache.evaluate("unknown", 1.0, 2.0)
+    assert len(cache) == 0
+
+
+def test_signed_zeros_are_separate_entries():
+    cache = ResultCache(4)
+    assert str(cache.evaluate("add", -0.0, -0.0)) == "-0.0"
+    assert str(cache.evaluate("add", 0.0, -0.0)) == "0.0"
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        ResultCache(0)
+
+
+@pytest.fixture
+def reread_config(monkeypatch):
+    """Re-read the settings from the environment; the previous values are restored afterwards."""
+    from app import config
+    for name in dir(config):
+        if name.startswith("CALCULATOR_"):
+            monkeypatch.setattr(config, name, getattr(config, name))
+
+    def reread():
+        config._read_environment()
+        return config
+
+    return reread
+
+
+def test_cache_is_off_by_default(monkeypatch, reread_config):
+    from app.calculator import create_result_cache
+    monkeypatch.delenv("CALCULATOR_RESULT_CACHE_SIZE", raising=False)
+    config = reread_config()
+    assert config.CALCULATOR_RESULT_CACHE_SIZE == 0
+    assert create_result_cache() is None
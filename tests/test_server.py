@@ -0,0 +1,93 @@
+import asyncio
+import json
+from app.server import Session, start_server
+import app.calculation_operations  # registers the operations
+
+
+async def run_clients(*scripts):
+    """Send each script over its own connection and return what each received."""
+    server = await start_server("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    async def client(script):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(script.encode())
+        await writer.drain()
+        writer.write_eof()
+        data = await reader.read()
+        writer.close()
+        return data.decode()
+
+    async with server:
+        return await asyncio.gather(*(client(script) for script in scripts))
+
+
+def split_responses(output):
+    """Split plain-text output into the lines of each response (each ends with an empty line)."""
+    responses, current = [], []
+    for line in output.split("\n")[:-1]:
+        if line:
+            current.append(line)
+        else:
+            responses.append(current)
+            current = []
+    assert not current and output.endswith("\n")
+    return responses
+
+
+def test_pipelined_plain_commands():
+    (output,) = asyncio.run(run_clients("add 1 2\nmultiply 3 4\nundo\nundo\nundo\nredo\n"))
+    assert split_responses(output) == [
+        ["Result: 3.0"],
+        ["Result: 12.0"],
+        ["Undid last operation."],
+        ["Undid last operation."],
+        ["Nothing to undo."],
+        ["Redid operation."],
+    ]
+
+
+def test_every_plain_response_ends_with_an_empty_line():
+    (output,) = asyncio.run(run_clients("add 1 2\n\nhelp\n   \nmultiply 3 4\n"))
+    responses = split_responses(output)
+    assert len(responses) == 5
+    assert responses[0] == ["Result: 3.0"]
+    assert responses[1] == [] and responses[3] == []
+    assert "Available commands:" in responses[2] and len(responses[2]) > 10
+    assert responses[4] == ["Result: 12.0"]
+
+
+def test_json_lines_requests():
+    script = '{"id": 7, "command": "divide 1 4"}\n{"id": 8, "command": "divide 1 0"}\n{"command": 1}\nbad {\n'
+    (output,) = asyncio.run(run_clients(script))
+    lines = output.splitlines()
+    assert json.loads(lines[0]) == {"id": 7, "output": "Result: 0.25"}
+    assert json.loads(lines[1]) == {"id": 8, "output": "[ValueError] Cannot divide by zero"}
+    assert "error" in json.loads(lines[2])
+    assert lines[3:] == ["Unknown command: bad", ""]
+
+
+def test_connections_have_separate_histories():
+    first, second = asyncio.run(run_clients("add 1 1\nundo\nundo\n", "undo\nadd 2 2\nundo\n"))
+    assert split_responses(first) == [["Result: 2.0"], ["Undid last operation."], ["Nothing to undo."]]
+    assert split_responses(second) == [["Nothing to undo."], ["Result: 4.0"], ["Undid last operation."]]
+
+
+def test_history_queries_the_connections_own_history():
+    first, second = asyncio.run(run_clients("add 1 2\nmultiply 3 4\nhistory op=add\n", "history\n"))
+    assert split_responses(first)[2] == ["Calculations 1-1 of 1 (page 1/1):", "  #1: add 1.0 2.0 = 3.0"]
+    assert second == "No matching calculations.\n\n"
+
+
+def test_exit_closes_connection_and_skips_the_rest():
+    (output,) = asyncio.run(run_clients("add 1 1\nexit\nadd 2 2\n"))
+    assert split_responses(output) == [["Result: 2.0"], ["Exiting the calculator. Goodbye!"]]
+
+
+def test_server_only_commands_are_refused():
+    session = Session()
+    assert session.respond("save") == "Command not available over the network: save\n\n"
+    assert session.respond("LOAD") == "Command not available over the network: load\n\n"
+    assert session.respond("summary  FILE") == "Command not available over the network: summary file\n\n"
+    assert session.respond("summary") == "No calculations to summarize.\n\n"
+    assert session.open
@@ -0,0 +1,109 @@
+import io
+import random
+from app import config
+from app.batch import run_batch
+from app.calculator import process_command
+from app.calculator_memento import MementoManager
+from app.history_store import CalculationHistory
+from app.session_state import SessionStateObserver, load_session_state
+import app.calculation_operations  # registers the operations
+
+
+def drain(history, memento_manager):
+    """Entries, then everything redo gives back, then everything undo takes away."""
+    entries = [(c.__class__.__name__, c.a, c.b, c.result) for c in history]
+    redone = []
+    while memento_manager.can_redo():
+        calc = memento_manager.redo()
+        redone.append((calc.__class__.__name__, calc.a, calc.b, calc.result))
+    undone = []
+    while memento_manager.can_undo():
+        calc = memento_manager.undo()
+        undone.append((calc.__class__.__name__, calc.a, calc.b, calc.result))
+    return entries, redone, undone
+
+
+def random_session(path, capacity, steps, seed):
+    rng = random.Random(seed)
+    history = CalculationHistory(capacity)
+    memento_manager = MementoManager(history)
+    observer = SessionStateObserver(history, path)
+    for _ in range(steps):
+        command = rng.choices(["add", "divide", "power", "undo", "redo", "clear"], [3, 2, 2, 3, 2, 0.1])[0]
+        if command in ("undo", "redo", "clear"):
+            process_command(command, history, [observer], memento_manager)
+        else:
+            process_command(f"{command} {rng.randint(-9, 9)} {rng.randint(0, 4)}", history, [observer],
+                            memento_manager)
+    observer.close()
+    return history, memento_manager
+
+
+def test_restored_session_undoes_and_redoes_like_the_original(tmp_path, capsys):
+    path = str(tmp_path / "session.bin")
+    history, memento_manager = random_session(path, 7, 400, 5)
+    restored = CalculationHistory(7)
+    restored_manager = MementoManager(restored)
+    assert load_session_state(path, restored, restored_manager) == len(history)
+    capsys.readouterr()
+    assert drain(restored, restored_manager) == drain(history, memento_manager)
+
+
+def test_stacks_are_restored_without_creating_mementos(tmp_path):
+    path = str(tmp_path / "session.bin")
+    history = CalculationHistory(100_000)
+    for i in range(100_000):
+        history.append_values("add", float(i), 1.0, i + 1.0)
+    SessionStateObserver(history, path).close()  # writes the existing history
+
+    restored = CalculationHistory(100_000)
+    restored_manager = MementoManager(restored)
+    load_session_state(path, restored, restored_manager)
+    assert not restored_manager._undo_stack
+    assert restored_manager.undo().a == 99_999
+    assert restored_manager.redo().a == 99_999
+    assert len(restored) == 100_000 and restored[0].a == 0
+
+
+def test_session_continues_across_restarts(tmp_path, capsys):
+    path = str(tmp_path / "session.bin")
+    for session in range(3):
+        history = CalculationHistory(5)
+        memento_manager = MementoManager(history)
+        load_session_state(path, history, memento_manager)
+        observer = SessionStateObserver(history, path)
+        for i in range(4):
+            process_command(f"add {session} {i}", history, [observer], memento_manager)
+        process_command("undo", history, [observer], memento_manager)
+        observer.close()
+    capsys.readouterr()
+    assert [(c.a, c.b) for c in history] == [(1.0, 2.0), (2.0, 0.0), (2.0, 1.0), (2.0, 2.0)]
+    assert memento_manager.redo().b == 3.0
+
+
+def test_capacity_change_keeps_newest_entries(tmp_path, capsys):
+    path = str(tmp_path / "session.bin")
+    random_session(path, 10, 50, 2)
+    history = CalculationHistory(10)
+    memento_manager = MementoManager(history)
+    load_session_state(path, history, memento_manager)
+    smaller = CalculationHistory(3)
+    smaller_manager = MementoManager(smaller)
+    load_session_state(path, smaller, smaller_manager)
+    assert [c.a for c in smaller] == [c.a for c in history][-3:]
+    assert not smaller_manager.can_redo()
+
+
+def test_batch_sessions_resume_undo(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE", False)
+    monkeypatch.setattr(config, "CALCULATOR_LOG_CALCULATIONS", False)
+    monkeypatch.setattr(config, "CALCULATOR_PERSIST_UNDO", True)
+    monkeypatch.setattr(config, "CALCULATOR_SESSION_FILE", str(tmp_path / "session.bin"))
+    commands = tmp_path / "commands.txt"
+    commands.write_text("add 1 2\nmultiply 3 4\nundo\n")
+    run_batch(str(commands), output=io.StringIO(), report=io.StringIO())
+    commands.write_text("redo\nundo\nundo\nundo\n")
+    output = io.StringIO()
+    run_batch(str(commands), output=output, report=io.StringIO())
+    assert output.getvalue().splitlines() == [
+        "Redid operation.", "Undid last operation.", "Undid last operation.", "Nothing to undo."]
@@ -0,0 +1,190 @@
+import multiprocessing
+import random
+import pytest
+from app import config
+from app.calculation import CalculationFactory
+from app.calculator import create_observers, process_command
+from app.calculator_memento import MementoManager
+from app.history_store import CalculationHistory
+from app.shared_history import SharedHistoryObserver, merge_shared_history, read_shared_rows
+import app.calculation_operations  # registers the operations
+
+WRITERS = 8
+EVENTS = 400
+
+
+def session_events(seed):
+    rng = random.Random(seed)
+    events = []
+    for i in range(EVENTS):
+        roll = rng.random()
+        if roll < 0.1:
+            events.append(("undo",))
+        elif roll < 0.11:
+            events.append(("clear",))
+        else:
+            events.append(("add", float(seed), float(i)))
+    return events
+
+
+def expected_live(seed):
+    live = []
+    for event in session_events(seed):
+        if event[0] == "undo":
+            if live:
+                live.pop()
+        elif event[0] == "clear":
+            live.clear()
+        else:
+            live.append([event[0], str(event[1]), str(event[2]), str(event[1] + event[2])])
+    return live
+
+
+def write_session(path, seed, compact_threshold=None, max_rows=None):
+    observer = SharedHistoryObserver(path, session=f"writer-{seed}", background=seed % 2 == 0,
+                                     compact_threshold=compact_threshold, max_rows=max_rows)
+    if observer.writer is not None:
+        observer.writer.flush_interval = 0.001
+    for event in session_events(seed):
+        if event[0] == "undo":
+            observer.on_undo(None)
+        elif event[0] == "clear":
+            observer.on_clear()
+        else:
+            calc = CalculationFactory.create_calculation(*event)
+            calc.result = calc.execute()
+            observer.update(calc)
+    observer.close()
+
+
+def test_concurrent_writers_lose_nothing(tmp_path):
+    path = str(tmp_path / "shared.csv")
+    processes = [multiprocessing.Process(target=write_session, args=(path, seed)) for seed in range(WRITERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    rows = read_shared_rows(path)
+    assert len(rows) == WRITERS * EVENTS
+    for seed in range(WRITERS):
+        sequences = [int(row[1]) for row in rows if row[0] == f"writer-{seed}"]
+        assert sequences == list(range(1, EVENTS + 1))
+
+    merged = merge_shared_history(path)
+    for seed in range(WRITERS):
+        assert [row[2:] for row in merged if row[0] == f"writer-{seed}"] == expected_live(seed)
+
+
+def test_concurrent_writers_compact_without_losing_rows(tmp_path):
+    path = str(tmp_path / "shared.csv")
+    args = (50, WRITERS * EVENTS)  # compact often, but never trim live rows
+    processes = [multiprocessing.Process(target=write_session, args=(path, seed) + args)
+                 for seed in range(WRITERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    assert len(read_shared_rows(path)) < WRITERS * EVENTS
+    merged = merge_shared_history(path)
+    for seed in range(WRITERS):
+        assert [row[2:] for row in merged if row[0] == f"writer-{seed}"] == expected_live(seed)
+
+
+def test_compaction_bounds_the_file(tmp_path):
+    path = str(tmp_path / "shared.csv")
+    first = SharedHistoryObserver(path, session="a", background=False, max_rows=5, compact_threshold=10)
+    second = SharedHistoryObserver(path, session="b", background=False, max_rows=5, compact_threshold=1000)
+    second.update(CalculationFactory.create_calculation("add", 0, 0))
+    for i in range(200):
+        calc = CalculationFactory.create_calculation("add", i, 0)
+        calc.result = i
+        first.update(calc)
+        if i % 3 == 0:
+            first.on_undo(None)
+    # second still holds the replaced file open; its rows must reach the new one.
+    second.update(CalculationFactory.create_calculation("add", 7, 7))
+    second.on_undo(None)
+    first.close()
+    second.close()
+
+    assert first.compactions > 0
+    assert len(read_shared_rows(path)) <= 5 + 10 + 3
+    assert [row[5] for row in merge_shared_history(path, max_rows=5)] == ["193", "194", "196", "197", "199"]
+
+
+def test_merge_keeps_file_order_and_skips_duplicates(tmp_path):
+    path = str(tmp_path / "shared.csv")
+    first = SharedHistoryObserver(path, session="a", background=False)
+    second = SharedHistoryObserver(path, session="b", background=False)
+    for observer, a in ((first, 1), (second, 2), (first, 3), (second, 4)):
+        calc = CalculationFactory.create_calculation("add", a, 0)
+        calc.result = a
+        observer.update(calc)
+    second.on_undo(None)
+    first.close()
+    second.close()
+    with open(path, "a", newline="") as f:
+        f.write("a,2,add,9,9,18\r\n")  # replayed row with an old sequence number
+
+    assert [row[:3] + row[5:] for row in merge_shared_history(path)] == [
+        ["a", "1", "add", "1"], ["b", "1", "add", "2"], ["a", "2", "add", "3"]]
+    assert [row[0] for row in merge_shared_history(path, max_rows=2)] == ["b", "a"]
+
+
+def test_shared_mode_sessions(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE", True)
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_MODE", "shared")
+    monkeypatch.setattr(config, "CALCULATOR_LOG_CALCULATIONS", False)
+    monkeypatch.setattr(config, "CALCULATOR_SHARED_HISTORY_FILE", str(tmp_path / "shared.csv"))
+    sessions = []
+    for command in ("add 1 2", "multiply 3 4"):
+        history = CalculationHistory(10)
+        observers = create_observers(history)
+        process_command(command, history, observers, MementoManager(history))
+        sessions.append((history, observers))
+    for _, observers in sessions:
+        for observer in observers:
+            observer.close()
+    capsys.readouterr()
+
+    history, _ = sessions[0]
+    process_command("load", history, [], MementoManager(history))
+    output = capsys.readouterr().out
+    assert "add" in output and "multiply" in output
+    process_command("summary file", history, [], MementoManager(history))
+    assert capsys.readouterr().out.splitlines()[-1].split() == ["total", "2"]
+
+
+def test_undo_after_load_removes_the_loaded_row(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE", True)
+    monkeypatch.setattr(config, "CALCULATOR_AUTO_SAVE_MODE", "shared")
+    monkeypatch.setattr(config, "CALCULATOR_LOG_CALCULATIONS", False)
+    path = str(tmp_path / "shared.csv")
+    monkeypatch.setattr(config, "CALCULATOR_SHARED_HISTORY_FILE", path)
+    sessions = []
+    for command in ("add 1 2", "multiply 3 4"):
+        history = CalculationHistory(10)
+        memento_manager = MementoManager(history)
+        observers = create_observers(history)
+        process_command(command, history, observers, memento_manager)
+        for observer in observers:
+            observer.flush()
+        sessions.append((history, observers, memento_manager))
+
+    history, observers, memento_manager = sessions[0]
+    process_command("load", history, observers, memento_manager)
+    process_command("undo", history, observers, memento_manager)
+    process_command("undo", history, observers, memento_manager)
+    process_command("redo", history, observers, memento_manager)
+    for _, observers, _ in sessions:
+        for observer in observers:
+            observer.close()
+    capsys.readouterr()
+
+    # The multiply row of the other session is gone, the redone add is this session's again.
+    assert [c.__class__.__name__ for c in history] == ["add"]
+    assert [row[2] for row in merge_shared_history(path)] == ["add"]
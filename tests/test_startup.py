@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+import pytest
+from benchmarks.bench_startup import ROOT, measure_import
+
+# Generous default so slow CI machines pass; importing pandas alone takes far longer.
+BUDGET_MS = float(os.getenv("CALCULATOR_STARTUP_BUDGET_MS", "250"))
+
+
+@pytest.mark.parametrize("module", ["app.calculator", "main"])
+def test_import_does_not_load_heavy_modules(module):
+    _, loaded = measure_import(module)
+    assert loaded == []
+
+
+def test_import_time_within_budget():
+    best = min(measure_import("main")[0] for _ in range(3))
+    assert best < BUDGET_MS
+
+
+def test_import_has_no_side_effects(tmp_path):
+    env = dict(os.environ, CALCULATOR_LOG_DIR=str(tmp_path / "logs"),
+               CALCULATOR_HISTORY_DIR=str(tmp_path / "history"))
+    subprocess.run([sys.executable, "-c", "import main"], cwd=ROOT, env=env, check=True)
+    assert not (tmp_path / "logs").exists()
+    assert not (tmp_path / "history").exists()
@@ -1,39 +1,43 @@
 import pytest
+import tracemalloc
 from unittest.mock import patch, MagicMock
 from app.calculator_memento import MementoManager
 import pandas as pd
 from app.calculation import CalculationFactory
 from app.calculator import calculator
+from app.history_store import CalculationHistory
 
 @pytest.fixture
-def manager():
-    return MementoManager()
+def history():
+    return CalculationHistory(10)
 
 @pytest.fixture
-def mock_calc():
-    mock = MagicMock()
-    mock.a = 5
-    mock.b = 3
-    mock.result = 8
-    mock.__class__.__name__ = "Addition"
-    return mock
-
-def test_save_state_allows_undo(manager, mock_calc):
+def manager(history):
+    return MementoManager(history)
+
+def record(history, manager, a=5, b=3):
+    position = history.append_values("add", a, b, a + b)
+    manager.save_state(position)
+    return position
+
+def test_save_state_allows_undo(manager, history):
     assert not manager.can_undo()
-    manager.save_state(mock_calc)
+    record(history, manager)
     assert manager.can_undo()
 
-def test_undo_returns_last_calc(manager, mock_calc):
-    manager.save_state(mock_calc)
+def test_undo_returns_last_calc(manager, history):
+    record(history, manager)
     result = manager.undo()
-    assert result == mock_calc
+    assert (result.a, result.b, result.result) == (5, 3, 8)
+    assert len(history) == 0
     assert manager.can_redo()
 
-def test_redo_restores_calc(manager, mock_calc):
-    manager.save_state(mock_calc)
+def test_redo_restores_calc(manager, history):
+    record(history, manager)
     manager.undo()
     restored = manager.redo()
-    assert restored == mock_calc
+    assert (restored.a, restored.b, restored.result) == (5, 3, 8)
+    assert [c.a for c in history] == [5]
     assert manager.can_undo()
 
 def test_undo_without_history_raises(manager):
@@ -44,13 +48,71 @@ def test_redo_without_undo_raises(manager):
     with pytest.raises(IndexError, match="Nothing to redo"):
         manager.redo()
 
-def test_redo_stack_clears_on_new_action(manager, mock_calc):
-    manager.save_state(mock_calc)
+def test_redo_stack_clears_on_new_action(manager, history):
+    record(history, manager)
     manager.undo()
     assert manager.can_redo()
-    manager.save_state(mock_calc)
+    record(history, manager)
     assert not manager.can_redo()
 
+def test_clear_forgets_undo_and_redo(manager, history):
+    record(history, manager)
+    record(history, manager)
+    manager.undo()
+    manager.clear()
+    assert not manager.can_undo()
+    assert not manager.can_redo()
+
+def test_undo_stack_follows_history_eviction():
+    history = CalculationHistory(3)
+    manager = MementoManager(history)
+    for i in range(5):
+        record(history, manager, a=i)
+    undone = [manager.undo().a for _ in range(3)]
+    assert undone == [4, 3, 2]
+    assert not manager.can_undo()
+    assert len(history) == 0
+    assert [manager.redo().a for _ in range(3)] == [2, 3, 4]
+    assert [c.a for c in history] == [2, 3, 4]
+
+def test_undo_redo_after_wraparound_keeps_order():
+    history = CalculationHistory(4)
+    manager = MementoManager(history)
+    for i in range(10):
+        record(history, manager, a=i)
+        if i % 3 == 0:
+            manager.undo()
+            manager.redo()
+            manager.undo()
+    assert [c.a for c in history] == [5, 7, 8]
+
+def test_memory_stays_bounded_over_millions_of_operations():
+    history = CalculationHistory(1000)
+    manager = MementoManager(history)
+    append_values = history.append_values
+    save_state = manager.save_state
+    undo = manager.undo
+
+    def run(operations):
+        for i in range(operations):
+            save_state(append_values("add", i, 1, i + 1))
+            if i % 2:
+                undo()
+
+    run(2000)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    run(100_000)
+    traced_growth = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    run(1_000_000)
+
+    assert traced_growth < 100_000
+    assert len(history) <= 1000
+    assert len(manager._undo_stack) == len(history)
+    assert len(manager._redo_stack) <= 1000
+    assert len(history._a) == 1000
+
 # --------- Test Save Command ---------
 @patch("builtins.input", side_effect=["add 1 2", "save", "exit"])
 @patch("sys.exit", side_effect=SystemExit)
@@ -61,15 +123,18 @@ def test_save_command(mock_exit, mock_input, capsys):
     assert "History saved." in output
 
 # --------- Test Load Command ---------
-@patch("builtins.input", side_effect=["load", "exit"])
-@patch("pandas.read_csv")
+@patch("builtins.input", side_effect=["load", "undo", "exit"])
 @patch("sys.exit", side_effect=SystemExit)
-def test_load_command(mock_exit, mock_read_csv, mock_input, capsys):
-    mock_read_csv.return_value = pd.DataFrame({"operation": ["add"], "operand1": [1], "operand2": [2], "result": [3]})
+def test_load_command(mock_exit, mock_input, capsys, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.config.CALCULATOR_HISTORY_DIR", str(tmp_path))
+    monkeypatch.setattr("app.config.CALCULATOR_AUTO_SAVE", False)
+    pd.DataFrame({"operation": ["add"], "operand1": [1], "operand2": [2], "result": [3]}).to_csv(
+        tmp_path / "history.csv", index=False)
     with pytest.raises(SystemExit):
         calculator()
     output = capsys.readouterr().out
     assert "operation" in output or "add" in output
+    assert "Loaded 1 calculations" in output and "Undid last operation." in output
 
 # --------- Test Missing Argument ---------
 @patch("builtins.input", side_effect=["add 1", "exit"])
@@ -115,3 +180,12 @@ def test_redo_command(mock_exit, mock_input, capsys):
         calculator()
     output = capsys.readouterr().out
     assert "Redid operation." in output
+
+# --------- Test Undo After Clear ---------
+@patch("builtins.input", side_effect=["add 1 2", "clear", "undo", "exit"])
+@patch("sys.exit", side_effect=SystemExit)
+def test_undo_after_clear(mock_exit, mock_input, capsys):
+    with pytest.raises(SystemExit):
+        calculator()
+    output = capsys.readouterr().out
+    assert "Nothing to undo." in output
@@ -0,0 +1,94 @@
+import math
+import numpy as np
+import pytest
+from app import config
+from app.calculation import Calculation, CalculationFactory
+from app.vector_operations import round_results
+import app.calculation_operations  # registers the operations
+
+OPERATIONS = [
+    "add", "subtract", "multiply", "divide", "power", "modulus",
+    "percentage", "absolute_difference", "square_root", "integer_division",
+]
+
+
+def scalar_results(name, a, b, precision):
+    results, errors = [], []
+    for x, y in zip(a, b):
+        try:
+            results.append(round(CalculationFactory.create_calculation(name, float(x), float(y)).execute(), precision))
+            errors.append(False)
+        except Exception:
+            results.append(math.nan)
+            errors.append(True)
+    return np.array(results, dtype=float), np.array(errors)
+
+
+@pytest.mark.parametrize("name", OPERATIONS)
+def test_vector_path_matches_scalar_path(name):
+    rng = np.random.default_rng(42)
+    a = np.round(rng.uniform(-1000, 1000, 5000) * 1000) / 1000
+    b = np.round(rng.uniform(-20, 20, 5000) * 10) / 10
+    b[::25] = 0
+    a[::9] = np.round(a[::9]) + 0.005  # ties for the rounding step
+
+    results, errors = CalculationFactory.evaluate_many(name, a, b)
+    expected, expected_errors = scalar_results(name, a, b, config.CALCULATOR_PRECISION)
+
+    np.testing.assert_array_equal(errors, expected_errors)
+    np.testing.assert_array_equal(results, expected)
+
+
+@pytest.mark.parametrize("name, a, b", [
+    ("divide", 1, 0),
+    ("modulus", 1, 0),
+    ("integer_division", 5, 0.5),
+    ("square_root", -4, 0),
+    ("power", -8, 0.5),
+    ("power", 0, -1),
+    ("power", 10, 400),
+])
+def test_error_rows_are_masked(name, a, b):
+    results, errors = CalculationFactory.evaluate_many(name, [a, 4], [b, 2])
+    assert errors.tolist() == [True, False]
+    assert math.isnan(results[0])
+
+
+def test_percentage_of_zero_is_not_an_error():
+    results, errors = CalculationFactory.evaluate_many("percentage", [5], [0])
+    assert results.tolist() == [0.0]
+    assert not errors.any()
+
+
+def test_evaluate_many_uses_precision():
+    results, _ = CalculationFactory.evaluate_many("divide", [1, 2], [3, 3], precision=4)
+    assert results.tolist() == [0.3333, 0.6667]
+
+
+def test_evaluate_many_broadcasts_scalars():
+    results, _ = CalculationFactory.evaluate_many("multiply", [1, 2, 3], 2)
+    assert results.tolist() == [2, 4, 6]
+
+
+def test_evaluate_many_unregistered():
+    with pytest.raises(ValueError, match="Calculation unknown_op is not registered."):
+        CalculationFactory.evaluate_many("unknown_op", [1], [2])
+
+
+def test_evaluate_many_falls_back_without_kernel(monkeypatch):
+    class halve(Calculation):
+        def execute(self) -> float:
+            if self.b == 0:
+                raise ValueError("no")
+            self.result = self.a / 2
+            return self.result
+
+    monkeypatch.setitem(CalculationFactory._calculations, "halve", halve)
+    results, errors = CalculationFactory.evaluate_many("halve", [3, 4], [1, 0])
+    assert results[0] == 1.5
+    assert errors.tolist() == [False, True]
+
+
+@pytest.mark.parametrize("value", [2.675, 1.005, 0.125, -0.375, 1e17 + 0.5, 4.5e13 + 0.0078125])
+def test_round_results_matches_builtin(value):
+    assert round_results(np.array([value]), 2)[0] == round(value, 2)